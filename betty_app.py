@@ -28,6 +28,8 @@ except ImportError:
 from config.settings import AppConfig
 from utils.document_processor import document_processor
 from utils.vector_store import betty_vector_store
+from utils.model_registry import model_registry
+from utils.context_packer import format_context, pack_context
 from utils.feedback_manager import feedback_manager
 from utils.clipboard_helper import create_inline_copy_button
 
@@ -67,6 +69,13 @@ def initialize_knowledge_base():
                         betty_vector_store.delete_collection(collection_name)
                         st.success("✅ Existing database cleared for complete rebuild")
 
+                # Load the prebuilt snapshot into an empty store instead of re-embedding docs/
+                snapshot_path = AppConfig.KB_SNAPSHOT_PATH
+                if (not force_reindex and snapshot_path and os.path.exists(snapshot_path)
+                        and betty_vector_store.get_or_create_collection(collection_name).count() == 0):
+                    if betty_vector_store.import_snapshot(snapshot_path, collection_name):
+                        st.info("📦 Loaded prebuilt knowledge base snapshot")
+
                 # Check if collection exists and get current state
                 collections = betty_vector_store.list_collections()
                 collection_exists = collection_name in collections
@@ -82,7 +91,7 @@ def initialize_knowledge_base():
                     # Walk through all subdirectories
                     for root, dirs, files in os.walk(docs_path):
                         for file in files:
-                            if file.lower().endswith(('.pdf', '.docx', '.txt', '.md', '.csv', '.xlsx')):
+                            if file.lower().endswith(AppConfig.SUPPORTED_FILE_TYPES):
                                 doc_files.append(os.path.join(root, file))
                 
                 # Check if we need to update (new files or no existing collection)
@@ -95,28 +104,25 @@ def initialize_knowledge_base():
 
                 # PRE-POPULATED VECTOR DATABASE STRATEGY
                 # Check if we have a pre-populated vector database
-                if collection_exists and current_doc_count > 50:
+                if collection_exists and current_doc_count > 50 and not is_local:
                     # Use existing pre-populated vector database
                     needs_update = False
-                    env_type = "☁️ Cloud" if not is_local else "💾 Local"
-                    st.info(f"📚 Using pre-populated knowledge base ({current_doc_count} documents) - {env_type}")
+                    st.info(f"📚 Using pre-populated knowledge base ({current_doc_count} documents) - ☁️ Cloud")
                 elif is_local and doc_files:
-                    # Only rebuild locally if no substantial database exists
-                    stored_files = getattr(st.session_state, 'knowledge_files_count', 0)
-                    if len(doc_files) != stored_files or current_doc_count < 50:
-                        needs_update = True
-                        st.info(f"🔄 Building vector database from {len(doc_files)} documents...")
+                    # Incremental sync - the ingestion manifest skips unchanged files
+                    needs_update = True
                 else:
                     # Cloud deployment without pre-populated database - graceful fallback
                     needs_update = False
                     st.warning("⚠️ No pre-populated vector database found. Betty will use embedded knowledge.")
                 
                 if needs_update and doc_files:
-                    st.info(f"📚 Loading {len(doc_files)} documents into knowledge base...")
+                    st.info(f"📚 Syncing {len(doc_files)} documents with knowledge base...")
                     success = betty_vector_store.add_documents_from_files(
                         collection_name, 
                         doc_files, 
-                        show_progress=True
+                        show_progress=True,
+                        prune_removed=True
                     )
                     
                     if success:
@@ -161,7 +167,7 @@ def force_knowledge_base_refresh():
         collection_name = AppConfig.KNOWLEDGE_COLLECTION_NAME
         collections = betty_vector_store.list_collections()
         if collection_name in collections:
-            betty_vector_store.client.delete_collection(name=collection_name)
+            betty_vector_store.delete_collection(collection_name)
             st.info("🗑️ Cleared existing knowledge base for refresh")
     except Exception as e:
         st.warning(f"Note: Could not clear existing collection: {e}")
@@ -182,6 +188,10 @@ if "session_id" not in st.session_state:
 if "feedback_given" not in st.session_state:
     st.session_state.feedback_given = set()
 
+# Load models in the background while the page renders; the first search waits if needed
+if AppConfig.MODEL_WARMUP:
+    betty_vector_store.start_warmup()
+
 # Initialize knowledge base for cloud deployment
 initialize_knowledge_base()
 
@@ -339,6 +349,8 @@ def search_knowledge_base(query: str, collection_name: str, n_results: int = Non
     n_results = n_results or AppConfig.MAX_SEARCH_RESULTS
     if AppConfig.USE_RERANKING:
         return vector_store.search_collection_with_reranking(collection_name, query, n_results)
+    elif AppConfig.USE_HYBRID_SEARCH:
+        return vector_store.search_collection_hybrid(collection_name, query, n_results)
     else:
         return vector_store.search_collection(collection_name, query, n_results)
 
@@ -650,7 +662,7 @@ for i, message in enumerate(st.session_state.messages):
 # Accept user input
 uploaded_file = st.file_uploader(
     "Upload a document for temporary context",
-    type=["pdf", "docx", "txt", "csv", "xlsx"],
+    type=[extension.lstrip(".") for extension in AppConfig.SUPPORTED_FILE_TYPES],
     key="file_uploader"
 )
 
@@ -694,15 +706,16 @@ if st.session_state.messages and st.session_state.messages[-1]["role"] == "user"
             source_files = []
             if st.session_state.get("use_rag", True):
                 relevant_docs = search_knowledge_base(last_user_message, collection_name=AppConfig.KNOWLEDGE_COLLECTION_NAME)
-                if relevant_docs:
-                    context = "\n\n".join([
-                        f"Document: {doc['metadata']['filename']}\nContent: {doc['content']}"
-                        for doc in relevant_docs
-                    ])
+                # Adjacent chunks are merged and the context is capped at CONTEXT_TOKEN_BUDGET tokens
+                context_blocks = pack_context(
+                    relevant_docs, AppConfig.CONTEXT_TOKEN_BUDGET, document_processor.tokenizer
+                ) if relevant_docs else []
+                if context_blocks:
+                    context = format_context(context_blocks)
                     system_prompt += f"\n\nRelevant context from permanent knowledge base:\n\n{context}"
 
                     # Collect unique source files for citation
-                    source_files = list(set([doc['metadata']['filename'] for doc in relevant_docs]))
+                    source_files = list(set([block['filename'] for block in context_blocks]))
 
                     # Add source citation instruction to system prompt
                     if source_files:
@@ -823,7 +836,7 @@ with st.sidebar:
             docs_path = "docs"
             if os.path.exists(docs_path):
                 doc_files = [f for f in os.listdir(docs_path) 
-                           if f.lower().endswith(('.pdf', '.docx', '.txt', '.md', '.csv'))]
+                           if f.lower().endswith(AppConfig.SUPPORTED_FILE_TYPES)]
                 if doc_files:
                     st.success(f"**Documents in knowledge base:**")
                     for file in sorted(doc_files):
@@ -839,7 +852,7 @@ with st.sidebar:
         **To add new knowledge documents:**
         
         1. **Copy files** to the `docs/` folder:
-           - Supported: `.pdf`, `.docx`, `.txt`, `.md`, `.csv`
+           - Supported: `.pdf`, `.docx`, `.txt`, `.md`, `.csv`, `.xlsx`, `.pptx`, `.json`
            - Max size: 10MB per file
         
         2. **Click "🔄 Refresh KB"** to reload all documents
@@ -900,4 +913,6 @@ with st.sidebar:
         **Model**: {AppConfig.CLAUDE_MODEL if AppConfig.AI_PROVIDER == 'claude' else AppConfig.OPENAI_MODEL}
         **System Prompt**: {"v4.3 (file-based)" if SYSTEM_PROMPT and "v4.3" in SYSTEM_PROMPT[:200] else "v4.2 (fallback)"}
         """)
+        for model_name, error in list(model_registry.warmup_errors.items()):
+            st.warning(f"⚠️ Model warmup failed for {model_name}: {error}")
 
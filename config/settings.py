@@ -25,19 +25,46 @@ class AppConfig:
     
     # Database Configuration
     CHROMA_DB_PATH: str = os.getenv("CHROMA_DB_PATH", "./data/betty_chroma_db")
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma").lower()  # "chroma" or "numpy" (exact flat index)
+    VECTOR_INDEX_DTYPE: str = os.getenv("VECTOR_INDEX_DTYPE", "float32")  # Flat index storage, "float32" or "float16"
+    EMBEDDING_PROJECTION: str = os.getenv("EMBEDDING_PROJECTION", "none").lower()  # "none", "pca" or "truncate", applied when a collection is built
+    EMBEDDING_PROJECTION_DIM: int = int(os.getenv("EMBEDDING_PROJECTION_DIM", "256"))  # Stored vector dimension with a projection
+    PROJECTION_FIT_SAMPLES: int = int(os.getenv("PROJECTION_FIT_SAMPLES", "2048"))  # Chunks used to fit PCA before the first write
+    KB_SNAPSHOT_PATH: str = os.getenv("KB_SNAPSHOT_PATH", "./data/kb_snapshot.zip")  # Prebuilt knowledge base loaded into an empty store
     
     # Text Processing Configuration - Optimized for consistent context
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))  # Larger chunks for better context
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))  # More overlap for continuity
     MAX_SEARCH_RESULTS: int = int(os.getenv("MAX_SEARCH_RESULTS", "8"))  # More results for comprehensive context
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))  # Tokens of knowledge base context added to the system prompt
     
     # Embedding Configuration
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
     TOKENIZER_MODEL: str = os.getenv("TOKENIZER_MODEL", "cl100k_base")
+    MODEL_IDLE_UNLOAD_SECONDS: int = int(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "0"))  # Unload models idle this long, 0 keeps them loaded
+    MODEL_WARMUP: bool = os.getenv("MODEL_WARMUP", "true").lower() in ["true", "1", "yes"]  # Load models in the background while the UI renders
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch").lower()  # "torch" or "onnx" (int8 quantized, CPU)
+    ONNX_CACHE_DIR: str = os.getenv("ONNX_CACHE_DIR", "./data/onnx_models")  # Exported and quantized models
+    ONNX_PARITY_THRESHOLD: float = float(os.getenv("ONNX_PARITY_THRESHOLD", "0.99"))  # Min agreement with PyTorch outputs
     
     # File Processing Configuration
     MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
-    SUPPORTED_FILE_TYPES: tuple = (".pdf", ".docx", ".txt", ".csv")
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "256"))  # Max chunks held in memory before embedding and writing
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))  # Texts per embedding model forward pass
+    XLSX_ROWS_PER_BLOCK: int = int(os.getenv("XLSX_ROWS_PER_BLOCK", "500"))  # Spreadsheet rows per streamed text block
+    EXTRACTION_WORKERS: int = int(os.getenv("EXTRACTION_WORKERS", "0"))  # Worker processes for text extraction, 0 runs in-process
+    EXTRACTION_TIMEOUT_SECONDS: int = int(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "300"))  # Per-file limit in worker mode
+    PDF_PAGE_WORKERS: int = int(os.getenv("PDF_PAGE_WORKERS", "0"))  # Worker processes per PDF for page-parallel extraction, 0 reads pages in-process
+    PDF_PAGE_TIMEOUT_SECONDS: int = int(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "60"))  # Pages taking longer are skipped in page-parallel mode
+    CSV_PROJECT_NAMES: list = [
+        name.strip() for name in os.getenv(
+            "CSV_PROJECT_NAMES",
+            "Digital Twin Implementation,Advanced Analytics Platform,Customer Experience Platform,"
+            "AI-Powered Predictive Maintenance,Smart Manufacturing Systems,Quality Management System,"
+            "Green Operations Initiative,Blockchain Integration"
+        ).split(",") if name.strip()
+    ]  # Projects whose impact scores are indexed from CSV rows, comma-separated
+    SUPPORTED_FILE_TYPES: tuple = (".pdf", ".docx", ".txt", ".md", ".csv", ".xlsx", ".pptx", ".json")  # Extensions ingested from docs/ and accepted by the uploader
     
     # UI Configuration
     PAGE_TITLE: str = "Betty - Your AI Assistant"
@@ -54,6 +81,26 @@ class AppConfig:
     USE_RERANKING: bool = bool(os.getenv("USE_RERANKING", "False"))  # Disabled for deterministic results
     USE_SEMANTIC_CHUNKING: bool = bool(os.getenv("USE_SEMANTIC_CHUNKING", "False"))  # Simplified chunking
     RERANKER_MODEL: str = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_LATENCY_BUDGET_MS: int = int(os.getenv("RERANK_LATENCY_BUDGET_MS", "0"))  # Cascade reranking budget per query, 0 reranks every candidate
+    RERANK_CASCADE_BATCH_SIZE: int = int(os.getenv("RERANK_CASCADE_BATCH_SIZE", "4"))  # Candidates scored per cascade step
+    RERANK_STABLE_BATCHES: int = int(os.getenv("RERANK_STABLE_BATCHES", "2"))  # Stop once the top results survive this many steps
+    USE_HYBRID_SEARCH: bool = os.getenv("USE_HYBRID_SEARCH", "false").lower() in ["true", "1", "yes"]  # BM25 + dense fusion
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Candidates taken from each retriever
+    RRF_K: int = int(os.getenv("RRF_K", "60"))  # Reciprocal rank fusion smoothing constant
+    USE_MMR: bool = os.getenv("USE_MMR", "false").lower() in ["true", "1", "yes"]  # Maximal marginal relevance selection of search results, off until recall is checked with evaluation/run_evaluation.py
+    MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1.0 ranks by relevance only, lower values favour diverse chunks
+    MMR_DUPLICATE_THRESHOLD: float = float(os.getenv("MMR_DUPLICATE_THRESHOLD", "0.95"))  # Cosine similarity at which chunks count as duplicates, 1.0 keeps them
+    AUTO_DOMAIN_FILTER: bool = os.getenv("AUTO_DOMAIN_FILTER", "true").lower() in ["true", "1", "yes"]  # Narrow searches to a domain named in the query, keeping documents without a domain
+
+    # Retrieval Cache Configuration
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "512"))  # 0 disables the cache
+    QUERY_EMBEDDING_CACHE_TTL: int = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))  # Seconds, 0 never expires
+    SEARCH_RESULT_CACHE_SIZE: int = int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "256"))  # 0 disables the cache
+    SEARCH_RESULT_CACHE_TTL: int = int(os.getenv("SEARCH_RESULT_CACHE_TTL", "900"))  # Seconds, 0 never expires
+    RERANK_SCORE_CACHE_SIZE: int = int(os.getenv("RERANK_SCORE_CACHE_SIZE", "4096"))  # (query, chunk) scores, 0 disables the cache
+    RERANK_SCORE_CACHE_TTL: int = int(os.getenv("RERANK_SCORE_CACHE_TTL", "3600"))  # Seconds, 0 never expires
+    USE_EMBEDDING_CACHE: bool = os.getenv("USE_EMBEDDING_CACHE", "true").lower() in ["true", "1", "yes"]
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.db")
     
     # Environment Configuration
     DISABLE_TOKENIZER_PARALLELISM: bool = True
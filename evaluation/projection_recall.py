@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Embedding projection recall report.
+
+Measures how much retrieval quality each embedding projection and storage
+dtype gives up against full-dimension float32 vectors. The knowledge base
+chunks are re-embedded at full dimension (served from the embedding cache
+when it is enabled), the testset prompts are used as queries, and the exact
+top-k of every variant is compared with the exact full-dimension top-k.
+
+Usage:
+    python evaluation/projection_recall.py --k 5 --dims 384 256 128
+"""
+
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from config.settings import AppConfig
+from utils.embedding_projection import EmbeddingProjection
+from utils.vector_store import betty_vector_store
+
+
+def load_prompts(testset_path: str) -> List[str]:
+    """Load the question prompts from the testset CSV"""
+    with open(testset_path, 'r', encoding='utf-8') as f:
+        return [row['prompt'] for row in csv.DictReader(f) if row.get('prompt')]
+
+
+def embed_collection(collection_name: str) -> np.ndarray:
+    """Embed every chunk of a collection at the model's full dimension"""
+    collection = betty_vector_store.get_or_create_collection(collection_name)
+    vectors = []
+    for page in betty_vector_store._iter_collection_pages(collection, include=["documents"]):
+        vectors.extend(betty_vector_store._embed_documents(page["documents"]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def exact_top_k(documents: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k nearest documents by L2 distance, as the vector stores rank them"""
+    documents = documents.astype(np.float32)
+    queries = queries.astype(np.float32)
+    # ||q||^2 is the same for every document of a query, so it does not change the ranking
+    distances = (documents * documents).sum(axis=1)[None, :] - 2.0 * (queries @ documents.T)
+    top = np.argpartition(distances, kth=min(k, documents.shape[0]) - 1, axis=1)[:, :k]
+    order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Average share of the true top-k found in the variant's top-k"""
+    k = truth.shape[1]
+    return float(np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)]))
+
+
+def evaluate_variant(
+    documents: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    method: Optional[str],
+    dim: Optional[int],
+    dtype: str,
+    fit_samples: int
+) -> Dict:
+    """Project and store vectors like an ingest would, then measure recall, size and search time"""
+    projection = None
+    if method:
+        projection = EmbeddingProjection(method, dim).fit(documents[:fit_samples])
+        documents = projection.transform(documents)
+        queries = projection.transform(queries)
+
+    stored = documents.astype(dtype)
+    started = time.perf_counter()
+    found = exact_top_k(stored, queries, k)
+    search_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    return {
+        'method': method or 'none',
+        'dim': stored.shape[1],
+        'dtype': dtype,
+        'recall_at_k': round(recall_at_k(truth, found), 4),
+        'bytes_per_vector': stored.shape[1] * stored.dtype.itemsize,
+        'search_ms_per_query': round(search_ms, 3),
+        'explained_variance': (
+            round(projection.explained_variance_ratio, 4)
+            if projection is not None and projection.explained_variance_ratio is not None else None
+        )
+    }
+
+
+def run_report(collection_name: str, testset_path: str, k: int, dims: List[int], fit_samples: int) -> List[Dict]:
+    """Compare every projection and dtype variant with full-dimension float32 search"""
+    print(f"Embedding collection '{collection_name}'...")
+    documents = embed_collection(collection_name)
+    if len(documents) == 0:
+        print(f"✗ Collection '{collection_name}' is empty, build the knowledge base first")
+        return []
+
+    prompts = load_prompts(testset_path)
+    queries = np.asarray(betty_vector_store._encode_queries(prompts), dtype=np.float32)
+    k = min(k, len(documents))
+    truth = exact_top_k(documents, queries, k)
+    print(f"✓ {len(documents)} chunks, {len(queries)} queries, full dimension {documents.shape[1]}")
+
+    variants = [(None, None, "float32"), (None, None, "float16")]
+    for method in ("pca", "truncate"):
+        for dim in dims:
+            if dim < documents.shape[1]:
+                variants.extend([(method, dim, "float32"), (method, dim, "float16")])
+
+    return [
+        evaluate_variant(documents, queries, truth, k, method, dim, dtype, fit_samples)
+        for method, dim, dtype in variants
+    ]
+
+
+def print_report(rows: List[Dict], k: int):
+    """Print the recall table"""
+    print(f"\n{'='*78}")
+    print(f"EMBEDDING PROJECTION RECALL@{k}")
+    print(f"{'='*78}")
+    print(f"{'method':<10}{'dim':>6}{'dtype':>9}{'recall':>9}{'bytes/vec':>11}{'ms/query':>10}{'variance':>10}")
+    for row in rows:
+        variance = f"{row['explained_variance']:.3f}" if row['explained_variance'] is not None else "-"
+        print(
+            f"{row['method']:<10}{row['dim']:>6}{row['dtype']:>9}{row['recall_at_k']:>9.3f}"
+            f"{row['bytes_per_vector']:>11}{row['search_ms_per_query']:>10.3f}{variance:>10}"
+        )
+    print(f"{'='*78}\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report recall of embedding projections and float16 storage")
+    parser.add_argument("--collection", default=AppConfig.KNOWLEDGE_COLLECTION_NAME, help="Collection to evaluate")
+    parser.add_argument("--k", type=int, default=AppConfig.MAX_SEARCH_RESULTS, help="Number of results compared")
+    parser.add_argument("--dims", type=int, nargs="+", default=[384, 256, 128], help="Projection dimensions")
+    parser.add_argument("--fit-samples", type=int, default=AppConfig.PROJECTION_FIT_SAMPLES,
+                        help="Chunks used to fit PCA, as during ingestion")
+    args = parser.parse_args()
+
+    testset_path = Path(__file__).parent / "betty_testset_50q.csv"
+    rows = run_report(args.collection, str(testset_path), args.k, args.dims, args.fit_samples)
+    if rows:
+        print_report(rows, args.k)
+
+        results_dir = Path(__file__).parent / "results"
+        results_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = results_dir / f"projection_recall_{timestamp}.json"
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({'collection': args.collection, 'k': args.k, 'results': rows}, f, indent=2)
+        print(f"✓ Results saved to: {output_path}")
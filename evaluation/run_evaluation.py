@@ -17,11 +17,11 @@ from typing import Dict, List, Optional, Tuple
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import anthropic
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
-from utils.vector_store import VectorStore
+from utils.vector_store import betty_vector_store
+from utils.model_registry import model_registry
 from config.settings import AppConfig
 
 class BettyEvaluator:
@@ -47,13 +47,10 @@ class BettyEvaluator:
                 raise ValueError("ANTHROPIC_API_KEY not found in environment or Streamlit secrets")
         self.client = anthropic.Anthropic(api_key=api_key)
 
-        # Initialize embedding model for semantic similarity
-        print("Loading embedding model...")
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-mpnet-base-v2')
-
-        # Initialize vector store for RAG
+        # Share the app's vector store and embedding model instead of loading copies
         print("Loading vector store...")
-        self.vector_store = VectorStore()
+        self.vector_store = betty_vector_store
+        self.embedding_model = model_registry.get_embedding_model(AppConfig.EMBEDDING_MODEL)
 
         print("✓ Evaluator initialized")
 
@@ -67,22 +64,42 @@ class BettyEvaluator:
         print(f"✓ Loaded {len(questions)} test questions")
         return questions
 
-    def query_betty(self, prompt: str, use_rag: bool = True) -> Tuple[str, int, Optional[str]]:
-        """Query Betty with a prompt and return response, execution time, and error"""
+    def retrieve_contexts(self, prompts: List[str]) -> Dict[str, List[Dict]]:
+        """Retrieve RAG context for all prompts with one batched search"""
+        start_time = time.time()
+        results = self.vector_store.search_many(
+            collection_name=AppConfig.KNOWLEDGE_COLLECTION_NAME,
+            queries=prompts,
+            n_results=8
+        )
+        print(f"✓ Retrieved context for {len(prompts)} questions in {int((time.time() - start_time) * 1000)}ms")
+        return dict(zip(prompts, results))
+
+    def query_betty(
+        self,
+        prompt: str,
+        use_rag: bool = True,
+        search_results: Optional[List[Dict]] = None
+    ) -> Tuple[str, int, Optional[str]]:
+        """Query Betty with a prompt and return response, execution time, and error
+
+        search_results can be passed in when context was already retrieved with retrieve_contexts.
+        """
         start_time = time.time()
 
         try:
             # Get relevant context from RAG if enabled
             context = ""
             if use_rag:
-                search_results = self.vector_store.search_collection(
-                    collection_name=AppConfig.KNOWLEDGE_COLLECTION_NAME,
-                    query=prompt,
-                    n_results=8
-                )
+                if search_results is None:
+                    search_results = self.vector_store.search_collection(
+                        collection_name=AppConfig.KNOWLEDGE_COLLECTION_NAME,
+                        query=prompt,
+                        n_results=8
+                    )
                 if search_results and len(search_results) > 0:
                     # Extract document text from search results
-                    context_docs = [doc['document'] for doc in search_results if 'document' in doc]
+                    context_docs = [doc['content'] for doc in search_results if 'content' in doc]
                     context = "\n\n".join([f"Context {i+1}:\n{doc}" for i, doc in enumerate(context_docs)])
 
             # Build full prompt with context
@@ -276,12 +293,18 @@ class BettyEvaluator:
         )
         return round(score, 4)
 
-    def evaluate_question(self, question: Dict, question_num: int, total: int) -> Dict:
+    def evaluate_question(
+        self,
+        question: Dict,
+        question_num: int,
+        total: int,
+        search_results: Optional[List[Dict]] = None
+    ) -> Dict:
         """Evaluate a single question"""
         print(f"\n[{question_num}/{total}] Evaluating: {question['prompt'][:60]}...")
 
         # Query Betty
-        response, exec_time, error = self.query_betty(question['prompt'])
+        response, exec_time, error = self.query_betty(question['prompt'], search_results=search_results)
 
         if error:
             print(f"  ✗ Error: {error}")
@@ -363,9 +386,12 @@ class BettyEvaluator:
         print(f"Starting Betty v4.3 Evaluation - {len(questions)} questions")
         print(f"{'='*70}")
 
+        # Retrieval for every question is done up front in a single batch
+        contexts = self.retrieve_contexts([question['prompt'] for question in questions])
+
         results = []
         for i, question in enumerate(questions, 1):
-            result = self.evaluate_question(question, i, len(questions))
+            result = self.evaluate_question(question, i, len(questions), contexts.get(question['prompt']))
             results.append(result)
 
             # Brief pause to avoid rate limiting
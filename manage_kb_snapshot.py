@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Export or import a prebuilt knowledge base snapshot.
+
+Streamlit Cloud keeps the vector store in memory, so every cold start would
+otherwise re-embed the whole docs/ tree. Build a snapshot locally, commit it
+(by default to data/kb_snapshot.zip, see KB_SNAPSHOT_PATH) and the app loads
+it on startup without recomputing embeddings.
+
+Usage:
+  python manage_kb_snapshot.py export [--output PATH] [--no-sync]
+  python manage_kb_snapshot.py import [--input PATH]
+  python manage_kb_snapshot.py info [--input PATH]
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import modules
+sys.path.append(str(Path(__file__).parent))
+
+from config.settings import AppConfig
+
+
+def find_knowledge_files(docs_path: str = "docs") -> list:
+    """Collect the knowledge files under docs/, as the app does at startup."""
+    doc_files = []
+    for root, dirs, files in os.walk(docs_path):
+        for file in files:
+            if file.lower().endswith(AppConfig.SUPPORTED_FILE_TYPES):
+                doc_files.append(os.path.join(root, file))
+    return sorted(doc_files)
+
+
+def export_snapshot(output_path: str, sync: bool = True) -> bool:
+    """Sync the local knowledge base with docs/ and export it as a snapshot."""
+    from utils.vector_store import betty_vector_store
+
+    collection_name = AppConfig.KNOWLEDGE_COLLECTION_NAME
+
+    if sync:
+        doc_files = find_knowledge_files()
+        print(f"📚 Syncing {len(doc_files)} documents with '{collection_name}'...")
+        if not betty_vector_store.add_documents_from_files(
+            collection_name, doc_files, show_progress=False, prune_removed=True
+        ):
+            print("❌ Failed to sync knowledge base")
+            return False
+
+    print(f"📦 Exporting '{collection_name}' to {output_path}...")
+    manifest = betty_vector_store.export_snapshot(collection_name, output_path)
+    if manifest is None:
+        print("❌ Snapshot export failed")
+        return False
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"✅ Exported {manifest['count']} chunks ({manifest['dim']}-dim, {manifest['embedding_model']}), {size_mb:.1f} MB")
+    return True
+
+
+def import_snapshot(input_path: str) -> bool:
+    """Load a snapshot into the local knowledge base, replacing the collection."""
+    from utils.vector_store import betty_vector_store
+
+    print(f"📥 Importing {input_path}...")
+    if not betty_vector_store.import_snapshot(input_path, AppConfig.KNOWLEDGE_COLLECTION_NAME):
+        print("❌ Snapshot import failed")
+        return False
+
+    collection = betty_vector_store.get_or_create_collection(AppConfig.KNOWLEDGE_COLLECTION_NAME)
+    print(f"✅ Knowledge base now holds {collection.count()} chunks")
+    return True
+
+
+def show_snapshot_info(input_path: str) -> bool:
+    """Print a snapshot's manifest without loading it."""
+    from utils.kb_snapshot import SnapshotError, read_snapshot_manifest
+
+    try:
+        manifest = read_snapshot_manifest(input_path)
+    except SnapshotError as e:
+        print(f"❌ {e}")
+        return False
+
+    print(f"Collection:      {manifest['collection']}")
+    print(f"Created:         {manifest['created_at']}")
+    print(f"Embedding model: {manifest['embedding_model']} ({manifest['dim']} dims)")
+    print(f"Chunks:          {manifest['count']}")
+    print(f"Files:           {len(manifest.get('files', {}))}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Betty knowledge base snapshot tool")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Build and export a snapshot")
+    export_parser.add_argument("--output", default=AppConfig.KB_SNAPSHOT_PATH)
+    export_parser.add_argument("--no-sync", action="store_true", help="Export without syncing docs/ first")
+
+    import_parser = subparsers.add_parser("import", help="Load a snapshot into the local knowledge base")
+    import_parser.add_argument("--input", default=AppConfig.KB_SNAPSHOT_PATH)
+
+    info_parser = subparsers.add_parser("info", help="Show a snapshot's manifest")
+    info_parser.add_argument("--input", default=AppConfig.KB_SNAPSHOT_PATH)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        ok = export_snapshot(args.output, sync=not args.no_sync)
+    elif args.command == "import":
+        ok = import_snapshot(args.input)
+    else:
+        ok = show_snapshot_info(args.input)
+    sys.exit(0 if ok else 1)
@@ -112,6 +112,914 @@ def test_integration():
         print(f"❌ Integration tests failed: {e}")
         return False
 
+def test_lru_cache():
+    """Test the retrieval LRU cache."""
+    print("Testing LRU cache...")
+    
+    try:
+        from utils.cache import LRUCache
+        
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1, "Cached value should be returned"
+        cache.set("c", 3)  # Evicts "b", the least recently used entry
+        assert cache.get("b") is None, "Least recently used entry should be evicted"
+        assert len(cache) == 2, "Cache should respect max_size"
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1, f"Unexpected counters: {stats}"
+        
+        expiring = LRUCache(max_size=2, ttl_seconds=0.01)
+        expiring.set("a", 1)
+        import time
+        time.sleep(0.02)
+        assert expiring.get("a") is None, "Expired entry should not be returned"
+        
+        print("✅ LRU cache tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ LRU cache tests failed: {e}")
+        return False
+
+def test_ingestion_manifest():
+    """Test incremental ingestion change detection."""
+    print("Testing ingestion manifest...")
+    
+    try:
+        import tempfile
+        from utils.ingestion_manifest import IngestionManifest, normalize_source_path
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "doc.txt")
+            with open(file_path, "w") as f:
+                f.write("original text")
+            
+            config = {"chunk_size": 1000}
+            manifest = IngestionManifest(os.path.join(tmp_dir, "manifest.json"))
+            changes = manifest.diff([file_path], config)
+            assert changes["added"] == [file_path], "New file should be added"
+            manifest.record(file_path, changes["fingerprints"][normalize_source_path(file_path)], 1)
+            manifest.save()
+            
+            reloaded = IngestionManifest(os.path.join(tmp_dir, "manifest.json"))
+            assert reloaded.diff([file_path], config)["unchanged"] == [file_path], "File should be unchanged"
+            assert reloaded.diff([file_path], {"chunk_size": 500})["modified"] == [file_path], \
+                "Config change should mark file as modified"
+            
+            with open(file_path, "w") as f:
+                f.write("edited text with a different size")
+            assert reloaded.diff([file_path], config)["modified"] == [file_path], "Edited file should be modified"
+            assert reloaded.diff([], config)["removed"] == [normalize_source_path(file_path)], \
+                "Missing file should be removed"
+        
+        print("✅ Ingestion manifest tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ingestion manifest tests failed: {e}")
+        return False
+
+def test_hybrid_ranking():
+    """Test BM25 lexical scoring and reciprocal rank fusion."""
+    print("Testing hybrid ranking...")
+    
+    try:
+        from utils.lexical_index import BM25Index, tokenize
+        from utils.ranking import reciprocal_rank_fusion
+        
+        assert tokenize("Outcome ACQ-001") == ["outcome", "acq-001", "acq", "001"], "Compound IDs should be kept"
+        
+        index = BM25Index()
+        index.add_documents(
+            ["a", "b", "c"],
+            ["Outcome ACQ-001 brand recognition", "Change control workflow", "ACQ cluster overview"]
+        )
+        results = index.search("ACQ-001", n_results=2)
+        assert results[0][0] == "a", f"Exact ID match should rank first: {results}"
+        
+        index.remove_documents(["a"])
+        assert "a" not in [doc_id for doc_id, _ in index.search("ACQ-001")], "Removed document should not match"
+        
+        fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], k=60)
+        assert fused[0][0] == "y", f"Item ranked by both lists should win: {fused}"
+        assert [item for item, _ in fused] == ["y", "x", "w", "z"], f"Unexpected fusion order: {fused}"
+        
+        print("✅ Hybrid ranking tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Hybrid ranking tests failed: {e}")
+        return False
+
+def test_mmr_selection():
+    """Test maximal marginal relevance selection and near-duplicate removal."""
+    print("Testing MMR selection...")
+    
+    try:
+        from utils.ranking import maximal_marginal_relevance, min_max_normalize
+        
+        query = [1.0, 0.0, 0.0]
+        candidates = [[1.0, 0.1, 0.0], [1.0, 0.1, 0.001], [0.7, 0.0, 0.7], [0.0, 1.0, 0.0]]
+        
+        assert maximal_marginal_relevance(candidates, 2, query, lambda_mult=1.0) == [0, 1], "lambda 1.0 should rank by relevance"
+        assert maximal_marginal_relevance(candidates, 2, query, lambda_mult=0.5) == [0, 2], "Redundant candidate should be skipped"
+        
+        selected = maximal_marginal_relevance(candidates, 4, query, lambda_mult=1.0, duplicate_threshold=0.99)
+        assert selected == [0, 2, 3], f"Near-duplicate should be dropped: {selected}"
+        
+        by_score = maximal_marginal_relevance(candidates, 1, relevance=[0.1, 0.2, 0.3, 1.0])
+        assert by_score == [3], "Explicit relevance should override query similarity"
+        assert maximal_marginal_relevance([], 3, query) == []
+        
+        fusion_scores = [1 / 61 + 1 / 62, 1 / 61, 1 / 62]
+        assert [round(score, 6) for score in min_max_normalize(fusion_scores)] == [1.0, 0.016129, 0.0], \
+            "Fusion scores should span [0, 1]"
+        assert min_max_normalize([0.5, 0.5]) == [1.0, 1.0] and min_max_normalize([]) == []
+        
+        print("✅ MMR selection tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ MMR selection tests failed: {e}")
+        return False
+
+def test_flat_index():
+    """Test the NumPy flat index backend."""
+    print("Testing flat index backend...")
+    
+    try:
+        import tempfile
+        from utils.flat_index import FlatIndexClient
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            collection = FlatIndexClient(tmp_dir).get_or_create_collection("test_collection")
+            collection.add(
+                ids=["a", "b", "c"],
+                embeddings=[[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+                documents=["doc a", "doc b", "doc c"],
+                metadatas=[{"domain": "x"}, {"domain": "y"}, {"domain": "x"}]
+            )
+            
+            collection.add(ids=["d"], embeddings=[[-1.0, 0.0]], documents=["doc d"], metadatas=[{"domain": "y"}])
+            
+            reloaded = FlatIndexClient(tmp_dir).get_or_create_collection("test_collection")
+            assert reloaded.count() == 4, "Collection and appended batches should persist to disk"
+            assert reloaded.get(ids=["d"])["documents"] == ["doc d"], "Appended records should be replayed"
+            
+            results = reloaded.query(query_embeddings=[[0.9, 0.1]], n_results=2)
+            assert results["ids"][0] == ["a", "c"], f"Unexpected neighbours: {results['ids']}"
+            
+            filtered = reloaded.query(query_embeddings=[[0.0, 1.0]], n_results=5, where={"domain": "x"})
+            assert filtered["ids"][0] == ["c", "a"], f"Filter should exclude other domains: {filtered['ids']}"
+            
+            reloaded.delete(where={"domain": "y"})
+            assert reloaded.get()["ids"] == ["a", "c"], "Deleted entries should be removed"
+            assert FlatIndexClient(tmp_dir).get_or_create_collection("test_collection").count() == 2, \
+                "Deletes should persist over the appended records"
+        
+        print("✅ Flat index tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Flat index tests failed: {e}")
+        return False
+
+def test_document_metadata():
+    """Test metadata derived from SharePoint paths and query domain detection."""
+    print("Testing document metadata...")
+    
+    try:
+        from utils.document_metadata import (
+            derive_file_metadata, domain_filter_for_query, combine_where_filters
+        )
+        
+        metadata = derive_file_metadata(
+            "docs/Molex Sharepoint Data/2.0 OBT PIM & BOM Mgmt/4.0 Pain Points/Issues.xlsx"
+        )
+        assert metadata["domain"] == "PIM & BOM Mgmt", f"Unexpected domain: {metadata}"
+        assert metadata["sub_category"] == "Pain Points", f"Unexpected sub-category: {metadata}"
+        assert metadata["file_type"] == "xlsx", f"Unexpected file type: {metadata}"
+        assert derive_file_metadata("docs/Overview.docx")["domain"] == "", "Files outside SharePoint have no domain"
+        
+        assert domain_filter_for_query("What are the BOM pain points?") == {"domain": {"$in": ["PIM & BOM Mgmt", ""]}}, \
+            "Documents without a domain should be kept"
+        assert domain_filter_for_query("How does the economy affect outcomes?") is None, "Partial words should not match"
+        assert domain_filter_for_query("Is the packaging eco-friendly?") is None, "Acronyms should only match whole tokens"
+        assert domain_filter_for_query("Who approves an ECO?") == {"domain": {"$in": ["Change Control Management", ""]}}
+        assert combine_where_filters({"file_type": "pdf"}, None) == {"file_type": "pdf"}
+        
+        print("✅ Document metadata tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Document metadata tests failed: {e}")
+        return False
+
+def test_kb_snapshot():
+    """Test writing and reading a knowledge base snapshot."""
+    print("Testing knowledge base snapshot...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from utils.kb_snapshot import SnapshotError, read_snapshot, write_snapshot
+        
+        embeddings = np.random.rand(5, 4).astype(np.float32)
+        pages = [
+            {
+                "ids": [f"id{i}" for i in range(start, min(start + 2, 5))],
+                "documents": [f"chunk {i}" for i in range(start, min(start + 2, 5))],
+                "metadatas": [{"filename": "a.txt", "chunk_index": i} for i in range(start, min(start + 2, 5))],
+                "embeddings": embeddings[start:start + 2]
+            }
+            for start in range(0, 5, 2)
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_path = f"{temp_dir}/kb.zip"
+            manifest = write_snapshot(snapshot_path, pages, 5, {"collection": "kb_test"})
+            assert manifest["count"] == 5 and manifest["dim"] == 4, f"Unexpected manifest: {manifest}"
+            
+            loaded, loaded_pages = read_snapshot(snapshot_path, batch_size=3)
+            loaded_pages = list(loaded_pages)
+            assert loaded["collection"] == "kb_test", "Extra manifest fields should be kept"
+            assert [len(page["ids"]) for page in loaded_pages] == [3, 2], "Pages should follow batch_size"
+            assert np.allclose(np.vstack([page["embeddings"] for page in loaded_pages]), embeddings)
+            assert loaded_pages[1]["metadatas"][1] == {"filename": "a.txt", "chunk_index": 4}
+            
+            try:
+                read_snapshot(f"{temp_dir}/missing.zip")
+                assert False, "Missing snapshot should raise SnapshotError"
+            except SnapshotError:
+                pass
+        
+        print("✅ Knowledge base snapshot tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Knowledge base snapshot tests failed: {e}")
+        return False
+
+def test_embedding_projection():
+    """Test fitting, applying and saving embedding projections."""
+    print("Testing embedding projection...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from utils.embedding_projection import EmbeddingProjection
+        
+        rng = np.random.default_rng(0)
+        vectors = (rng.normal(size=(50, 4)) @ rng.normal(size=(4, 16))).astype(np.float32)
+        
+        pca = EmbeddingProjection("pca", 8).fit(vectors)
+        projected = pca.transform(vectors)
+        assert projected.shape == (50, 8), f"Unexpected projected shape: {projected.shape}"
+        assert np.allclose(np.linalg.norm(projected, axis=1), 1.0, atol=1e-5), "Projected vectors should be unit length"
+        assert pca.explained_variance_ratio > 0.99, "Rank-4 data should be captured by 8 components"
+        
+        small = EmbeddingProjection("pca", 8).fit(vectors[:3])
+        assert small.output_dim == 3 and small.config == {"method": "pca", "dim": 8}, "PCA should cap dims at the sample count"
+        
+        truncate = EmbeddingProjection("truncate", 4).fit(vectors)
+        assert np.allclose(truncate.transform(vectors[:1])[0] * np.linalg.norm(vectors[0, :4]), vectors[0, :4], atol=1e-5)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pca.save(f"{temp_dir}/projection.npz")
+            loaded = EmbeddingProjection.load(f"{temp_dir}/projection.npz")
+            assert np.allclose(loaded.transform(vectors), projected), "Loaded projection should match"
+            assert EmbeddingProjection.load(f"{temp_dir}/missing.npz") is None
+        
+        print("✅ Embedding projection tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Embedding projection tests failed: {e}")
+        return False
+
+def test_rerank_score_cache():
+    """Test that cached cross-encoder scores are reused per query and chunk."""
+    print("Testing rerank score cache...")
+    
+    try:
+        from utils.vector_store import VectorStore, rerank_score_cache
+        
+        class CountingReranker:
+            def __init__(self):
+                self.pairs = []
+            
+            def predict(self, pairs):
+                self.pairs.extend(pairs)
+                return [float(len(doc)) for _, doc in pairs]
+        
+        reranker = CountingReranker()
+        
+        class RerankStore(VectorStore):
+            @property
+            def reranker(self):
+                return reranker
+        
+        rerank_score_cache.clear()
+        store = RerankStore(db_path="./test_rerank_db")
+        results = [{"id": f"chunk{i}", "content": "x" * (i + 1)} for i in range(3)]
+        
+        assert store._rerank_scores("bom  owner", results) == [1.0, 2.0, 3.0]
+        more = results + [{"id": "chunk3", "content": "x" * 10}]
+        assert store._rerank_scores("bom owner", more) == [1.0, 2.0, 3.0, 10.0]
+        assert len(reranker.pairs) == 4, "Only the new chunk should be scored again"
+        
+        store._rerank_scores("other question", results[:1])
+        assert len(reranker.pairs) == 5, "A different query should not reuse scores"
+        
+        print("✅ Rerank score cache tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Rerank score cache tests failed: {e}")
+        return False
+
+def test_cascade_rerank():
+    """Test that cascade reranking stops on stable results or an exhausted budget."""
+    print("Testing cascade reranking...")
+    
+    try:
+        import time
+        from config.settings import AppConfig
+        from utils.vector_store import VectorStore, rerank_score_cache
+        
+        class PositionReranker:
+            delay = 0.0
+            
+            def predict(self, pairs):
+                time.sleep(self.delay * len(pairs))
+                return [-float(doc.split()[1]) for _, doc in pairs]
+        
+        reranker = PositionReranker()
+        
+        class RerankStore(VectorStore):
+            @property
+            def reranker(self):
+                return reranker
+        
+        store = RerankStore(db_path="./test_rerank_db")
+        candidates = [{"id": f"cascade{i}", "content": f"chunk {i}"} for i in range(20)]
+        
+        rerank_score_cache.clear()
+        scores, reason = store._cascade_rerank("query", candidates, 3, budget_ms=10000)
+        reranked = len(scores) - scores.count(None)
+        expected = max(AppConfig.RERANK_CASCADE_BATCH_SIZE, 3) * (AppConfig.RERANK_STABLE_BATCHES + 1)
+        assert reason == "stable" and reranked == expected, f"Unexpected stop: {reason} after {reranked}"
+        
+        rerank_score_cache.clear()
+        reranker.delay = 0.01
+        scores, reason = store._cascade_rerank("query", candidates, 3, budget_ms=1)
+        assert reason == "budget" and scores[:4] != [None] * 4 and scores[-1] is None, "Budget should stop early"
+        
+        print("✅ Cascade reranking tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Cascade reranking tests failed: {e}")
+        return False
+
+def test_search_many():
+    """Test that batched multi-query search matches single-query search."""
+    print("Testing batched multi-query search...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from utils.flat_index import FlatIndexClient
+        from utils.vector_store import VectorStore
+        
+        class CountingModel:
+            calls = 0
+            
+            def encode(self, texts, **kwargs):
+                CountingModel.calls += 1
+                return np.array([[len(text), text.count("a"), 1.0] for text in texts], dtype=np.float32)
+        
+        class BatchStore(VectorStore):
+            embedding_model = CountingModel()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = BatchStore(db_path=temp_dir)
+            store._client = FlatIndexClient(temp_dir)
+            collection = store.get_or_create_collection("kb_test")
+            texts = ["a" * i + "b" * (10 - i) for i in range(10)]
+            collection.add(
+                ids=[f"id{i}" for i in range(10)],
+                embeddings=CountingModel().encode(texts).tolist(),
+                documents=texts,
+                metadatas=[{"filename": f"f{i}.txt"} for i in range(10)]
+            )
+            
+            queries = ["aaab", "aaaaaaabbb", "bbbbbbbbbb"]
+            CountingModel.calls = 0
+            batched = store.search_many("kb_test", queries, n_results=3, auto_domain_filter=False)
+            assert CountingModel.calls == 1, "Queries should be encoded in one batch"
+            
+            store._search_result_cache.clear()
+            single = [store.search_collection("kb_test", q, 3, auto_domain_filter=False) for q in queries]
+            assert batched == single, "Batched results should match single-query search"
+            assert batched[1][0]["id"] == "id7", f"Unexpected top result: {batched[1][0]['id']}"
+        
+        print("✅ Batched multi-query search tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batched multi-query search tests failed: {e}")
+        return False
+
+def test_reindex_on_config_change():
+    """Test that a changed ingest configuration rewrites a file's chunks."""
+    print("Testing re-indexing after an ingest configuration change...")
+    
+    from config.settings import AppConfig
+    use_embedding_cache = AppConfig.USE_EMBEDDING_CACHE
+    try:
+        import tempfile
+        import numpy as np
+        from utils.flat_index import FlatIndexClient
+        from utils.vector_store import VectorStore
+        
+        class FakeModel:
+            def encode(self, texts, **kwargs):
+                return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+            
+            def get_sentence_embedding_dimension(self):
+                return 2
+        
+        class ConfigStore(VectorStore):
+            embedding_model = FakeModel()
+            metadata_version = 1
+            
+            def _ingest_config(self):
+                return {**super()._ingest_config(), "metadata_version": self.metadata_version}
+        
+        AppConfig.USE_EMBEDDING_CACHE = False
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "notes.txt")
+            with open(file_path, "w") as f:
+                f.write("Change control requires an approved ECO before release.")
+            
+            store = ConfigStore(db_path=temp_dir)
+            store._client = FlatIndexClient(temp_dir)
+            assert store.add_documents_from_files("kb_test", [file_path], show_progress=False)
+            collection = store.get_or_create_collection("kb_test")
+            stored = collection.get(include=["documents", "metadatas", "embeddings"])
+            collection.upsert(
+                ids=stored["ids"],
+                embeddings=stored["embeddings"],
+                documents=stored["documents"],
+                metadatas=[{**metadata, "domain": "STALE"} for metadata in stored["metadatas"]]
+            )
+            
+            store.add_documents_from_files("kb_test", [file_path], show_progress=False)
+            assert collection.get()["metadatas"][0]["domain"] == "STALE", "Unchanged files should not be re-indexed"
+            
+            store.metadata_version = 2
+            assert store.add_documents_from_files("kb_test", [file_path], show_progress=False)
+            metadatas = collection.get()["metadatas"]
+            assert len(metadatas) == len(stored["ids"]), f"Chunks should be replaced, not duplicated: {metadatas}"
+            assert all(metadata["domain"] == "" for metadata in metadatas), f"Stale metadata was kept: {metadatas}"
+        
+        print("✅ Re-indexing tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Re-indexing tests failed: {e}")
+        return False
+    finally:
+        AppConfig.USE_EMBEDDING_CACHE = use_embedding_cache
+
+def test_extraction_timeouts():
+    """Test that extraction timeouts only count time a file spends in a worker."""
+    print("Testing parallel extraction timeouts...")
+    
+    original = None
+    try:
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        import utils.parallel_extraction as parallel_extraction
+        original = parallel_extraction.ProcessPoolExecutor, parallel_extraction.extract_file_chunks
+        
+        def slow_extract(file_path):
+            time.sleep(float(file_path))
+            return {"filename": file_path, "chunks": [file_path], "error": None, "skipped": False}
+        
+        # Threads stand in for worker processes so the fake extractor is used
+        parallel_extraction.ProcessPoolExecutor = lambda max_workers, mp_context, initializer, initargs: \
+            ThreadPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+        parallel_extraction.extract_file_chunks = slow_extract
+        
+        # Six files on two workers: the later files queue for longer than the timeout
+        results = list(parallel_extraction.iter_extracted_files(["0.3"] * 6, workers=2, timeout=0.5))
+        assert [result["error"] for result in results] == [None] * 6, f"Queued files timed out: {results}"
+        
+        results = list(parallel_extraction.iter_extracted_files(["0.1", "1.0", "0.1"], workers=2, timeout=0.5))
+        assert results[1]["error"] == "Timed out extracting 1.0 after 0.5s", f"Unexpected result: {results[1]}"
+        assert results[2]["error"] is None, "Files after a timed-out file should still be extracted"
+        assert not results[1]["skipped"], "Timeouts are failures, not skips"
+        assert original[1]("notes.xyz")["skipped"], "Unsupported files should be marked as skipped"
+        
+        print("✅ Parallel extraction timeout tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Parallel extraction timeout tests failed: {e}")
+        return False
+    finally:
+        if original is not None:
+            parallel_extraction.ProcessPoolExecutor, parallel_extraction.extract_file_chunks = original
+
+def test_context_packer():
+    """Test token-budgeted context packing with chunk merging and sentence truncation."""
+    print("Testing context packer...")
+    
+    try:
+        from utils.context_packer import format_context, merge_adjacent_chunks, pack_context, truncate_to_sentences
+        
+        class WordTokenizer:
+            def encode(self, text):
+                return text.split()
+        
+        tokenizer = WordTokenizer()
+        words = " ".join(f"Sentence {i} ends here." for i in range(40)).split()
+        first, second = " ".join(words[:80]), " ".join(words[60:140])
+        assert merge_adjacent_chunks(first, second) == " ".join(words[:140]), "Overlap should appear once"
+        assert truncate_to_sentences("One two. Three four five. Six.", 4, tokenizer) == "One two."
+        
+        results = [
+            {"content": second, "metadata": {"filename": "a.docx", "source_path": "docs/a.docx", "chunk_index": 1}},
+            {"content": "Short note. Another line.", "metadata": {"filename": "b.txt", "source_path": "docs/b.txt", "chunk_index": 0}},
+            {"content": first, "metadata": {"filename": "a.docx", "source_path": "docs/a.docx", "chunk_index": 0}},
+            {"content": " ".join(words), "metadata": {"filename": "c.txt", "source_path": "docs/c.txt", "chunk_index": 3}}
+        ]
+        blocks = pack_context(results, 300, tokenizer, min_truncated_tokens=10)
+        assert [block["filename"] for block in blocks] == ["a.docx", "b.txt", "c.txt"], f"Unexpected blocks: {blocks}"
+        assert blocks[0]["chunk_indexes"] == [0, 1], "Adjacent chunks of a file should be merged"
+        assert sum(block["tokens"] for block in blocks) <= 300, "Blocks should fit the budget"
+        assert blocks[2]["content"].endswith("here."), "Truncation should stop at a sentence boundary"
+        assert format_context(blocks[1:2]) == "Document: b.txt\nContent: Short note. Another line."
+        
+        print("✅ Context packer tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Context packer tests failed: {e}")
+        return False
+
+def test_xlsx_streaming():
+    """Test read-only XLSX extraction in row blocks."""
+    print("Testing streaming XLSX extraction...")
+    
+    try:
+        import io
+        import openpyxl
+        from utils.document_processor import document_processor
+        
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "KPIs"
+        sheet.append(["Outcome", "KPI", None])
+        for i in range(25):
+            sheet.append([f"O{i}", f"kpi {i}", "x" if i == 3 else None])
+        workbook.create_sheet("Empty")
+        data = io.BytesIO()
+        workbook.save(data)
+        
+        blocks = list(document_processor.iter_xlsx_blocks(io.BytesIO(data.getvalue()), rows_per_block=10))
+        assert len(blocks) == 5, f"Expected header, 3 row blocks and empty sheet, got {len(blocks)}"
+        assert "Columns: Outcome, KPI, Column3" in blocks[0]
+        
+        text = document_processor.extract_text_from_xlsx(io.BytesIO(data.getvalue()))
+        assert text == "\n".join(blocks), "Extracted text should join the streamed blocks"
+        assert "Row 4: Outcome: O3, KPI: kpi 3, Column3: x" in text and "Row 25: Outcome: O24" in text
+        assert "(Empty sheet)" in text
+        
+        print("✅ Streaming XLSX extraction tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Streaming XLSX extraction tests failed: {e}")
+        return False
+
+def test_csv_project_detection():
+    """Test project detection in streamed CSV rows."""
+    print("Testing CSV project detection...")
+    
+    try:
+        import io
+        from utils.document_processor import DocumentProcessor, compile_project_pattern
+        
+        pattern = compile_project_pattern(["Twin", "Digital Twin", " "])
+        assert pattern.pattern.startswith("Digital\\ Twin"), "Longer names should be tried first"
+        assert compile_project_pattern([]) is None
+        
+        processor = DocumentProcessor(project_names=["Digital Twin", "Twin", "Green Ops"])
+        data = (
+            "Project,Impact,Owner\n"
+            "Phase 1 digital twin rollout,85%,Ana\n"
+            "Unrelated work,10%,Bo\n"
+            "Green Ops,,\n"
+            "short,row\n"
+        ).encode("utf-8")
+        text = processor.extract_text_from_csv(io.BytesIO(data))
+        
+        assert text.startswith("CSV Data with columns: Project, Impact, Owner")
+        assert "Row 1: Project: Phase 1 digital twin rollout, Impact: 85%, Owner: Ana" in text
+        assert "PROJECT: Digital Twin has impact scores: 85%\n" in text
+        assert "PROJECT: Twin has impact scores: 85%\n" in text, "Nested names should still be found"
+        assert "PROJECT: Green Ops" not in text, "Projects without nearby scores should be skipped"
+        assert "Row 4: short, row" in text
+        
+        print("✅ CSV project detection tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ CSV project detection tests failed: {e}")
+        return False
+
+def test_pdf_page_extraction():
+    """Test lazy and page-parallel PDF extraction."""
+    print("Testing PDF page extraction...")
+    
+    try:
+        import io
+        from PyPDF2 import PdfWriter, PageObject
+        from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+        from config.settings import AppConfig
+        from utils.document_processor import DocumentProcessor
+        from utils.pdf_pages import split_page_ranges
+        
+        assert split_page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+        assert split_page_ranges(2, 4) == [(0, 1), (1, 2)]
+        
+        writer = PdfWriter()
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica")
+        })
+        for i in range(5):
+            page = PageObject.create_blank_page(None, 612, 792)
+            content = DecodedStreamObject()
+            content.set_data(b"" if i == 2 else f"BT /F1 12 Tf 72 720 Td (Page {i + 1} text.) Tj ET".encode())
+            page[NameObject("/Contents")] = writer._add_object(content)
+            page[NameObject("/Resources")] = DictionaryObject({
+                NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+            })
+            writer.add_page(page)
+        data = io.BytesIO()
+        writer.write(data)
+        
+        processor = DocumentProcessor(report_to_streamlit=False)
+        original_workers = AppConfig.PDF_PAGE_WORKERS
+        try:
+            AppConfig.PDF_PAGE_WORKERS = 0
+            pages = list(processor.iter_pdf_pages(io.BytesIO(data.getvalue())))
+            AppConfig.PDF_PAGE_WORKERS = 2
+            parallel_pages = list(processor.iter_pdf_pages(io.BytesIO(data.getvalue())))
+        finally:
+            AppConfig.PDF_PAGE_WORKERS = original_workers
+        
+        assert len(pages) == 4 and "Page 4 text." in pages[2], "Empty pages should be skipped"
+        assert parallel_pages == pages, "Page workers should yield the same pages in order"
+        assert not processor.messages
+        
+        blocks = ["First page. Ends here.", "", "Second page, more words!", "Third"]
+        streamed = list(processor.iter_chunks(iter(blocks)))
+        assert streamed == processor.chunk_for_indexing("\n".join(blocks))
+        
+        print("✅ PDF page extraction tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PDF page extraction tests failed: {e}")
+        return False
+
+def test_docx_streaming():
+    """Test streaming DOCX extraction in document order."""
+    print("Testing streaming DOCX extraction...")
+    
+    try:
+        import io
+        import docx
+        from utils.document_processor import DocumentProcessor
+        from utils.docx_stream import iter_docx_blocks
+        
+        document = docx.Document()
+        document.add_heading("Change Control", level=1)
+        document.add_paragraph("Intro paragraph.")
+        document.add_paragraph("First step", style="List Bullet")
+        table = document.add_table(rows=3, cols=2)
+        table.cell(0, 0).text, table.cell(0, 1).text = "Category", "Pain point"
+        merged = table.cell(1, 0).merge(table.cell(2, 0))
+        merged.text = "Search"
+        table.cell(1, 1).text, table.cell(2, 1).text = "Scattered data", "No sync"
+        document.add_paragraph("Closing paragraph.")
+        data = io.BytesIO()
+        document.save(data)
+        
+        blocks = list(iter_docx_blocks(io.BytesIO(data.getvalue())))
+        assert blocks[:3] == ["\n# Change Control\n", "Intro paragraph.", "• First step"], blocks[:3]
+        assert blocks[3:] == [
+            "\n--- Table ---", "Category | Pain point", "Search | Scattered data",
+            "Search | No sync", "--- End Table ---\n", "Closing paragraph."
+        ], "Tables should stay in document order and repeat vertically merged cells"
+        
+        processor = DocumentProcessor(report_to_streamlit=False)
+        assert processor.extract_text_from_docx(io.BytesIO(data.getvalue())) == "\n".join(blocks)
+        assert processor.extract_text_from_docx(io.BytesIO(b"not a docx")) == ""
+        assert processor.messages and processor.messages[0][0] == "error"
+        
+        print("✅ Streaming DOCX extraction tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Streaming DOCX extraction tests failed: {e}")
+        return False
+
+def test_pptx_and_json_extraction():
+    """Test PPTX slide text and per-record JSON extraction."""
+    print("Testing PPTX and JSON extraction...")
+    
+    try:
+        import io
+        import json
+        import zipfile
+        from utils.document_processor import DocumentProcessor
+        from utils.json_records import find_records, record_metadata
+        
+        processor = DocumentProcessor(report_to_streamlit=False)
+        assert processor.get_file_type("deck.PPTX") == "pptx"
+        assert processor.get_file_type("GPS_Outcomes_Master.json") == "json"
+        
+        # Minimal deck: a titled slide with a table and speaker notes, then an empty slide
+        namespaces = (
+            'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+        )
+        rel_type = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+        
+        def rels(*targets):
+            entries = "".join(
+                f'<Relationship Id="rId{i}" Type="{rel_type}{kind}" Target="{target}"/>'
+                for i, (kind, target) in enumerate(targets, 1)
+            )
+            return f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{entries}</Relationships>'
+        
+        def text_body(text, tag="p:txBody"):
+            return f"<{tag}><a:p><a:r><a:t>{text}</a:t></a:r></a:p></{tag}>"
+        
+        def cells(*texts):
+            return "<a:tr>" + "".join(f"<a:tc>{text_body(text, 'a:txBody')}</a:tc>" for text in texts) + "</a:tr>"
+        
+        slide_xml = (
+            f'<p:sld {namespaces}><p:cSld><p:spTree>'
+            f'<p:sp>{text_body("Capability Maturity")}</p:sp>'
+            f'<p:graphicFrame><a:graphic><a:graphicData><a:tbl>'
+            f'{cells("Capability", "Level")}{cells("Change Management", "Basic")}'
+            f'</a:tbl></a:graphicData></a:graphic></p:graphicFrame>'
+            f'</p:spTree></p:cSld></p:sld>'
+        )
+        notes_xml = (
+            f'<p:notes {namespaces}><p:cSld><p:spTree><p:sp>'
+            f'<p:nvSpPr><p:cNvPr id="2" name="Notes"/><p:cNvSpPr/><p:nvPr><p:ph type="body"/></p:nvPr></p:nvSpPr>'
+            f'{text_body("Speaker note")}</p:sp></p:spTree></p:cSld></p:notes>'
+        )
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, "w") as archive:
+            archive.writestr("_rels/.rels", rels(("officeDocument", "ppt/presentation.xml")))
+            archive.writestr(
+                "ppt/presentation.xml",
+                f'<p:presentation {namespaces}><p:sldIdLst>'
+                f'<p:sldId id="256" r:id="rId1"/><p:sldId id="257" r:id="rId2"/></p:sldIdLst></p:presentation>'
+            )
+            archive.writestr("ppt/_rels/presentation.xml.rels", rels(("slide", "slides/slide1.xml"), ("slide", "slides/slide2.xml")))
+            archive.writestr("ppt/slides/slide1.xml", slide_xml)
+            archive.writestr("ppt/slides/_rels/slide1.xml.rels", rels(("notesSlide", "../notesSlides/notesSlide1.xml")))
+            archive.writestr("ppt/notesSlides/notesSlide1.xml", notes_xml)
+            archive.writestr("ppt/slides/slide2.xml", f"<p:sld {namespaces}><p:cSld><p:spTree/></p:cSld></p:sld>")
+        
+        text = processor.extract_text(io.BytesIO(data.getvalue()), "pptx")
+        assert text.startswith("=== Slide 1 ===\nCapability Maturity")
+        assert "Change Management | Basic" in text and "Notes: Speaker note" in text
+        assert "=== Slide 2 ===" not in text, "Slides without text should be skipped"
+        
+        outcomes = {
+            "gps_version": "4.0",
+            "outcomes": [
+                {"outcome_id": "ACQ-001", "cluster": "Acquire Customer", "tier_level": 1,
+                 "outcome_text": "Our brand is revered", "parent_id": None, "children_ids": ["ACQ-002"]},
+                {"outcome_id": "ACQ-002", "cluster": "Acquire Customer", "tier_level": 2,
+                 "outcome_text": "We redefined the market norms", "parent_id": "ACQ-001", "children_ids": []}
+            ]
+        }
+        assert find_records(outcomes) is outcomes["outcomes"]
+        assert record_metadata(outcomes["outcomes"][0]) == {"outcome_id": "ACQ-001", "cluster": "Acquire Customer", "tier": 1}
+        
+        json_bytes = json.dumps(outcomes).encode("utf-8")
+        chunks, metadatas = processor.chunk_records(processor.extract_records(io.BytesIO(json_bytes), "json"))
+        assert len(chunks) == 2, "Each outcome should be its own chunk"
+        assert chunks[0] == "Outcome id: ACQ-001\nCluster: Acquire Customer\nTier level: 1\nOutcome text: Our brand is revered\nChildren ids: ACQ-002"
+        assert metadatas[1] == {"outcome_id": "ACQ-002", "cluster": "Acquire Customer", "tier": 2}
+        
+        assert processor.extract_records(io.BytesIO(b'{"name": "x"}'), "json") == []
+        assert processor.extract_text(io.BytesIO(b'{"a": {"b": [1, "two"]}}'), "json") == "a.b[0]: 1\na.b[1]: two"
+        assert processor.extract_text(io.BytesIO(b"{broken"), "json") == ""
+        
+        print("✅ PPTX and JSON extraction tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PPTX and JSON extraction tests failed: {e}")
+        return False
+
+def test_model_registry():
+    """Test that the model registry loads each model once and unloads idle models."""
+    print("Testing model registry...")
+    
+    try:
+        import threading
+        import time
+        from utils.model_registry import ModelRegistry
+        
+        registry = ModelRegistry()
+        loads = []
+        
+        def loader():
+            loads.append(1)
+            time.sleep(0.05)
+            return object()
+        
+        threads = [threading.Thread(target=registry.get, args=("embedding", "m", loader)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(loads) == 1, f"Concurrent requests should load once, loaded {len(loads)} times"
+        assert registry.get("embedding", "m", loader) is registry.get("embedding", "m", loader)
+        assert registry.stats()[0]["name"] == "m", "Loaded models should be reported"
+        
+        assert registry.unload_idle() == [], "Idle unloading is disabled by default"
+        registry.get("reranker", "r", object)
+        time.sleep(0.05)
+        assert registry.unload_idle(max_idle_seconds=0.01) == ["m", "r"], "Idle models should be unloaded"
+        assert not registry.is_loaded("embedding", "m")
+        
+        def failing_loader(name):
+            raise RuntimeError("no weights")
+        
+        registry.get_embedding_model = failing_loader
+        registry.start_warmup([("embedding", "broken")]).join()
+        assert str(registry.warmup_errors.get("broken")) == "no weights", "Warmup failures should be kept"
+        registry.get("embedding", "broken", object)
+        assert "broken" not in registry.warmup_errors, "A later successful load should clear the error"
+        
+        print("✅ Model registry tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Model registry tests failed: {e}")
+        return False
+
+def test_onnx_backend():
+    """Test ONNX backend pooling and the PyTorch parity check."""
+    print("Testing ONNX backend helpers...")
+    
+    try:
+        import numpy as np
+        from utils.onnx_backend import embedding_parity, pool_embeddings
+        
+        hidden_states = np.arange(12, dtype=np.float32).reshape(1, 3, 4)
+        attention_mask = np.array([[1, 1, 0]])
+        assert np.allclose(pool_embeddings(hidden_states, attention_mask, "mean"), [[2, 3, 4, 5]]), "Padding must be ignored"
+        assert np.allclose(pool_embeddings(hidden_states, attention_mask, "cls"), [[0, 1, 2, 3]])
+        
+        class FakeEncoder:
+            def __init__(self, noise):
+                self.noise = noise
+            
+            def encode(self, sentences):
+                rng = np.random.default_rng(0)
+                base = np.eye(len(sentences), 8)
+                return base + self.noise * rng.standard_normal(base.shape)
+        
+        assert embedding_parity(FakeEncoder(0.0), FakeEncoder(0.001))["min_cosine"] > 0.99
+        assert embedding_parity(FakeEncoder(0.0), FakeEncoder(1.0))["min_cosine"] < 0.99, "Drift should be detected"
+        
+        print("✅ ONNX backend helper tests passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ ONNX backend helper tests failed: {e}")
+        return False
+
 def main():
     """Run all tests."""
     print("🚀 Running Betty AI Assistant improvement validation tests...")
@@ -121,7 +1029,28 @@ def main():
         test_imports,
         test_configuration,
         test_document_processor,
-        test_integration
+        test_integration,
+        test_lru_cache,
+        test_ingestion_manifest,
+        test_hybrid_ranking,
+        test_mmr_selection,
+        test_flat_index,
+        test_document_metadata,
+        test_kb_snapshot,
+        test_model_registry,
+        test_onnx_backend,
+        test_embedding_projection,
+        test_rerank_score_cache,
+        test_cascade_rerank,
+        test_search_many,
+        test_reindex_on_config_change,
+        test_extraction_timeouts,
+        test_context_packer,
+        test_xlsx_streaming,
+        test_csv_project_detection,
+        test_pdf_page_extraction,
+        test_docx_streaming,
+        test_pptx_and_json_extraction
     ]
     
     passed = 0
@@ -0,0 +1,165 @@
+"""
+Token-budgeted context packing for Betty AI Assistant.
+
+Search results are packed into the system prompt most relevant first until a
+token budget is used up, so the prompt size, and with it the time to first
+token, stays predictable. Chunks that are adjacent in the same file are merged
+into one block without repeating their overlapping text, and a chunk that no
+longer fits whole is cut at a sentence boundary.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+
+# Sentence ends, and line breaks that separate list items and table rows
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Characters of a chunk's start searched for in the previous chunk to find their overlap
+_OVERLAP_PROBE_CHARS = 40
+
+
+def _block_header(filename: str) -> str:
+    return f"Document: {filename}\nContent: "
+
+
+def merge_adjacent_chunks(first: str, second: str) -> str:
+    """Join two consecutive chunks of a file, dropping the text the second repeats.
+
+    Args:
+        first: Earlier chunk.
+        second: Chunk that follows it in the file.
+
+    Returns:
+        The combined text.
+    """
+    probe = second[:_OVERLAP_PROBE_CHARS]
+    if probe:
+        start = first.find(probe)
+        while start != -1:
+            # The earliest match that runs to the end of first is the longest overlap
+            if second.startswith(first[start:]):
+                return first[:start] + second
+            start = first.find(probe, start + 1)
+    return f"{first}\n{second}"
+
+
+def truncate_to_sentences(text: str, max_tokens: int, tokenizer: Any) -> str:
+    """Cut text to its longest run of whole sentences within max_tokens.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Token limit.
+        tokenizer: Encoder with an encode method used to count tokens.
+
+    Returns:
+        The leading whole sentences that fit, or "" if not even the first does.
+    """
+    if max_tokens <= 0:
+        return ""
+    if len(tokenizer.encode(text)) <= max_tokens:
+        return text
+
+    ends = [match.start() for match in _SENTENCE_BOUNDARY.finditer(text)]
+    # Binary search for the most sentence ends whose prefix fits the budget
+    low, high, best = 0, len(ends) - 1, ""
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = text[:ends[middle]].rstrip()
+        if len(tokenizer.encode(candidate)) <= max_tokens:
+            best, low = candidate, middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def pack_context(
+    results: List[Dict[str, Any]],
+    token_budget: int,
+    tokenizer: Any,
+    min_truncated_tokens: int = 50
+) -> List[Dict[str, Any]]:
+    """Pack search results into context blocks within a token budget.
+
+    Results are taken in order, so they should be ranked most relevant first.
+    A result adjacent (by chunk_index) to an already packed chunk of the same
+    file is merged into that block and only its new text is counted. Packing
+    stops at the first result that does not fit whole, which is kept cut at a
+    sentence boundary if it is not merged and min_truncated_tokens remain.
+
+    Args:
+        results: Search results with content and metadata (filename,
+            source_path and chunk_index).
+        token_budget: Maximum tokens for all blocks, including their headers.
+        tokenizer: Encoder used to count tokens, e.g. the document processor's.
+        min_truncated_tokens: Smallest remaining budget worth a truncated chunk.
+
+    Returns:
+        Blocks with filename, source_path, chunk_indexes, content and tokens,
+        in order of their most relevant chunk.
+    """
+    blocks: List[Dict[str, Any]] = []
+    used = 0
+
+    for result in results:
+        metadata = result.get("metadata") or {}
+        filename = metadata.get("filename", "")
+        source_path = metadata.get("source_path") or filename
+        chunk_index = metadata.get("chunk_index")
+        content = result.get("content", "")
+        if not content.strip():
+            continue
+
+        block: Optional[Dict[str, Any]] = None
+        if chunk_index is not None:
+            block = next(
+                (
+                    b for b in blocks
+                    if b["source_path"] == source_path
+                    and (chunk_index == max(b["chunk_indexes"]) + 1 or chunk_index == min(b["chunk_indexes"]) - 1)
+                ),
+                None
+            )
+
+        if block is not None:
+            if chunk_index > max(block["chunk_indexes"]):
+                merged = merge_adjacent_chunks(block["content"], content)
+            else:
+                merged = merge_adjacent_chunks(content, block["content"])
+            tokens = len(tokenizer.encode(_block_header(filename) + merged))
+            if used - block["tokens"] + tokens > token_budget:
+                break
+            used += tokens - block["tokens"]
+            block.update(content=merged, tokens=tokens)
+            block["chunk_indexes"].append(chunk_index)
+            continue
+
+        tokens = len(tokenizer.encode(_block_header(filename) + content))
+        truncated = used + tokens > token_budget
+        if truncated:
+            # The budget is nearly spent: keep the sentences of this chunk that still fit
+            remaining = token_budget - used - len(tokenizer.encode(_block_header(filename)))
+            content = truncate_to_sentences(content, remaining, tokenizer) if remaining >= min_truncated_tokens else ""
+            if not content:
+                break
+            tokens = len(tokenizer.encode(_block_header(filename) + content))
+
+        used += tokens
+        blocks.append({
+            "filename": filename,
+            "source_path": source_path,
+            "chunk_indexes": [chunk_index] if chunk_index is not None else [],
+            "content": content,
+            "tokens": tokens
+        })
+        if truncated:
+            break
+
+    for block in blocks:
+        block["chunk_indexes"].sort()
+    return blocks
+
+
+def format_context(blocks: List[Dict[str, Any]]) -> str:
+    """Render packed blocks as the knowledge base context of the system prompt."""
+    return "\n\n".join(_block_header(block["filename"]) + block["content"] for block in blocks)
@@ -0,0 +1,138 @@
+"""
+Document metadata for Betty AI Assistant.
+
+This module derives filterable chunk metadata from a file's location in the
+SharePoint export, for example "2.0 OBT PIM & BOM Mgmt/4.0 Pain Points"
+becomes domain "PIM & BOM Mgmt" and sub-category "Pain Points", and detects
+which domain a question refers to so searches can be narrowed to it.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from utils.ingestion_manifest import normalize_source_path
+
+
+SHAREPOINT_ROOT = "Molex Sharepoint Data"
+
+# Outline numbers ("2.0 ", "2. ") and the "OBT " prefix of domain folders
+_OUTLINE_PREFIX = re.compile(r"^\d+(?:\.\d+)*\.?\s+")
+_OBT_PREFIX = re.compile(r"^OBT\s+", re.IGNORECASE)
+
+# Phrases that name a domain in a question, keyed by the domain metadata value.
+# Kept specific so that general questions are not narrowed by accident.
+DOMAIN_KEYWORDS: Dict[str, List[str]] = {
+    "Change Control Management": [
+        "change control", "change management", "engineering change"
+    ],
+    "PIM & BOM Mgmt": [
+        "pim", "bom", "boms", "bill of materials", "bills of materials",
+        "product information management"
+    ],
+    "Requirements Mgmt": [
+        "requirements management", "requirements mgmt", "requirement management"
+    ],
+    "Design Management & Collaboration": [
+        "design management", "design collaboration"
+    ],
+    "PD Framework Transformation": [
+        "pd framework", "product development framework"
+    ],
+    "Data and AI": [
+        "data and ai", "data & ai"
+    ],
+    "Global PD": [
+        "global pd", "global product development"
+    ],
+}
+
+# Short acronyms that are also word prefixes ("eco-friendly"), so they only
+# match as whole uppercase tokens
+DOMAIN_ACRONYMS: Dict[str, List[str]] = {
+    "Change Control Management": ["ECO", "ECOs", "ECN", "ECNs", "ECR", "ECRs"],
+    "Global PD": ["GPD"],
+}
+
+
+def _alternation(keywords: List[str]) -> str:
+    """Regex group matching any of the keywords literally."""
+    return "(?:" + "|".join(re.escape(keyword) for keyword in keywords) + ")"
+
+
+_DOMAIN_PATTERNS = {
+    domain: [
+        re.compile(r"(?<![\w&])" + _alternation(DOMAIN_KEYWORDS[domain]) + r"(?![\w&])", re.IGNORECASE)
+    ] + (
+        [re.compile(r"(?<![\w&-])" + _alternation(DOMAIN_ACRONYMS[domain]) + r"(?![\w&-])")]
+        if domain in DOMAIN_ACRONYMS else []
+    )
+    for domain in DOMAIN_KEYWORDS
+}
+
+
+def clean_folder_name(name: str) -> str:
+    """Strip outline numbering and the OBT prefix from a folder name."""
+    name = _OUTLINE_PREFIX.sub("", name.strip())
+    return _OBT_PREFIX.sub("", name).strip()
+
+
+def derive_file_metadata(file_path: str) -> Dict[str, Any]:
+    """Derive chunk metadata for a source file from its path.
+
+    Files outside the SharePoint export get empty domain and sub-category
+    values, since ChromaDB metadata cannot hold None.
+
+    Args:
+        file_path: Path of the source file.
+
+    Returns:
+        Dictionary with source_path, file_type, domain and sub_category.
+    """
+    source_path = normalize_source_path(file_path)
+    parts = source_path.split("/")
+    folders = parts[parts.index(SHAREPOINT_ROOT) + 1:-1] if SHAREPOINT_ROOT in parts else []
+
+    return {
+        "source_path": source_path,
+        "file_type": os.path.splitext(source_path)[1].lower().lstrip("."),
+        "domain": clean_folder_name(folders[0]) if folders else "",
+        # The innermost folder is the most specific category, e.g. "Project Impact"
+        "sub_category": clean_folder_name(folders[-1]) if len(folders) > 1 else ""
+    }
+
+
+def detect_query_domains(query: str) -> List[str]:
+    """Return the domains a query names, in DOMAIN_KEYWORDS order."""
+    return [
+        domain for domain, patterns in _DOMAIN_PATTERNS.items()
+        if any(pattern.search(query) for pattern in patterns)
+    ]
+
+
+def domain_filter_for_query(query: str) -> Optional[Dict[str, Any]]:
+    """Build a metadata filter restricting a search to the domains a query names.
+
+    Documents without a domain, such as files outside the SharePoint export,
+    are kept, since they may cover any domain.
+
+    Args:
+        query: Search query string.
+
+    Returns:
+        A where filter on the domain field, or None if no domain is named.
+    """
+    domains = detect_query_domains(query)
+    if not domains:
+        return None
+    return {"domain": {"$in": domains + [""]}}
+
+
+def combine_where_filters(*filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combine metadata filters with $and, ignoring empty ones."""
+    filters = [where for where in filters if where]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return {"$and": filters}
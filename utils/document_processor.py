@@ -8,12 +8,18 @@ document formats and processing them for use in the RAG system.
 import io
 import re
 import csv
-from typing import List, Optional
+import json
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import PyPDF2
 import docx
 import streamlit as st
 import tiktoken
 from config.settings import AppConfig
+from utils.docx_stream import iter_docx_blocks
+from utils.json_records import flatten_json, iter_json_records
+from utils.pdf_pages import iter_pdf_pages_parallel
+from utils.pptx_stream import iter_pptx_slides
 try:
     import openpyxl
     OPENPYXL_AVAILABLE = True
@@ -27,20 +33,58 @@ except ImportError:
     NLTK_AVAILABLE = False
 
 
+def compile_project_pattern(project_names: List[str]) -> Optional["re.Pattern"]:
+    """Compile project names into one case-insensitive alternation regex.
+
+    Longer names come first so that a name containing another is preferred.
+
+    Args:
+        project_names: Project names to match.
+
+    Returns:
+        Compiled pattern, or None if there are no names.
+    """
+    names = sorted({name.strip() for name in project_names if name.strip()}, key=len, reverse=True)
+    if not names:
+        return None
+    return re.compile("|".join(re.escape(name) for name in names), re.IGNORECASE)
+
+
 class DocumentProcessor:
     """Document processing utilities with improved error handling."""
     
-    def __init__(self, tokenizer_model: str = None):
+    def __init__(
+        self,
+        tokenizer_model: str = None,
+        report_to_streamlit: bool = True,
+        project_names: Optional[List[str]] = None
+    ):
         """Initialize the document processor.
         
         Args:
             tokenizer_model: The tokenizer model to use for chunking.
+            report_to_streamlit: Whether to show problems with st.error/st.warning.
+                When False they are collected in self.messages instead, which
+                is required in worker processes without a Streamlit session.
+            project_names: Project names to detect in CSV cells, defaults to
+                AppConfig.CSV_PROJECT_NAMES.
         """
         self.tokenizer = tiktoken.get_encoding(
             tokenizer_model or AppConfig.TOKENIZER_MODEL
         )
+        self.report_to_streamlit = report_to_streamlit
+        self.messages: List[Tuple[str, str]] = []
+        self.project_names = list(project_names if project_names is not None else AppConfig.CSV_PROJECT_NAMES)
+        self._project_pattern = compile_project_pattern(self.project_names)
         self._ensure_nltk_data()
     
+    def _report(self, level: str, message: str):
+        """Report an extraction problem to Streamlit or collect it for the caller."""
+        if self.report_to_streamlit:
+            getattr(st, level)(message)
+        else:
+            self.messages.append((level, message))
+    
     def _ensure_nltk_data(self):
         """Ensure required NLTK data is available."""
         if NLTK_AVAILABLE:
@@ -62,27 +106,75 @@ class DocumentProcessor:
             Extracted text as string, empty string if extraction fails.
         """
         try:
-            pdf_reader = PyPDF2.PdfReader(file)
-            pages_text = []
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    text = page.extract_text()
-                    if text and text.strip():
-                        pages_text.append(text)
-                except Exception as e:
-                    st.warning(f"Failed to extract text from page {page_num + 1}: {e}")
-                    continue
-                    
-            return "\n".join(pages_text)
+            return "\n".join(self.iter_pdf_pages(file))
             
         except Exception as e:
-            st.error(f"Error reading PDF file: {e}")
+            self._report("error", f"Error reading PDF file: {e}")
             return ""
     
+    def iter_pdf_pages(self, file: io.BytesIO) -> Iterator[str]:
+        """Yield the text of each PDF page that has any, in page order.
+        
+        With PDF_PAGE_WORKERS set, page ranges are extracted by worker
+        processes and a page that fails or takes longer than
+        PDF_PAGE_TIMEOUT_SECONDS is skipped with a warning. Page workers are
+        only started from the main process; inside an extraction worker the
+        pages are read one by one, as without PDF_PAGE_WORKERS.
+        
+        Args:
+            file: BytesIO object containing PDF data.
+            
+        Yields:
+            Text of each page, as soon as it and the pages before it are done.
+        """
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
+        workers = AppConfig.PDF_PAGE_WORKERS
+        
+        if workers > 0 and page_count > 0 and multiprocessing.parent_process() is None:
+            file.seek(0)
+            pages = iter_pdf_pages_parallel(
+                file.read(), page_count, workers, AppConfig.PDF_PAGE_TIMEOUT_SECONDS
+            )
+            for page_index, text, error in pages:
+                if error:
+                    self._report("warning", f"Skipped page {page_index + 1}: {error}")
+                elif text.strip():
+                    yield text
+            return
+        
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                text = page.extract_text()
+                if text and text.strip():
+                    yield text
+            except Exception as e:
+                self._report("warning", f"Failed to extract text from page {page_num + 1}: {e}")
+                continue
+    
     def extract_text_from_docx(self, file: io.BytesIO) -> str:
         """Extract text from an in-memory DOCX file with structure preservation.
 
+        The document XML is streamed once in document order, so tables appear
+        where they are in the text. Files the streaming parser cannot read
+        fall back to python-docx.
+
+        Args:
+            file: BytesIO object containing DOCX data.
+
+        Returns:
+            Extracted text with preserved structure, empty string if extraction fails.
+        """
+        try:
+            file.seek(0)
+            return "\n".join(iter_docx_blocks(file))
+        except Exception:
+            file.seek(0)
+            return self._extract_text_from_docx_object_model(file)
+
+    def _extract_text_from_docx_object_model(self, file: io.BytesIO) -> str:
+        """Extract DOCX text with python-docx, paragraphs first and then tables.
+
         Args:
             file: BytesIO object containing DOCX data.
 
@@ -138,7 +230,7 @@ class DocumentProcessor:
             return "\n".join(content_parts)
             
         except Exception as e:
-            st.error(f"Error reading DOCX file: {e}")
+            self._report("error", f"Error reading DOCX file: {e}")
             return ""
     
     def extract_text_from_txt(self, file: io.BytesIO) -> str:
@@ -157,10 +249,10 @@ class DocumentProcessor:
                 file.seek(0)
                 return file.read().decode('latin-1')
             except Exception as e:
-                st.error(f"Error reading text file: {e}")
+                self._report("error", f"Error reading text file: {e}")
                 return ""
         except Exception as e:
-            st.error(f"Error reading text file: {e}")
+            self._report("error", f"Error reading text file: {e}")
             return ""
     
     def extract_text_from_csv(self, file: io.BytesIO) -> str:
@@ -173,95 +265,95 @@ class DocumentProcessor:
             Formatted text representation of CSV data, empty string if extraction fails.
         """
         try:
-            # Decode the file content
             file.seek(0)
-            content = file.read().decode('utf-8')
-            file_like = io.StringIO(content)
-
-            # Parse CSV with automatic delimiter detection
-            sample = content[:1024]  # Sample first 1KB for dialect detection
+            # Decode while reading so rows stream without a full copy of the text
+            text_stream = io.TextIOWrapper(file, encoding='utf-8', newline='')
             try:
-                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
-                file_like.seek(0)
-                reader = csv.reader(file_like, dialect)
-            except csv.Error:
-                # Fallback to comma delimiter
-                file_like.seek(0)
-                reader = csv.reader(file_like, delimiter=',')
-
-            rows = list(reader)
-            if not rows:
-                return ""
-
-            # Enhanced formatting for better search
-            text_parts = []
-
-            # Add header information
-            headers = rows[0] if rows else []
-            if headers:
-                text_parts.append(f"CSV Data with columns: {', '.join(headers)}")
-                text_parts.append("")
-
-            # Add searchable project references
-            known_projects = [
-                "Digital Twin Implementation", "Advanced Analytics Platform", "Customer Experience Platform",
-                "AI-Powered Predictive Maintenance", "Smart Manufacturing Systems", "Quality Management System",
-                "Green Operations Initiative", "Blockchain Integration"
-            ]
-
-            # Add data rows with context and project identification
-            for i, row in enumerate(rows[1:], 1):  # Skip header row
-                if len(row) == len(headers):
-                    # Create structured text for each row
-                    row_text = f"Row {i}:"
-                    for header, value in zip(headers, row):
-                        if value.strip():  # Only include non-empty values
-                            row_text += f" {header}: {value.strip()},"
-                    text_parts.append(row_text.rstrip(','))
-
-                    # Add project-specific searchable entries
-                    for j, cell in enumerate(row):
-                        for project in known_projects:
-                            if project.lower() in str(cell).lower():
-                                # Find associated scores in nearby columns
-                                scores = []
-                                for k in range(max(0, j-2), min(len(row), j+3)):
-                                    if k != j and str(row[k]).strip():
-                                        val = str(row[k]).strip()
-                                        if any(char in val for char in ['%', '0', '1', '2', '3']) and len(val) < 10:
-                                            scores.append(val)
-                                if scores:
-                                    text_parts.append(f"PROJECT: {project} has impact scores: {', '.join(scores)}")
-                else:
-                    # Handle rows with different column counts
-                    row_text = f"Row {i}: {', '.join(row)}"
-                    text_parts.append(row_text)
-
-                # Add spacing every 10 rows for readability
-                if i % 10 == 0:
-                    text_parts.append("")
-
-            return '\n'.join(text_parts)
+                # Parse CSV with automatic delimiter detection
+                sample = text_stream.read(1024)  # Sample first 1KB for dialect detection
+                text_stream.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+                    reader = csv.reader(text_stream, dialect)
+                except csv.Error:
+                    # Fallback to comma delimiter
+                    reader = csv.reader(text_stream, delimiter=',')
+                return '\n'.join(self._format_csv_rows(reader))
+            finally:
+                # Keep the caller's file open when the wrapper is collected
+                text_stream.detach()
             
         except UnicodeDecodeError:
             try:
                 # Try with different encoding
                 file.seek(0)
-                content = file.read().decode('latin-1')
-                file_like = io.StringIO(content)
-                reader = csv.reader(file_like)
-                rows = list(reader)
-                
-                # Simple fallback formatting
-                return '\n'.join([', '.join(row) for row in rows])
+                text_stream = io.TextIOWrapper(file, encoding='latin-1', newline='')
+                try:
+                    # Simple fallback formatting
+                    return '\n'.join(', '.join(row) for row in csv.reader(text_stream))
+                finally:
+                    text_stream.detach()
                 
             except Exception as e:
-                st.error(f"Error reading CSV file with fallback encoding: {e}")
+                self._report("error", f"Error reading CSV file with fallback encoding: {e}")
                 return ""
         except Exception as e:
-            st.error(f"Error processing CSV file: {e}")
+            self._report("error", f"Error processing CSV file: {e}")
             return ""
 
+    def _format_csv_rows(self, reader: Iterator[List[str]]) -> Iterator[str]:
+        """Format parsed CSV rows as searchable text lines.
+
+        Args:
+            reader: CSV rows, the first being the header.
+
+        Returns:
+            Lines of text, including a PROJECT line with nearby scores for
+            each known project named in a cell.
+        """
+        headers = next(reader, None)
+        if headers is None:
+            return
+        if headers:
+            yield f"CSV Data with columns: {', '.join(headers)}"
+            yield ""
+
+        project_pattern = self._project_pattern
+        for i, row in enumerate(reader, 1):
+            if len(row) == len(headers):
+                # Create structured text for each row
+                fields = [f"{header}: {value.strip()}" for header, value in zip(headers, row) if value.strip()]
+                yield f"Row {i}: {', '.join(fields)}" if fields else f"Row {i}:"
+
+                # One regex pass over the row skips the cell scan for rows naming no project
+                if project_pattern is not None and project_pattern.search("\x1f".join(row)):
+                    for j, cell in enumerate(row):
+                        for project in self._projects_in(cell):
+                            # Find associated scores in nearby columns
+                            scores = []
+                            for k in range(max(0, j-2), min(len(row), j+3)):
+                                if k != j and row[k].strip():
+                                    val = row[k].strip()
+                                    if any(char in val for char in ['%', '0', '1', '2', '3']) and len(val) < 10:
+                                        scores.append(val)
+                            if scores:
+                                yield f"PROJECT: {project} has impact scores: {', '.join(scores)}"
+            else:
+                # Handle rows with different column counts
+                yield f"Row {i}: {', '.join(row)}"
+
+            # Add spacing every 10 rows for readability
+            if i % 10 == 0:
+                yield ""
+
+    def _projects_in(self, cell: str) -> List[str]:
+        """Return the known projects named in a cell, in project list order."""
+        if not self._project_pattern.search(cell):
+            return []
+        # Only cells that match reach the per-project check, which also finds names nested in longer ones
+        cell = cell.lower()
+        return [project for project in self.project_names if project.lower() in cell]
+
     def extract_text_from_xlsx(self, file: io.BytesIO) -> str:
         """Extract text from an Excel (.xlsx) file with structured formatting.
 
@@ -272,68 +364,297 @@ class DocumentProcessor:
             Formatted text representation of Excel data, empty string if extraction fails.
         """
         if not OPENPYXL_AVAILABLE:
-            st.error("openpyxl library not available. Install it to process XLSX files.")
+            self._report("error", "openpyxl library not available. Install it to process XLSX files.")
             return ""
 
         try:
-            file.seek(0)
-            workbook = openpyxl.load_workbook(file, data_only=True)
-            text_parts = []
+            return '\n'.join(self.iter_xlsx_blocks(file))
+
+        except Exception as e:
+            self._report("error", f"Error processing XLSX file: {e}")
+            return ""
 
-            # Process each sheet
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
+    def iter_xlsx_blocks(self, file: io.BytesIO, rows_per_block: int = None) -> Iterator[str]:
+        """Stream an Excel (.xlsx) file as text blocks of at most rows_per_block rows.
 
-                # Add sheet header
-                text_parts.append(f"\n=== Sheet: {sheet_name} ===\n")
+        The workbook is opened read-only and rows are read as values with
+        iter_rows, so memory use does not grow with the size of a sheet.
+        Joining the blocks with newlines gives the formatted text of the workbook.
 
-                # Get dimensions
-                max_row = sheet.max_row
-                max_col = sheet.max_column
+        Args:
+            file: BytesIO object containing XLSX data.
+            rows_per_block: Data rows per yielded block, defaults to AppConfig.XLSX_ROWS_PER_BLOCK.
+
+        Yields:
+            Text blocks: a header block per sheet, then its formatted rows.
+        """
+        rows_per_block = max(rows_per_block or AppConfig.XLSX_ROWS_PER_BLOCK, 1)
+        file.seek(0)
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
 
-                if max_row == 0 or max_col == 0:
-                    text_parts.append("(Empty sheet)")
+        try:
+            for sheet in workbook.worksheets:
+                # Without stored dimensions rows are read as they are, with varying lengths
+                if sheet.max_column is None:
+                    sheet.reset_dimensions()
+                rows = sheet.iter_rows(values_only=True)
+                header_row = next(rows, None)
+
+                if header_row is None:
+                    yield f"\n=== Sheet: {sheet.title} ===\n\n(Empty sheet)"
                     continue
 
                 # Extract headers (first row)
-                headers = []
-                for col in range(1, max_col + 1):
-                    cell_value = sheet.cell(row=1, column=col).value
-                    headers.append(str(cell_value) if cell_value is not None else f"Column{col}")
-
-                text_parts.append(f"Columns: {', '.join(headers)}")
-                text_parts.append("")
+                headers = [
+                    str(value) if value is not None else f"Column{col}"
+                    for col, value in enumerate(header_row, start=1)
+                ]
+                yield '\n'.join([f"\n=== Sheet: {sheet.title} ===\n", f"Columns: {', '.join(headers)}", ""])
 
                 # Extract data rows
-                for row_num in range(2, max_row + 1):
-                    row_data = []
+                lines = []
+                rows_in_block = 0
+                for row_num, row in enumerate(rows, start=2):
                     row_text = f"Row {row_num - 1}:"
+                    has_data = False
 
-                    for col_num in range(1, max_col + 1):
-                        cell_value = sheet.cell(row=row_num, column=col_num).value
-
+                    for col_num, cell_value in enumerate(row, start=1):
                         if cell_value is not None:
                             # Clean the value
                             value_str = str(cell_value).strip()
                             if value_str:
-                                header = headers[col_num - 1]
+                                header = headers[col_num - 1] if col_num <= len(headers) else f"Column{col_num}"
                                 row_text += f" {header}: {value_str},"
-                                row_data.append(value_str)
+                                has_data = True
 
-                    if row_data:  # Only add non-empty rows
-                        text_parts.append(row_text.rstrip(','))
+                    if has_data:  # Only add non-empty rows
+                        lines.append(row_text.rstrip(','))
 
                     # Add spacing every 10 rows for readability
                     if (row_num - 1) % 10 == 0 and row_num > 2:
-                        text_parts.append("")
+                        lines.append("")
+
+                    rows_in_block += 1
+                    if rows_in_block >= rows_per_block and lines:
+                        yield '\n'.join(lines)
+                        lines = []
+                        rows_in_block = 0
 
-                text_parts.append("")  # Blank line between sheets
+                lines.append("")  # Blank line between sheets
+                yield '\n'.join(lines)
+        finally:
+            # Read-only workbooks keep the underlying archive open until closed
+            workbook.close()
 
-            return '\n'.join(text_parts)
+    def extract_text_from_pptx(self, file: io.BytesIO) -> str:
+        """Extract slide text from an in-memory PPTX file.
 
+        Slides are read one at a time from the package XML, so images and
+        other media in the deck are never loaded.
+
+        Args:
+            file: BytesIO object containing PPTX data.
+
+        Returns:
+            Text of each slide in presentation order, empty string if extraction fails.
+        """
+        try:
+            file.seek(0)
+            return "\n".join(iter_pptx_slides(file))
         except Exception as e:
-            st.error(f"Error processing XLSX file: {e}")
+            self._report("error", f"Error reading PPTX file: {e}")
+            return ""
+
+    def _load_json(self, file: io.BytesIO) -> Any:
+        """Parse JSON data, reporting and returning None if it is invalid."""
+        try:
+            file.seek(0)
+            return json.loads(file.read().decode('utf-8-sig'))
+        except (UnicodeDecodeError, ValueError) as e:
+            self._report("error", f"Error reading JSON file: {e}")
+            return None
+
+    def extract_text_from_json(self, file: io.BytesIO) -> str:
+        """Extract text from an in-memory JSON file.
+
+        A list of records is rendered one record per paragraph; any other
+        JSON is flattened to "path: value" lines.
+
+        Args:
+            file: BytesIO object containing JSON data.
+
+        Returns:
+            Formatted text representation of the JSON data, empty string if extraction fails.
+        """
+        data = self._load_json(file)
+        if data is None:
             return ""
+        records = [text for text, _ in iter_json_records(data)]
+        if records:
+            return "\n\n".join(records)
+        return "\n".join(flatten_json(data))
+
+    def extract_records(self, file: io.BytesIO, file_type: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Extract a file's records, each to be indexed as its own chunk.
+
+        Args:
+            file: BytesIO object containing the file data.
+            file_type: File type as returned by get_file_type.
+
+        Returns:
+            (text, metadata) per record, empty for files without records,
+            which are chunked from their text instead.
+        """
+        if file_type != 'json':
+            return []
+        data = self._load_json(file)
+        return list(iter_json_records(data)) if data is not None else []
+
+    def chunk_records(self, records: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Turn records into chunks, splitting only records over CHUNK_SIZE tokens.
+
+        Args:
+            records: (text, metadata) per record, as from extract_records.
+
+        Returns:
+            The chunks and, for each chunk, the metadata of its record.
+        """
+        chunks, metadatas = [], []
+        for text, metadata in records:
+            cleaned = self.clean_text(text)
+            if not cleaned:
+                continue
+            pieces = [cleaned] if len(self.tokenizer.encode(cleaned)) <= AppConfig.CHUNK_SIZE else self.chunk_text(cleaned)
+            chunks.extend(pieces)
+            metadatas.extend(dict(metadata) for _ in pieces)
+        return chunks, metadatas
+
+    def extract_text(self, file: io.BytesIO, file_type: str) -> str:
+        """Extract text from an in-memory file using the extractor for its type.
+        
+        Args:
+            file: BytesIO object containing the file data.
+            file_type: File type as returned by get_file_type.
+            
+        Returns:
+            Extracted text as string, empty string for unsupported types.
+        """
+        if file_type == 'pdf':
+            return self.extract_text_from_pdf(file)
+        elif file_type == 'docx':
+            return self.extract_text_from_docx(file)
+        elif file_type == 'txt' or file_type == 'md':
+            return self.extract_text_from_txt(file)
+        elif file_type == 'csv':
+            return self.extract_text_from_csv(file)
+        elif file_type == 'xlsx':
+            return self.extract_text_from_xlsx(file)
+        elif file_type == 'pptx':
+            return self.extract_text_from_pptx(file)
+        elif file_type == 'json':
+            return self.extract_text_from_json(file)
+        else:
+            return ""
+
+    def chunk_for_indexing(self, text: str) -> List[str]:
+        """Clean text and split it into chunks using the configured chunker.
+        
+        Args:
+            text: Raw extracted text.
+            
+        Returns:
+            List of text chunks ready for embedding.
+        """
+        cleaned_text = self.clean_text(text)
+        if AppConfig.USE_SEMANTIC_CHUNKING:
+            return self.semantic_chunk_text(cleaned_text)
+        return self.chunk_text(cleaned_text)
+
+    def iter_text_blocks(self, file: io.BytesIO, file_type: str) -> Iterator[str]:
+        """Yield a file's text in blocks as it is extracted.
+        
+        PDFs are yielded page by page, spreadsheets in row blocks and
+        presentations slide by slide, so that chunking can begin before the
+        whole file is read. Joining the blocks with newlines gives the text
+        returned by extract_text.
+        
+        Args:
+            file: BytesIO object containing the file data.
+            file_type: File type as returned by get_file_type.
+            
+        Yields:
+            Blocks of extracted text.
+        """
+        if file_type == 'pdf':
+            try:
+                yield from self.iter_pdf_pages(file)
+            except Exception as e:
+                self._report("error", f"Error reading PDF file: {e}")
+        elif file_type == 'xlsx' and OPENPYXL_AVAILABLE:
+            try:
+                yield from self.iter_xlsx_blocks(file)
+            except Exception as e:
+                self._report("error", f"Error processing XLSX file: {e}")
+        elif file_type == 'pptx':
+            try:
+                yield from iter_pptx_slides(file)
+            except Exception as e:
+                self._report("error", f"Error reading PPTX file: {e}")
+        else:
+            yield self.extract_text(file, file_type)
+
+    def iter_chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Clean and chunk text that arrives in blocks, such as PDF pages.
+        
+        With fixed-size chunking each chunk is yielded as soon as enough
+        tokens have arrived, and the chunks equal those of chunk_for_indexing
+        on the blocks joined by newlines. Semantic chunking needs the whole
+        text, so the blocks are joined first.
+        
+        Args:
+            blocks: Raw extracted text blocks.
+            
+        Yields:
+            Text chunks ready for embedding.
+        """
+        if AppConfig.USE_SEMANTIC_CHUNKING:
+            text = "\n".join(blocks)
+            if text.strip():
+                yield from self.chunk_for_indexing(text)
+            return
+        
+        chunk_size = AppConfig.CHUNK_SIZE
+        overlap = AppConfig.CHUNK_OVERLAP
+        if overlap >= chunk_size:
+            self._report("warning", f"Overlap ({overlap}) must be less than chunk size ({chunk_size})")
+            overlap = chunk_size // 4
+        step = chunk_size - overlap
+        
+        # Tokens never merge across the start of a cleaned line, so a block
+        # encoded with its trailing newline matches the joined text. Each block
+        # is encoded once the next one shows that a newline follows it.
+        tokens: List[int] = []
+        pending: Optional[str] = None
+        for block in blocks:
+            cleaned = self.clean_text(block)
+            if not cleaned:
+                continue
+            if pending is not None:
+                tokens.extend(self.tokenizer.encode(pending + "\n"))
+            pending = cleaned
+            
+            while len(tokens) >= chunk_size:
+                chunk = self.tokenizer.decode(tokens[:chunk_size])
+                if chunk.strip():
+                    yield chunk
+                tokens = tokens[step:]
+        
+        if pending is not None:
+            tokens.extend(self.tokenizer.encode(pending))
+        for i in range(0, len(tokens), step):
+            chunk = self.tokenizer.decode(tokens[i:i + chunk_size])
+            if chunk.strip():
+                yield chunk
 
     def clean_text(self, text: str) -> str:
         """Clean and normalize extracted text.
@@ -377,7 +698,7 @@ class DocumentProcessor:
         
         # Validate parameters
         if overlap >= chunk_size:
-            st.warning(f"Overlap ({overlap}) must be less than chunk size ({chunk_size})")
+            self._report("warning", f"Overlap ({overlap}) must be less than chunk size ({chunk_size})")
             overlap = chunk_size // 4
         
         try:
@@ -394,7 +715,7 @@ class DocumentProcessor:
             return chunks
             
         except Exception as e:
-            st.error(f"Error chunking text: {e}")
+            self._report("error", f"Error chunking text: {e}")
             return [text]  # Return original text as fallback
     
     def semantic_chunk_text(
@@ -466,7 +787,7 @@ class DocumentProcessor:
             return chunks if chunks else [text]
             
         except Exception as e:
-            st.error(f"Error in semantic chunking: {e}")
+            self._report("error", f"Error in semantic chunking: {e}")
             # Fallback to regular chunking
             return self.chunk_text(text, chunk_size, overlap)
     
@@ -493,6 +814,10 @@ class DocumentProcessor:
             return 'csv'
         elif filename_lower.endswith('.xlsx'):
             return 'xlsx'
+        elif filename_lower.endswith('.pptx'):
+            return 'pptx'
+        elif filename_lower.endswith('.json'):
+            return 'json'
         else:
             return None
     
@@ -521,20 +846,7 @@ class DocumentProcessor:
         
         try:
             file_bytes = io.BytesIO(uploaded_file.getvalue())
-
-            if file_type == 'pdf':
-                text = self.extract_text_from_pdf(file_bytes)
-            elif file_type == 'docx':
-                text = self.extract_text_from_docx(file_bytes)
-            elif file_type == 'txt' or file_type == 'md':
-                text = self.extract_text_from_txt(file_bytes)
-            elif file_type == 'csv':
-                text = self.extract_text_from_csv(file_bytes)
-            elif file_type == 'xlsx':
-                text = self.extract_text_from_xlsx(file_bytes)
-            else:
-                return ""
-
+            text = self.extract_text(file_bytes, file_type)
             return self.clean_text(text)
             
         except Exception as e:
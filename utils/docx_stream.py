@@ -0,0 +1,255 @@
+"""
+Streaming DOCX text extraction for Betty AI Assistant.
+
+Reads the main document part of a .docx archive with iterparse in a single
+pass, emitting paragraphs, headings, list items and tables in document order.
+Only the document, its styles and the package relationships are read, so
+embedded images and other media parts are never decompressed. Runs are
+discarded as soon as their text is taken and tables once converted, so
+memory use does not grow with the size of the document.
+
+The output follows DocumentProcessor's python-docx extractor: headings become
+Markdown-style "#" lines, list items get a bullet, and tables are rendered as
+"|"-separated rows between "--- Table ---" markers.
+"""
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PACKAGE_RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+_STYLES_REL = "/styles"
+
+_P, _TBL, _TR, _TC, _R = _W + "p", _W + "tbl", _W + "tr", _W + "tc", _W + "r"
+_BODY = _W + "body"
+_VAL = _W + "val"
+
+# Inline containers whose runs belong to the paragraph text, e.g. hyperlinks
+# and tracked insertions. Deleted text and drawings (text boxes) are skipped.
+_RUN_CONTAINERS = {
+    _W + "hyperlink", _W + "ins", _W + "smartTag", _W + "fldSimple",
+    _W + "sdt", _W + "sdtContent", _W + "customXml", _W + "moveTo"
+}
+
+# Built-in style names stored in lowercase in styles.xml, as python-docx shows them
+_UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+_UI_STYLE_NAMES.update({f"heading {level}": f"Heading {level}" for level in range(1, 10)})
+
+
+def part_relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Read the internal relationships of an Office package part.
+
+    Args:
+        archive: Open package archive.
+        part: Archive path of the part, "" for the package itself.
+
+    Returns:
+        Relationship ID mapped to (type, archive path of the target).
+    """
+    directory, name = posixpath.split(part)
+    rels_path = posixpath.join(directory, "_rels", f"{name}.rels")
+    if rels_path not in archive.namelist():
+        return {}
+
+    relationships = {}
+    with archive.open(rels_path) as f:
+        for rel in ET.parse(f).getroot().iter(_PACKAGE_RELS):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target", "")
+            target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(directory, target))
+            relationships[rel.get("Id", "")] = (rel.get("Type", ""), target)
+    return relationships
+
+
+def relationship_target(archive: zipfile.ZipFile, part: str, rel_type: str) -> Optional[str]:
+    """Return the archive path of the first relationship of a type from a part."""
+    for target_type, target in part_relationships(archive, part).values():
+        if target_type.endswith(rel_type):
+            return target
+    return None
+
+
+def _read_paragraph_styles(archive: zipfile.ZipFile, styles_part: Optional[str]) -> Tuple[Dict[str, str], str]:
+    """Map paragraph style IDs to style names and find the default style name."""
+    names: Dict[str, str] = {}
+    default = "Normal"
+    if not styles_part or styles_part not in archive.namelist():
+        return names, default
+
+    with archive.open(styles_part) as f:
+        for style in ET.parse(f).getroot().iter(_W + "style"):
+            if style.get(_W + "type") != "paragraph":
+                continue
+            name_element = style.find(_W + "name")
+            name = name_element.get(_VAL, "") if name_element is not None else ""
+            name = _UI_STYLE_NAMES.get(name, name)
+            names[style.get(_W + "styleId", "")] = name
+            if style.get(_W + "default") in ("1", "true", "on"):
+                default = name
+    return names, default
+
+
+def _run_text(run: ET.Element) -> str:
+    """Text of a run, with tabs, line breaks and non-breaking hyphens."""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W + "t":
+            parts.append(child.text or "")
+        elif tag in (_W + "tab", _W + "ptab"):
+            parts.append("\t")
+        elif tag == _W + "br":
+            # Page and column breaks have no text equivalent
+            parts.append("\n" if child.get(_W + "type", "textWrapping") == "textWrapping" else "")
+        elif tag == _W + "cr":
+            parts.append("\n")
+        elif tag == _W + "noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _paragraph_text(element: ET.Element) -> str:
+    """Text of a paragraph's runs, including runs inside hyperlinks and insertions."""
+    parts = []
+    for child in element:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag in _RUN_CONTAINERS:
+            parts.append(_paragraph_text(child))
+    return "".join(parts)
+
+
+def _cell_text(cell: ET.Element) -> str:
+    """Text of a table cell; a table nested in the cell contributes its rows."""
+    lines = []
+    for child in cell:
+        if child.tag == _P:
+            lines.append(_paragraph_text(child))
+        elif child.tag == _TBL:
+            lines.extend(_table_rows(child))
+    return "\n".join(lines).strip()
+
+
+def _grid_value(properties: Optional[ET.Element], name: str) -> int:
+    """Read an integer grid property such as gridSpan, 0 when absent."""
+    element = properties.find(_W + name) if properties is not None else None
+    try:
+        return int(element.get(_VAL, "0")) if element is not None else 0
+    except ValueError:
+        return 0
+
+
+def _table_rows(table: ET.Element) -> List[str]:
+    """Rows of a table as "|"-separated non-empty cells.
+
+    A vertically merged cell repeats its text in each row it spans, as
+    python-docx does, so every row keeps its context. Horizontally merged
+    cells appear once.
+    """
+    rows = []
+    merged_text: Dict[int, str] = {}
+    for row in table.findall(_TR):
+        cells = []
+        column = _grid_value(row.find(_W + "trPr"), "gridBefore")
+        for cell in row.findall(_TC):
+            properties = cell.find(_W + "tcPr")
+            vertical_merge = properties.find(_W + "vMerge") if properties is not None else None
+            if vertical_merge is not None and vertical_merge.get(_VAL, "continue") == "continue":
+                cell_text = merged_text.get(column, "")
+            else:
+                cell_text = _cell_text(cell)
+                merged_text[column] = cell_text
+            if cell_text:
+                cells.append(cell_text)
+            column += max(_grid_value(properties, "gridSpan"), 1)
+        if cells:
+            rows.append(" | ".join(cells))
+    return rows
+
+
+def iter_docx_blocks(file) -> Iterator[str]:
+    """Yield the text of a DOCX file in document order.
+
+    Args:
+        file: Path or binary file object of the .docx archive.
+
+    Yields:
+        One entry per non-empty paragraph and table, formatted like the
+        python-docx extractor: "# " headings, "• " list items and tables
+        between "--- Table ---" markers.
+
+    Raises:
+        zipfile.BadZipFile, KeyError or xml.etree.ElementTree.ParseError if
+        the file is not a readable DOCX package.
+    """
+    with zipfile.ZipFile(file) as archive:
+        document_part = relationship_target(archive, "", OFFICE_DOCUMENT_REL) or "word/document.xml"
+        style_names, default_style = _read_paragraph_styles(
+            archive, relationship_target(archive, document_part, _STYLES_REL)
+        )
+
+        with archive.open(document_part) as document:
+            # Open elements from the root down to the one being parsed
+            stack: List[ET.Element] = []
+            body_depth = None
+            paragraph_parts: List[str] = []
+            for event, element in ET.iterparse(document, events=("start", "end")):
+                if event == "start":
+                    stack.append(element)
+                    if element.tag == _BODY:
+                        body_depth = len(stack)
+                    continue
+
+                stack.pop()
+                if body_depth is None:
+                    continue
+
+                if len(stack) == body_depth + 1 and stack[-1].tag == _P:
+                    # Convert the runs of a top-level paragraph as they are parsed,
+                    # so even a single huge paragraph is never held in memory
+                    if element.tag == _R:
+                        paragraph_parts.append(_run_text(element))
+                    elif element.tag in _RUN_CONTAINERS:
+                        paragraph_parts.append(_paragraph_text(element))
+                    else:
+                        continue
+                    del stack[-1][-1]
+                elif len(stack) == body_depth:
+                    # Only paragraphs and tables that are direct children of the body are converted
+                    if element.tag == _P:
+                        text = "".join(paragraph_parts).strip()
+                        paragraph_parts = []
+                        if text:
+                            yield _format_paragraph(element, text, style_names, default_style)
+                    elif element.tag == _TBL:
+                        rows = _table_rows(element)
+                        if rows:
+                            yield "\n--- Table ---"
+                            yield from rows
+                            yield "--- End Table ---\n"
+                    # The converted element is no longer needed
+                    stack[-1].clear()
+
+
+def _format_paragraph(element: ET.Element, text: str, style_names: Dict[str, str], default_style: str) -> str:
+    """Format paragraph text as a heading, list item or plain line."""
+    properties = element.find(_W + "pPr")
+    style_element = properties.find(_W + "pStyle") if properties is not None else None
+    style_id = style_element.get(_VAL) if style_element is not None else None
+    style_name = style_names.get(style_id, default_style) if style_id else default_style
+
+    if style_name.startswith("Heading"):
+        level = style_name.replace("Heading ", "")
+        if level.isdigit():
+            return f"\n{'#' * min(int(level), 6)} {text}\n"
+        return f"\n## {text}\n"
+    # Numbered and bulleted paragraphs carry numbering properties whatever their style
+    numbering = properties.find(_W + "numPr/" + _W + "numId") if properties is not None else None
+    if style_name.startswith("List") or (numbering is not None and numbering.get(_VAL) != "0"):
+        return f"• {text}"
+    return text
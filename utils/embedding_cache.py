@@ -0,0 +1,134 @@
+"""
+Persistent embedding cache for Betty AI Assistant.
+
+This module stores chunk embeddings in SQLite keyed by the SHA-256 of the
+chunk text, the embedding model and the normalization setting, so that
+re-indexing unchanged text does not recompute embeddings.
+"""
+
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Disk-backed cache mapping chunk text and model to an embedding vector."""
+
+    # SQLite limits the number of bound parameters per statement
+    _LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str = "data/embedding_cache.db"):
+        """Initialize the cache and create its database if needed."""
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the embedding cache table."""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    text_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    normalized INTEGER NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (text_hash, model, normalized)
+                ) WITHOUT ROWID
+            """)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Return the cache key component for a chunk of text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(
+        self,
+        texts: Sequence[str],
+        model: str,
+        normalized: bool = False,
+        dim: Optional[int] = None
+    ) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for several texts.
+
+        Args:
+            texts: Chunk texts to look up.
+            model: Embedding model name.
+            normalized: Whether the embeddings were L2-normalized.
+            dim: Expected dimension, vectors of any other size count as misses.
+
+        Returns:
+            List aligned with texts holding float32 vectors or None for misses.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with sqlite3.connect(self.db_path) as conn:
+            unique_hashes = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique_hashes), self._LOOKUP_BATCH_SIZE):
+                batch = unique_hashes[start:start + self._LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, dim, vector FROM embeddings "
+                    f"WHERE model = ? AND normalized = ? AND text_hash IN ({placeholders})",
+                    [model, int(normalized), *batch]
+                )
+                for text_hash, vector_dim, vector in rows:
+                    if dim is None or vector_dim == dim:
+                        found[text_hash] = np.frombuffer(vector, dtype=np.float32, count=vector_dim)
+
+        results = [found.get(text_hash) for text_hash in hashes]
+        with self._lock:
+            hit_count = sum(vector is not None for vector in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(
+        self,
+        texts: Sequence[str],
+        vectors: Sequence[Any],
+        model: str,
+        normalized: bool = False
+    ):
+        """Store embeddings for several texts.
+
+        Args:
+            texts: Chunk texts that were embedded.
+            vectors: Embeddings aligned with texts.
+            model: Embedding model name.
+            normalized: Whether the embeddings were L2-normalized.
+        """
+        rows = []
+        for text, vector in zip(texts, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            rows.append((self.text_hash(text), model, int(normalized), vector.shape[0], vector.tobytes()))
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (text_hash, model, normalized, dim, vector) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and hit/miss counters for monitoring."""
+        with sqlite3.connect(self.db_path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
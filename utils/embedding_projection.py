@@ -0,0 +1,157 @@
+"""
+Embedding dimensionality reduction for Betty AI Assistant.
+
+A projection maps model embeddings to fewer dimensions before they are
+stored, cutting index memory and search time. It is fitted once when a
+collection is first built, saved next to the collection, and applied to every
+query so that documents and queries share the same space.
+
+Two methods are supported:
+
+- "pca": principal components fitted on the first chunks of the collection
+- "truncate": keep the leading dimensions (Matryoshka-style), no fitting
+
+Projected vectors are re-normalized to unit length, so L2 distance keeps
+ranking like cosine similarity.
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+PROJECTION_METHODS = ("pca", "truncate")
+
+
+class EmbeddingProjection:
+    """Linear projection of embeddings to a lower dimension."""
+
+    def __init__(self, method: str, output_dim: int):
+        """Initialize an unfitted projection.
+
+        Args:
+            method: "pca" or "truncate".
+            output_dim: Number of dimensions to keep.
+        """
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Unknown projection method '{method}', expected one of {PROJECTION_METHODS}")
+        self.method = method
+        self.requested_dim = output_dim
+        self.output_dim = output_dim
+        self.input_dim: Optional[int] = None
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.explained_variance_ratio: Optional[float] = None
+
+    @property
+    def fitted(self) -> bool:
+        return self.input_dim is not None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Settings that identify this projection, used to detect config changes."""
+        return {"method": self.method, "dim": self.requested_dim}
+
+    def fit(self, vectors: Any) -> "EmbeddingProjection":
+        """Fit the projection on sample embeddings.
+
+        PCA keeps at most as many components as there are samples.
+
+        Args:
+            vectors: Sample embeddings of shape (n, input_dim).
+
+        Returns:
+            This projection.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.input_dim = vectors.shape[1]
+        self.output_dim = min(self.output_dim, self.input_dim)
+
+        if self.method == "truncate":
+            return self
+
+        self.mean = vectors.mean(axis=0)
+        centered = vectors - self.mean
+        _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+        self.output_dim = min(self.output_dim, vt.shape[0])
+        self.components = np.ascontiguousarray(vt[:self.output_dim].T, dtype=np.float32)
+
+        variance = singular_values ** 2
+        self.explained_variance_ratio = (
+            float(variance[:self.output_dim].sum() / variance.sum()) if variance.sum() else 1.0
+        )
+        return self
+
+    def transform(self, vectors: Any) -> np.ndarray:
+        """Project embeddings and re-normalize them to unit length.
+
+        Args:
+            vectors: Embeddings of shape (n, input_dim).
+
+        Returns:
+            Float32 array of shape (n, output_dim).
+        """
+        if not self.fitted:
+            raise RuntimeError("Projection must be fitted before use")
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.method == "truncate":
+            projected = vectors[:, :self.output_dim]
+        else:
+            projected = (vectors - self.mean) @ self.components
+
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return (projected / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the fitted projection to .npz bytes."""
+        buffer = io.BytesIO()
+        arrays = {
+            "method": np.array(self.method),
+            "requested_dim": np.array(self.requested_dim),
+            "output_dim": np.array(self.output_dim),
+            "input_dim": np.array(self.input_dim)
+        }
+        if self.method == "pca":
+            arrays.update(
+                mean=self.mean,
+                components=self.components,
+                explained_variance_ratio=np.array(self.explained_variance_ratio)
+            )
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EmbeddingProjection":
+        """Load a projection serialized with to_bytes."""
+        with np.load(io.BytesIO(data)) as arrays:
+            projection = cls(str(arrays["method"]), int(arrays["requested_dim"]))
+            projection.output_dim = int(arrays["output_dim"])
+            projection.input_dim = int(arrays["input_dim"])
+            if projection.method == "pca":
+                projection.mean = arrays["mean"].astype(np.float32)
+                projection.components = arrays["components"].astype(np.float32)
+                projection.explained_variance_ratio = float(arrays["explained_variance_ratio"])
+        return projection
+
+    def save(self, path: str):
+        """Atomically write the projection to a file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["EmbeddingProjection"]:
+        """Load a projection written by save, or return None if unavailable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return cls.from_bytes(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
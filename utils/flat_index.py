@@ -0,0 +1,456 @@
+"""
+In-process flat vector index for Betty AI Assistant.
+
+This module provides an exact brute-force alternative to ChromaDB for small
+corpora. Vectors live in a memory-mapped float32/float16 matrix with a JSON
+metadata sidecar, and search is a single matrix product with argpartition
+top-k selection. Added records are appended to a JSONL log next to the
+sidecar, so an add costs time proportional to the batch, not the corpus;
+deletes rewrite the sidecar and clear the log.
+
+FlatIndexClient and FlatIndexCollection implement the subset of the ChromaDB
+client and collection API used by VectorStore, so either backend can be
+selected with AppConfig.VECTOR_BACKEND.
+"""
+
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+SIDECAR_VERSION = 1
+
+# Rows scored per matrix product, bounding temporary memory during search
+_SEARCH_BLOCK_ROWS = 16384
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a ChromaDB-style metadata filter against one metadata dict.
+
+    Supports field equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte,
+    and the $and/$or combinators.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+                if operator in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if operator == "$gt" and not value > operand:
+                        return False
+                    if operator == "$gte" and not value >= operand:
+                        return False
+                    if operator == "$lt" and not value < operand:
+                        return False
+                    if operator == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+class FlatIndexCollection:
+    """Exact nearest-neighbour collection over a memory-mapped vector matrix."""
+
+    def __init__(self, name: str, directory: Optional[str] = None, dtype: str = "float32"):
+        """Initialize or load a collection.
+
+        Args:
+            name: Collection name.
+            directory: Storage directory, None keeps the collection in memory.
+            dtype: Storage dtype for vectors, "float32" or "float16".
+        """
+        self.name = name
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._positions: Dict[str, int] = {}
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+
+        if directory:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    # --- Persistence -------------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.bin")
+
+    @property
+    def _sidecar_path(self) -> str:
+        return os.path.join(self.directory, "records.json")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, "records.log.jsonl")
+
+    def _load(self):
+        """Load the sidecar and map the vector file."""
+        if not os.path.exists(self._sidecar_path):
+            return
+
+        with open(self._sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") != SIDECAR_VERSION:
+            return
+
+        self.dtype = np.dtype(sidecar["dtype"])
+        self._dim = sidecar["dim"]
+        self._ids = sidecar["ids"]
+        self._documents = sidecar["documents"]
+        self._metadatas = sidecar["metadatas"]
+        self._replay_log()
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._map_vectors()
+
+    def _replay_log(self):
+        """Append the records logged since the sidecar was last written."""
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A write interrupted mid-line; its vectors are overwritten by the next add
+                    break
+                self._ids.append(record["id"])
+                self._documents.append(record["document"])
+                self._metadatas.append(record["metadata"])
+
+    def _map_vectors(self, recompute_norms: bool = True):
+        """Memory-map the first count rows of the vector file.
+
+        Args:
+            recompute_norms: Recompute the squared norms of every row; False
+                when the caller has already extended them for appended rows.
+        """
+        count = len(self._ids)
+        if not count:
+            self._vectors = None
+            self._sq_norms = np.zeros(0, dtype=np.float32)
+            return
+
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self._dim)
+        )
+        if recompute_norms:
+            self._sq_norms = self._squared_norms(self._vectors)
+
+    @staticmethod
+    def _squared_norms(vectors: np.ndarray) -> np.ndarray:
+        norms = np.empty(vectors.shape[0], dtype=np.float32)
+        for start in range(0, vectors.shape[0], _SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + _SEARCH_BLOCK_ROWS], dtype=np.float32)
+            norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+        return norms
+
+    def _write_sidecar(self):
+        """Atomically write ids, documents and metadata for all rows and clear the log."""
+        tmp_path = f"{self._sidecar_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": SIDECAR_VERSION,
+                    "dtype": self.dtype.name,
+                    "dim": self._dim,
+                    "ids": self._ids,
+                    "documents": self._documents,
+                    "metadatas": self._metadatas
+                },
+                f
+            )
+        os.replace(tmp_path, self._sidecar_path)
+        if os.path.exists(self._log_path):
+            os.remove(self._log_path)
+
+    def _append_log(self, ids: List[str], documents: List[Optional[str]], metadatas: List[Optional[Dict[str, Any]]]):
+        """Append added records to the log, one JSON object per line."""
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps({"id": doc_id, "document": document, "metadata": metadata}) + "\n"
+                for doc_id, document, metadata in zip(ids, documents, metadatas)
+            )
+
+    # --- ChromaDB-compatible API --------------------------------------------
+
+    def count(self) -> int:
+        """Return the number of stored vectors."""
+        with self._lock:
+            return len(self._ids)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ):
+        """Append vectors; IDs that already exist are skipped like ChromaDB does."""
+        with self._lock:
+            rows = [i for i, doc_id in enumerate(ids) if doc_id not in self._positions]
+            if len(set(ids)) != len(ids):
+                raise ValueError("Expected IDs to be unique within a single add call")
+            if not rows:
+                return
+
+            vectors = np.asarray(embeddings, dtype=np.float32)[rows]
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {self._dim}"
+                )
+
+            new_ids = [ids[i] for i in rows]
+            new_documents = [documents[i] if documents is not None else None for i in rows]
+            new_metadatas = [metadatas[i] if metadatas is not None else None for i in rows]
+            stored = vectors.astype(self.dtype)
+
+            if self.directory:
+                with open(self._vectors_path, "r+b" if self._ids else "wb") as f:
+                    f.seek(len(self._ids) * self._dim * self.dtype.itemsize)
+                    f.write(stored.tobytes())
+                    f.truncate()
+
+            is_new_collection = not self._ids
+            for doc_id in new_ids:
+                self._positions[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+            self._documents.extend(new_documents)
+            self._metadatas.extend(new_metadatas)
+            self._sq_norms = np.concatenate([self._sq_norms, self._squared_norms(stored)])
+
+            if self.directory:
+                if is_new_collection or not os.path.exists(self._sidecar_path):
+                    # The sidecar records the dimension and dtype, so it is written once up front
+                    self._write_sidecar()
+                else:
+                    self._append_log(new_ids, new_documents, new_metadatas)
+                self._map_vectors(recompute_norms=False)
+            else:
+                self._vectors = stored if self._vectors is None else np.vstack([self._vectors, stored])
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ):
+        """Insert vectors, replacing any existing entries with the same IDs."""
+        with self._lock:
+            self.delete(ids=[doc_id for doc_id in ids if doc_id in self._positions])
+            self.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Dict[str, Any]]) -> List[int]:
+        """Return row positions matching an ID list and metadata filter."""
+        if ids is not None:
+            positions = [self._positions[doc_id] for doc_id in ids if doc_id in self._positions]
+        else:
+            positions = range(len(self._ids))
+        return [i for i in positions if matches_where(self._metadatas[i], where)]
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        """Fetch stored entries by ID and/or metadata filter."""
+        with self._lock:
+            positions = self._select(ids, where)
+            start = offset or 0
+            positions = positions[start:start + limit if limit is not None else None]
+            return self._records(positions, include)
+
+    def _records(self, positions: Sequence[int], include: Sequence[str]) -> Dict[str, Any]:
+        result = {"ids": [self._ids[i] for i in positions]}
+        if "documents" in include:
+            result["documents"] = [self._documents[i] for i in positions]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[i] for i in positions]
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.asarray(self._vectors[list(positions)], dtype=np.float32)
+                if len(positions) else np.zeros((0, self._dim or 0), dtype=np.float32)
+            )
+        return result
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, List]:
+        """Return exact nearest neighbours by squared L2 distance for each query."""
+        with self._lock:
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            keys = ["ids"] + [key for key in ("documents", "metadatas", "distances", "embeddings") if key in include]
+            results: Dict[str, List] = {key: [] for key in keys}
+
+            candidates = np.arange(len(self._ids)) if where is None else np.asarray(
+                self._select(None, where), dtype=np.int64
+            )
+            if not len(candidates):
+                for key in keys:
+                    results[key] = [[] for _ in range(len(queries))]
+                return results
+
+            k = min(n_results, len(candidates))
+            distances = self._distances(queries, candidates)
+
+            for query_distances in distances:
+                top = np.argpartition(query_distances, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+                top = top[np.argsort(query_distances[top], kind="stable")]
+                positions = candidates[top].tolist()
+                records = self._records(positions, include)
+                for key in keys:
+                    if key == "distances":
+                        results[key].append(query_distances[top].tolist())
+                    else:
+                        results[key].append(records[key])
+            return results
+
+    def _distances(self, queries: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """Compute squared L2 distances between queries and candidate rows."""
+        full_scan = len(candidates) == len(self._ids)
+        query_sq_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        distances = np.empty((len(queries), len(candidates)), dtype=np.float32)
+
+        for start in range(0, len(candidates), _SEARCH_BLOCK_ROWS):
+            if full_scan:
+                rows = slice(start, start + _SEARCH_BLOCK_ROWS)
+                block = np.asarray(self._vectors[rows], dtype=np.float32)
+                sq_norms = self._sq_norms[rows]
+            else:
+                rows = candidates[start:start + _SEARCH_BLOCK_ROWS]
+                block = np.asarray(self._vectors[rows], dtype=np.float32)
+                sq_norms = self._sq_norms[rows]
+            distances[:, start:start + len(block)] = sq_norms[None, :] - 2.0 * (queries @ block.T) + query_sq_norms
+
+        return np.maximum(distances, 0.0)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """Delete entries by ID and/or metadata filter, compacting the vector file."""
+        with self._lock:
+            if ids is None and where is None:
+                return
+            doomed = set(self._select(ids, where))
+            if not doomed:
+                return
+
+            keep = [i for i in range(len(self._ids)) if i not in doomed]
+            kept_vectors = np.asarray(self._vectors[keep], dtype=self.dtype) if keep else None
+
+            self._ids = [self._ids[i] for i in keep]
+            self._documents = [self._documents[i] for i in keep]
+            self._metadatas = [self._metadatas[i] for i in keep]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+
+            if self.directory:
+                # Release the current map before replacing the file underneath it
+                self._vectors = None
+                tmp_path = f"{self._vectors_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    if kept_vectors is not None:
+                        f.write(kept_vectors.tobytes())
+                os.replace(tmp_path, self._vectors_path)
+                self._write_sidecar()
+                self._map_vectors()
+            else:
+                self._vectors = kept_vectors
+                self._sq_norms = self._sq_norms[keep] if keep else np.zeros(0, dtype=np.float32)
+
+
+class FlatIndexClient:
+    """Client managing flat index collections in a directory or in memory."""
+
+    def __init__(self, path: Optional[str] = None, dtype: str = "float32"):
+        """Initialize the client.
+
+        Args:
+            path: Database directory, None keeps all collections in memory.
+            dtype: Storage dtype for vectors of new collections.
+        """
+        self.root = os.path.join(path, "flat_index") if path else None
+        self.dtype = dtype
+        self._collections: Dict[str, FlatIndexCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection_dir(self, name: str) -> Optional[str]:
+        return os.path.join(self.root, name) if self.root else None
+
+    def get_or_create_collection(self, name: str, **kwargs) -> FlatIndexCollection:
+        """Get a collection, creating it if it does not exist."""
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = FlatIndexCollection(
+                    name, self._collection_dir(name), self.dtype
+                )
+            return self._collections[name]
+
+    def get_collection(self, name: str, **kwargs) -> FlatIndexCollection:
+        """Get an existing collection."""
+        if name not in [collection.name for collection in self.list_collections()]:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.get_or_create_collection(name)
+
+    def list_collections(self) -> List[FlatIndexCollection]:
+        """List all collections."""
+        names = set(self._collections)
+        if self.root and os.path.isdir(self.root):
+            names.update(
+                entry for entry in os.listdir(self.root)
+                if os.path.exists(os.path.join(self.root, entry, "records.json"))
+            )
+        return [self.get_or_create_collection(name) for name in sorted(names)]
+
+    def delete_collection(self, name: str):
+        """Delete a collection and its files."""
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            directory = self._collection_dir(name)
+            if collection is None and not (directory and os.path.isdir(directory)):
+                raise ValueError(f"Collection {name} does not exist.")
+            if directory and os.path.isdir(directory):
+                shutil.rmtree(directory)
+
+    def get_max_batch_size(self) -> int:
+        """Return the largest batch accepted by add, which is unbounded here."""
+        return 1 << 20
@@ -0,0 +1,175 @@
+"""
+Incremental ingestion manifest for Betty AI Assistant.
+
+This module tracks which files have been indexed into a collection, together
+with their size, modification time, content hash and the chunking/embedding
+configuration used, so that re-ingestion only processes files that changed.
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+
+MANIFEST_VERSION = 1
+
+
+def normalize_source_path(file_path: str) -> str:
+    """Normalize a file path for use as a manifest key and chunk metadata."""
+    return os.path.normpath(file_path).replace(os.sep, "/")
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 digest of a file without reading it all into memory."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Persistent record of the files indexed into a single collection."""
+
+    def __init__(self, manifest_path: Optional[str] = None):
+        """Initialize the manifest.
+
+        Args:
+            manifest_path: JSON file used for persistence, None keeps it in memory only.
+        """
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        """Load manifest entries from disk if a manifest file exists."""
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            # A corrupt manifest only costs a full re-ingest
+            self.entries = {}
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        if not self.manifest_path:
+            return
+
+        Path(self.manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                    "files": self.entries
+                },
+                f,
+                indent=2,
+                sort_keys=True
+            )
+        os.replace(tmp_path, self.manifest_path)
+
+    def clear(self):
+        """Forget all indexed files."""
+        self.entries = {}
+
+    def diff(self, file_paths: List[str], ingest_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Compare files on disk against the manifest.
+
+        Files whose size and modification time are unchanged are not re-hashed.
+        A changed chunker or embedding configuration marks every file as modified.
+
+        Args:
+            file_paths: Files that should be present in the collection.
+            ingest_config: Chunker settings and embedding model used for ingestion.
+
+        Returns:
+            Dictionary with 'added', 'modified', 'removed' and 'unchanged' path
+            lists, plus 'fingerprints' mapping each current path to its new entry.
+        """
+        changes = {
+            "added": [],
+            "modified": [],
+            "removed": [],
+            "unchanged": [],
+            "fingerprints": {}
+        }
+        seen = set()
+
+        for file_path in file_paths:
+            source_path = normalize_source_path(file_path)
+            if source_path in seen:
+                continue
+            seen.add(source_path)
+
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+
+            previous = self.entries.get(source_path)
+            fingerprint = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "config": ingest_config
+            }
+
+            if previous is None:
+                fingerprint["sha256"] = file_sha256(file_path)
+                changes["added"].append(file_path)
+            elif (previous.get("size") == stat.st_size
+                  and previous.get("mtime_ns") == stat.st_mtime_ns
+                  and previous.get("config") == ingest_config):
+                fingerprint["sha256"] = previous.get("sha256")
+                changes["unchanged"].append(file_path)
+            else:
+                fingerprint["sha256"] = file_sha256(file_path)
+                if (fingerprint["sha256"] == previous.get("sha256")
+                        and previous.get("config") == ingest_config):
+                    # Touched but identical content, only the timestamp needs updating
+                    changes["unchanged"].append(file_path)
+                else:
+                    changes["modified"].append(file_path)
+
+            changes["fingerprints"][source_path] = fingerprint
+
+        changes["removed"] = sorted(
+            path for path in self.entries if path not in seen
+        )
+        return changes
+
+    def record(self, file_path: str, fingerprint: Dict[str, Any], chunk_count: int):
+        """Record a successfully indexed file."""
+        entry = dict(fingerprint)
+        entry["chunks"] = chunk_count
+        entry["indexed_at"] = datetime.now(timezone.utc).isoformat()
+        self.entries[normalize_source_path(file_path)] = entry
+
+    def touch(self, file_path: str, fingerprint: Dict[str, Any]):
+        """Refresh size and timestamp for a file whose content did not change."""
+        source_path = normalize_source_path(file_path)
+        if source_path in self.entries:
+            self.entries[source_path].update(
+                size=fingerprint["size"], mtime_ns=fingerprint["mtime_ns"]
+            )
+
+    def remove(self, file_path: str):
+        """Forget a file that is no longer indexed."""
+        self.entries.pop(normalize_source_path(file_path), None)
+
+
+def summarize_changes(changes: Dict[str, Any]) -> str:
+    """Format a manifest diff as a short human-readable summary."""
+    return (
+        f"{len(changes['added'])} new, {len(changes['modified'])} modified, "
+        f"{len(changes['removed'])} removed, {len(changes['unchanged'])} unchanged"
+    )
@@ -0,0 +1,91 @@
+"""
+Record-aware JSON extraction for Betty AI Assistant.
+
+JSON exports such as GPS_Outcomes_Master.json hold a list of records. Each
+record becomes one compact chunk of "Label: value" lines, so a search for an
+outcome returns that outcome alone rather than a slice of its neighbours,
+and identifying fields are copied into the chunk metadata for filtering.
+
+JSON that holds no list of records is flattened into "path: value" lines
+and chunked like any other text.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Record fields stored as chunk metadata, keyed by field name
+RECORD_METADATA_FIELDS: Dict[str, str] = {
+    "outcome_id": "outcome_id",
+    "cluster": "cluster",
+    "tier_level": "tier",
+    "tier": "tier",
+}
+
+
+def find_records(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """Return the list of records in parsed JSON, or None if there is none.
+
+    A top-level list of objects is used as is. In a top-level object, the
+    longest value that is a list of objects is taken, e.g. "outcomes".
+    """
+    def is_records(value: Any) -> bool:
+        return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+    if is_records(data):
+        return data
+    if isinstance(data, dict):
+        candidates = [value for value in data.values() if is_records(value)]
+        if candidates:
+            return max(candidates, key=len)
+    return None
+
+
+def _format_value(value: Any) -> str:
+    """Render a field value compactly, lists as comma-separated items."""
+    if isinstance(value, list):
+        return ", ".join(_format_value(item) for item in value if item not in (None, "", [], {}))
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, separators=(", ", ": "))
+    return str(value)
+
+
+def format_record(record: Dict[str, Any]) -> str:
+    """Render a record as "Label: value" lines, skipping empty fields."""
+    lines = []
+    for key, value in record.items():
+        text = _format_value(value) if value is not None else ""
+        if text.strip():
+            lines.append(f"{str(key).replace('_', ' ').capitalize()}: {text}")
+    return "\n".join(lines)
+
+
+def record_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the record's identifying scalar fields into chunk metadata."""
+    metadata = {}
+    for field, name in RECORD_METADATA_FIELDS.items():
+        value = record.get(field)
+        # ChromaDB metadata only holds scalars
+        if isinstance(value, (str, int, float, bool)) and name not in metadata:
+            metadata[name] = value
+    return metadata
+
+
+def iter_json_records(data: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (text, metadata) for each non-empty record in parsed JSON."""
+    for record in find_records(data) or []:
+        text = format_record(record)
+        if text:
+            yield text, record_metadata(record)
+
+
+def flatten_json(data: Any, prefix: str = "") -> Iterator[str]:
+    """Yield "path: value" lines for every scalar in parsed JSON."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten_json(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from flatten_json(value, f"{prefix}[{index}]")
+    elif data is not None and str(data).strip():
+        yield f"{prefix}: {data}" if prefix else str(data)
@@ -0,0 +1,230 @@
+"""
+Knowledge base snapshots for Betty AI Assistant.
+
+A snapshot packages a fully built collection into a single zip artifact so
+that deployments without persistent storage can load precomputed embeddings
+instead of re-embedding the docs/ tree on every cold start. The archive holds:
+
+- manifest.json: format version, collection, embedding model, dimension,
+  chunk count, SHA-256 checksums of the other members and the ingestion
+  manifest of the indexed files
+- embeddings.npy: float32 matrix with one row per chunk (stored uncompressed)
+- records.jsonl: one {"id", "document", "metadata"} object per line, in the
+  same order as the embedding rows
+- optional attachments, such as the embedding projection of the collection
+"""
+
+import io
+import os
+import json
+import hashlib
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+SNAPSHOT_VERSION = 1
+MANIFEST_MEMBER = "manifest.json"
+EMBEDDINGS_MEMBER = "embeddings.npy"
+RECORDS_MEMBER = "records.jsonl"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or incompatible."""
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _member_sha256(archive: zipfile.ZipFile, member: str) -> str:
+    digest = hashlib.sha256()
+    with archive.open(member) as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(
+    snapshot_path: str,
+    pages: Iterable[Dict[str, Any]],
+    count: int,
+    info: Dict[str, Any],
+    attachments: Optional[Dict[str, bytes]] = None
+) -> Dict[str, Any]:
+    """Write collection pages to a snapshot archive.
+
+    Args:
+        snapshot_path: Destination zip file, replaced atomically.
+        pages: Pages with ids, documents, metadatas and embeddings, as returned
+            by a paged collection.get.
+        count: Number of chunks in the collection.
+        info: Extra manifest fields, such as collection and embedding_model.
+        attachments: Extra archive members by name, checksummed like the others.
+
+    Returns:
+        The manifest written to the archive.
+    """
+    Path(snapshot_path).parent.mkdir(parents=True, exist_ok=True)
+    attachments = attachments or {}
+    reserved = {MANIFEST_MEMBER, EMBEDDINGS_MEMBER, RECORDS_MEMBER}.intersection(attachments)
+    if reserved:
+        raise SnapshotError(f"Attachment names clash with snapshot members: {sorted(reserved)}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        embeddings_path = os.path.join(work_dir, EMBEDDINGS_MEMBER)
+        records_path = os.path.join(work_dir, RECORDS_MEMBER)
+        embeddings = None
+        written = 0
+
+        # Rows are streamed into a memory-mapped .npy so large collections are not held in memory
+        with open(records_path, "w", encoding="utf-8") as records:
+            for page in pages:
+                vectors = np.asarray(page["embeddings"], dtype=np.float32)
+                if embeddings is None:
+                    embeddings = np.lib.format.open_memmap(
+                        embeddings_path, mode="w+", dtype=np.float32, shape=(count, vectors.shape[1])
+                    )
+                if written + len(vectors) > count:
+                    raise SnapshotError("Collection changed while the snapshot was being written")
+                embeddings[written:written + len(vectors)] = vectors
+                written += len(vectors)
+
+                for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    records.write(json.dumps(
+                        {"id": chunk_id, "document": document, "metadata": metadata},
+                        ensure_ascii=False
+                    ) + "\n")
+
+        if embeddings is None or written != count:
+            raise SnapshotError(f"Expected {count} chunks but read {written}")
+        dim = embeddings.shape[1]
+        embeddings.flush()
+        del embeddings
+
+        manifest = dict(info)
+        manifest.update({
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "count": count,
+            "dim": dim,
+            "checksums": {
+                EMBEDDINGS_MEMBER: _file_sha256(embeddings_path),
+                RECORDS_MEMBER: _file_sha256(records_path),
+                **{name: hashlib.sha256(data).hexdigest() for name, data in attachments.items()}
+            },
+            "attachments": sorted(attachments)
+        })
+
+        tmp_path = f"{snapshot_path}.tmp"
+        with zipfile.ZipFile(tmp_path, "w") as archive:
+            archive.writestr(MANIFEST_MEMBER, json.dumps(manifest, indent=2, sort_keys=True))
+            # Embeddings compress poorly, storing them keeps loading fast
+            archive.write(embeddings_path, EMBEDDINGS_MEMBER, compress_type=zipfile.ZIP_STORED)
+            archive.write(records_path, RECORDS_MEMBER, compress_type=zipfile.ZIP_DEFLATED)
+            for name, data in attachments.items():
+                archive.writestr(name, data, compress_type=zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, snapshot_path)
+
+    return manifest
+
+
+def read_snapshot_manifest(snapshot_path: str) -> Dict[str, Any]:
+    """Read and validate the manifest of a snapshot archive."""
+    if not os.path.exists(snapshot_path):
+        raise SnapshotError(f"Snapshot not found: {snapshot_path}")
+
+    try:
+        with zipfile.ZipFile(snapshot_path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_MEMBER))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise SnapshotError(f"Invalid snapshot {snapshot_path}: {e}")
+
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot version {manifest.get('version')}, expected {SNAPSHOT_VERSION}"
+        )
+    return manifest
+
+
+def read_snapshot_attachment(snapshot_path: str, name: str) -> Optional[bytes]:
+    """Read an attachment from a snapshot archive.
+
+    Args:
+        snapshot_path: Snapshot zip file.
+        name: Attachment name given to write_snapshot.
+
+    Returns:
+        The attachment contents, or None if the snapshot has no such attachment.
+    """
+    manifest = read_snapshot_manifest(snapshot_path)
+    if name not in manifest.get("attachments", []):
+        return None
+
+    with zipfile.ZipFile(snapshot_path) as archive:
+        data = archive.read(name)
+    if hashlib.sha256(data).hexdigest() != manifest["checksums"].get(name):
+        raise SnapshotError(f"Checksum mismatch for {name} in {snapshot_path}")
+    return data
+
+
+def read_snapshot(
+    snapshot_path: str,
+    batch_size: int = 256,
+    verify: bool = True
+) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Open a snapshot archive for loading.
+
+    Args:
+        snapshot_path: Snapshot zip file.
+        batch_size: Number of chunks per yielded page.
+        verify: Whether to check member checksums before loading.
+
+    Returns:
+        The manifest and an iterator of pages with ids, documents, metadatas
+        and embeddings.
+    """
+    manifest = read_snapshot_manifest(snapshot_path)
+
+    if verify:
+        with zipfile.ZipFile(snapshot_path) as archive:
+            for member, expected in manifest.get("checksums", {}).items():
+                if _member_sha256(archive, member) != expected:
+                    raise SnapshotError(f"Checksum mismatch for {member} in {snapshot_path}")
+
+    def iter_pages() -> Iterator[Dict[str, Any]]:
+        with zipfile.ZipFile(snapshot_path) as archive:
+            embeddings = np.load(io.BytesIO(archive.read(EMBEDDINGS_MEMBER)))
+            if embeddings.shape != (manifest["count"], manifest["dim"]):
+                raise SnapshotError(f"Unexpected embedding matrix shape {embeddings.shape}")
+
+            page = {"ids": [], "documents": [], "metadatas": []}
+            start = 0
+            with archive.open(RECORDS_MEMBER) as records:
+                for line in io.TextIOWrapper(records, encoding="utf-8"):
+                    record = json.loads(line)
+                    page["ids"].append(record["id"])
+                    page["documents"].append(record["document"])
+                    page["metadatas"].append(record["metadata"])
+                    if len(page["ids"]) >= batch_size:
+                        end = start + len(page["ids"])
+                        yield dict(page, embeddings=embeddings[start:end])
+                        start = end
+                        page = {"ids": [], "documents": [], "metadatas": []}
+            if page["ids"]:
+                end = start + len(page["ids"])
+                yield dict(page, embeddings=embeddings[start:end])
+                start = end
+
+            if start != manifest["count"]:
+                raise SnapshotError(f"Expected {manifest['count']} records but read {start}")
+
+    return manifest, iter_pages()
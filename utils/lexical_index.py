@@ -0,0 +1,162 @@
+"""
+Lexical BM25 index for Betty AI Assistant.
+
+This module keeps an inverted index over the chunks of a collection so that
+exact tokens such as outcome IDs (ACQ-001), capability names and project
+titles can be matched alongside dense vector search.
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Words joined by hyphens, underscores or dots (e.g. "acq-001") stay one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens.
+
+    Compound tokens such as "acq-001" are kept whole and also emitted as
+    their parts, so both "ACQ-001" and "ACQ" match.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(re.split(r"[-_.]", token))
+    return tokens
+
+
+class BM25Index:
+    """In-memory BM25 inverted index with JSON persistence."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation parameter.
+            b: Document length normalization parameter.
+        """
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, Dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_documents(self, ids: Iterable[str], texts: Iterable[str]):
+        """Index documents, replacing any existing entries with the same IDs."""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                self._remove(doc_id)
+                term_freqs = Counter(tokenize(text))
+                length = sum(term_freqs.values())
+                self._documents[doc_id] = {"length": length, "terms": dict(term_freqs)}
+                self._total_length += length
+                for term, freq in term_freqs.items():
+                    self._postings.setdefault(term, {})[doc_id] = freq
+
+    def remove_documents(self, ids: Iterable[str]):
+        """Remove documents from the index."""
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        self._total_length -= document["length"]
+        for term in document["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def clear(self):
+        """Remove all documents."""
+        with self._lock:
+            self._documents = {}
+            self._postings = {}
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """Score documents against a query with BM25.
+
+        Args:
+            query: Search query string.
+            n_results: Maximum number of results to return.
+
+        Returns:
+            List of (document ID, score) pairs, best first.
+        """
+        with self._lock:
+            doc_count = len(self._documents)
+            if not doc_count:
+                return []
+
+            avg_length = self._total_length / doc_count or 1.0
+            scores: Dict[str, float] = {}
+
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, freq in postings.items():
+                    length = self._documents[doc_id]["length"]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:n_results]
+
+    def save(self, path: str):
+        """Atomically write the index to a JSON file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "documents": self._documents
+            }
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Load an index written by save, or return None if unavailable."""
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != INDEX_VERSION:
+            return None
+
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        for doc_id, document in data.get("documents", {}).items():
+            index._documents[doc_id] = document
+            index._total_length += document["length"]
+            for term, freq in document["terms"].items():
+                index._postings.setdefault(term, {})[doc_id] = freq
+        return index
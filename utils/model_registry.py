@@ -0,0 +1,263 @@
+"""
+Shared model registry for Betty AI Assistant.
+
+Embedding and reranker models are loaded at most once per process and shared
+by every VectorStore and by the evaluation tools. The registry records how
+much memory each model occupies and can unload models that have not been
+used for a while, so that more Streamlit workers fit on a host.
+"""
+
+import gc
+import logging
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import AppConfig
+
+
+logger = logging.getLogger(__name__)
+
+def _process_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, or None if unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Return the size of a PyTorch model's parameters and buffers in bytes."""
+    # CrossEncoder wraps the underlying transformer in .model
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return None
+
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models keyed by kind and name."""
+
+    def __init__(self, idle_unload_seconds: int = 0):
+        """Initialize the registry.
+
+        Args:
+            idle_unload_seconds: Unload models unused for this many seconds,
+                0 keeps models loaded for the life of the process.
+        """
+        self.idle_unload_seconds = idle_unload_seconds
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        # Warmup failures by model name, for the app to show from the main thread
+        self.warmup_errors: Dict[str, Exception] = {}
+
+    def get(self, kind: str, name: str, loader: Callable[[], Any]) -> Any:
+        """Return a loaded model, calling loader the first time it is requested.
+
+        Concurrent requests for the same model wait for a single load.
+
+        Args:
+            kind: Model category, e.g. "embedding" or "reranker".
+            name: Model name.
+            loader: Function that loads and returns the model.
+
+        Returns:
+            The shared model instance.
+        """
+        key = (kind, name)
+        self.unload_idle(exclude=key)
+
+        model = self._touch(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            model = self._touch(key)
+            if model is not None:
+                return model
+
+            rss_before = _process_rss_bytes()
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+            rss_after = _process_rss_bytes()
+
+            with self._lock:
+                self._entries[key] = {
+                    "model": model,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "load_seconds": load_seconds,
+                    "parameter_bytes": _parameter_bytes(model),
+                    "rss_delta_bytes": (
+                        rss_after - rss_before
+                        if rss_before is not None and rss_after is not None else None
+                    )
+                }
+                self.warmup_errors.pop(name, None)
+            return model
+
+    def _touch(self, key: Tuple[str, str]) -> Any:
+        """Return a loaded model and mark it as used, or None if not loaded."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time.time()
+            return entry["model"]
+
+    def is_loaded(self, kind: str, name: str) -> bool:
+        """Check whether a model is currently loaded."""
+        with self._lock:
+            return (kind, name) in self._entries
+
+    def get_embedding_model(self, name: str):
+        """Return the shared embedding model, a SentenceTransformer or its ONNX equivalent."""
+        def load():
+            if AppConfig.INFERENCE_BACKEND == "onnx":
+                model = self._load_onnx("embedding", name)
+                if model is not None:
+                    return model
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(name)
+        return self.get("embedding", name, load)
+
+    def get_cross_encoder(self, name: str):
+        """Return the shared reranker, a CrossEncoder or its ONNX equivalent."""
+        def load():
+            if AppConfig.INFERENCE_BACKEND == "onnx":
+                model = self._load_onnx("reranker", name)
+                if model is not None:
+                    return model
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(name)
+        return self.get("reranker", name, load)
+
+    @staticmethod
+    def _load_onnx(kind: str, name: str) -> Optional[Any]:
+        """Load a quantized ONNX model, or return None to fall back to PyTorch."""
+        try:
+            from utils import onnx_backend
+            loader = (
+                onnx_backend.load_onnx_sentence_encoder if kind == "embedding"
+                else onnx_backend.load_onnx_cross_encoder
+            )
+            return loader(name, AppConfig.ONNX_CACHE_DIR, AppConfig.ONNX_PARITY_THRESHOLD)
+        except Exception as e:
+            logger.warning("ONNX backend unavailable for %s, using PyTorch: %s", name, e)
+            return None
+
+    def start_warmup(self, models: List[Tuple[str, str]]) -> threading.Thread:
+        """Load models in a background daemon thread.
+
+        Requests for a model that is still loading block until it is ready,
+        so callers never load a second copy. Failures are logged and kept in
+        warmup_errors until the model loads; the next request retries the
+        load and reports the error itself.
+
+        Args:
+            models: (kind, name) pairs, kind being "embedding" or "reranker".
+
+        Returns:
+            The warmup thread, or the one already running.
+        """
+        loaders = {"embedding": self.get_embedding_model, "reranker": self.get_cross_encoder}
+
+        def warm():
+            for kind, name in models:
+                try:
+                    loaders[kind](name)
+                except Exception as e:
+                    logger.warning("Model warmup failed for %s: %s", name, e)
+                    with self._lock:
+                        self.warmup_errors[name] = e
+
+        with self._lock:
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(target=warm, name="model-warmup", daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def unload(self, kind: str, name: str) -> bool:
+        """Drop a model from the registry so its memory can be reclaimed.
+
+        Returns:
+            True if the model was loaded, False otherwise.
+        """
+        with self._lock:
+            entry = self._entries.pop((kind, name), None)
+        if entry is None:
+            return False
+        gc.collect()
+        return True
+
+    def unload_idle(
+        self,
+        max_idle_seconds: Optional[int] = None,
+        exclude: Optional[Tuple[str, str]] = None
+    ) -> List[str]:
+        """Unload models that have not been used recently.
+
+        Args:
+            max_idle_seconds: Idle threshold, defaults to idle_unload_seconds.
+            exclude: Model key to keep regardless of idle time.
+
+        Returns:
+            Names of the unloaded models.
+        """
+        max_idle_seconds = self.idle_unload_seconds if max_idle_seconds is None else max_idle_seconds
+        if not max_idle_seconds or max_idle_seconds <= 0:
+            return []
+
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            idle_keys = [
+                key for key, entry in self._entries.items()
+                if entry["last_used"] < cutoff and key != exclude
+            ]
+            for key in idle_keys:
+                del self._entries[key]
+
+        if idle_keys:
+            gc.collect()
+        return [name for _, name in idle_keys]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return load time, memory use and idle time for each loaded model."""
+        now = time.time()
+        to_mb = lambda size: round(size / (1024 * 1024), 1) if size is not None else None
+        with self._lock:
+            return [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "backend": getattr(entry["model"], "backend", "torch"),
+                    "load_seconds": round(entry["load_seconds"], 2),
+                    "parameter_mb": to_mb(entry["parameter_bytes"]),
+                    "rss_delta_mb": to_mb(entry["rss_delta_bytes"]),
+                    "idle_seconds": round(now - entry["last_used"], 1)
+                }
+                for (kind, name), entry in self._entries.items()
+            ]
+
+
+# Global registry shared by all vector stores in this process
+model_registry = ModelRegistry(idle_unload_seconds=AppConfig.MODEL_IDLE_UNLOAD_SECONDS)
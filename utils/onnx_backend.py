@@ -0,0 +1,370 @@
+"""
+Quantized ONNX inference backend for Betty AI Assistant.
+
+Exports the configured SentenceTransformer embedding model and CrossEncoder
+reranker to ONNX, applies int8 dynamic quantization and serves them with
+onnxruntime on CPU. The wrappers expose the encode/predict methods used by
+VectorStore, so the rest of the code does not depend on the backend.
+
+Exported models are cached under ONNX_CACHE_DIR, one directory per model:
+
+- model.onnx / model_int8.onnx: full precision export and quantized model
+- tokenizer files saved from the source model
+- onnx_config.json: pooling, normalization and activation settings plus the
+  parity check results against the PyTorch outputs
+
+Serving needs onnxruntime and transformers; exporting additionally needs
+torch, sentence-transformers and onnx. Enable with INFERENCE_BACKEND=onnx.
+"""
+
+import os
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+CONFIG_FILE = "onnx_config.json"
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+EXPORT_VERSION = 1
+
+# Sample inputs compared between PyTorch and ONNX outputs after export
+PARITY_SENTENCES = [
+    "What are the pain points in change control management?",
+    "Our BOM data is duplicated across PLM and ERP systems.",
+    "ACQ-001: Customers recognize the Molex brand as a trusted partner.",
+    "Requirements are traced from capture to validation.",
+    "The dashboard KPI measures engineering change cycle time.",
+    "Global product development teams collaborate on shared designs.",
+]
+
+
+class OnnxParityError(Exception):
+    """Raised when an exported model's outputs drift too far from PyTorch."""
+
+
+def model_cache_dir(model_name: str, cache_dir: str) -> str:
+    """Return the cache directory for an exported model."""
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+
+def pool_embeddings(hidden_states: np.ndarray, attention_mask: np.ndarray, pooling: str) -> np.ndarray:
+    """Pool token embeddings into sentence embeddings like SentenceTransformer.
+
+    Args:
+        hidden_states: Token embeddings of shape (batch, sequence, dim).
+        attention_mask: Mask of shape (batch, sequence), 1 for real tokens.
+        pooling: "mean", "cls" or "max".
+
+    Returns:
+        Float32 array of shape (batch, dim).
+    """
+    if pooling == "cls":
+        return hidden_states[:, 0].astype(np.float32)
+
+    mask = attention_mask[..., None].astype(np.float32)
+    if pooling == "max":
+        masked = np.where(mask > 0, hidden_states, -1e9)
+        return masked.max(axis=1).astype(np.float32)
+
+    summed = (hidden_states * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return (summed / counts).astype(np.float32)
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def embedding_parity(reference: Any, candidate: Any, sentences: Sequence[str] = PARITY_SENTENCES) -> Dict[str, float]:
+    """Compare sentence embeddings from two encoders.
+
+    Returns:
+        Dictionary with the minimum and mean cosine similarity per sentence.
+    """
+    expected = _l2_normalize(np.asarray(reference.encode(list(sentences)), dtype=np.float32))
+    actual = _l2_normalize(np.asarray(candidate.encode(list(sentences)), dtype=np.float32))
+    cosines = (expected * actual).sum(axis=1)
+    return {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean())}
+
+
+def reranker_parity(reference: Any, candidate: Any, sentences: Sequence[str] = PARITY_SENTENCES) -> Dict[str, float]:
+    """Compare cross-encoder scores from two rerankers on every sentence pair.
+
+    Returns:
+        Dictionary with the Pearson correlation and maximum absolute
+        difference of the scores.
+    """
+    pairs = [(query, passage) for query in sentences[:2] for passage in sentences]
+    expected = np.asarray(reference.predict(pairs), dtype=np.float64).ravel()
+    actual = np.asarray(candidate.predict(pairs), dtype=np.float64).ravel()
+    correlation = float(np.corrcoef(expected, actual)[0, 1]) if expected.std() and actual.std() else 1.0
+    return {"correlation": correlation, "max_abs_diff": float(np.abs(expected - actual).max())}
+
+
+def _create_session(model_path: str):
+    """Create a CPU onnxruntime session with full graph optimizations."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+
+class _OnnxModel:
+    """Tokenizer and quantized session loaded from an export directory."""
+
+    # Distinguishes quantized outputs from PyTorch ones in embedding caches
+    backend = "onnx-int8"
+
+    def __init__(self, model_dir: str):
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = _create_session(os.path.join(model_dir, INT8_MODEL_FILE))
+        self.input_names = self.config["input_names"]
+
+    def _run(self, *texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Tokenize a batch and return the first model output and attention mask."""
+        encoded = self.tokenizer(
+            *texts,
+            padding=True,
+            truncation=True,
+            max_length=self.config["max_length"],
+            return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feeds)[0], encoded["attention_mask"]
+
+
+class OnnxSentenceEncoder(_OnnxModel):
+    """Drop-in replacement for SentenceTransformer.encode backed by onnxruntime."""
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Encode sentences into float32 embeddings."""
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(sentences), self.config["dim"]), dtype=np.float32)
+
+        # Batching similar lengths together keeps padding small
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            batch = order[start:start + batch_size]
+            hidden_states, attention_mask = self._run([sentences[i] for i in batch])
+            embeddings[batch] = pool_embeddings(hidden_states, attention_mask, self.config["pooling"])
+
+        if self.config["normalize"] or normalize_embeddings:
+            embeddings = _l2_normalize(embeddings)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dim"]
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """Drop-in replacement for CrossEncoder.predict backed by onnxruntime."""
+
+    def predict(
+        self,
+        sentences: Sequence[Tuple[str, str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Score (query, passage) pairs."""
+        scores = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            logits, _ = self._run([pair[0] for pair in batch], [pair[1] for pair in batch])
+            scores.append(logits.astype(np.float32))
+
+        scores = np.concatenate(scores) if scores else np.zeros((0, 1), dtype=np.float32)
+        if self.config["sigmoid"]:
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+
+def _export_to_onnx(module: Any, tokenizer: Any, model_dir: str, output_name: str, pair_input: bool) -> List[str]:
+    """Export a Hugging Face module to ONNX and quantize it to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    sample = (["query text"], ["passage text"]) if pair_input else (["sample text"],)
+    dummy = tokenizer(*sample, padding=True, truncation=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+
+    class OutputWrapper(torch.nn.Module):
+        """Return the first output tensor so the graph has a single named output."""
+
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, *inputs):
+            return self.wrapped(**dict(zip(input_names, inputs)))[0]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch"}
+    fp32_path = os.path.join(model_dir, FP32_MODEL_FILE)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            OutputWrapper(module.eval()),
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    quantize_dynamic(fp32_path, os.path.join(model_dir, INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(model_dir)
+    return input_names
+
+
+def _write_config(model_dir: str, config: Dict[str, Any]):
+    with open(os.path.join(model_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, sort_keys=True)
+
+
+def _has_valid_export(model_dir: str, model_name: str) -> bool:
+    """Check whether a cached export exists for this model and passed its parity check."""
+    config_path = os.path.join(model_dir, CONFIG_FILE)
+    if not os.path.exists(config_path) or not os.path.exists(os.path.join(model_dir, INT8_MODEL_FILE)):
+        return False
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (config.get("version") == EXPORT_VERSION
+            and config.get("source_model") == model_name
+            and config.get("parity", {}).get("passed", False))
+
+
+def export_sentence_encoder(model_name: str, cache_dir: str, parity_threshold: float = 0.99) -> str:
+    """Export and quantize a SentenceTransformer, then check it against PyTorch.
+
+    Args:
+        model_name: SentenceTransformer model name.
+        cache_dir: Root directory for exported models.
+        parity_threshold: Minimum cosine similarity to the PyTorch embeddings.
+
+    Returns:
+        Directory of the exported model.
+
+    Raises:
+        OnnxParityError: If the quantized embeddings drift below the threshold.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model_dir = model_cache_dir(model_name, cache_dir)
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+
+    reference = SentenceTransformer(model_name, device="cpu")
+    transformer = reference[0]
+    pooling_config = reference[1].get_config_dict() if len(reference) > 1 else {}
+    pooling = "mean"
+    if pooling_config.get("pooling_mode_cls_token"):
+        pooling = "cls"
+    elif pooling_config.get("pooling_mode_max_tokens"):
+        pooling = "max"
+
+    input_names = _export_to_onnx(
+        transformer.auto_model, transformer.tokenizer, model_dir, "token_embeddings", pair_input=False
+    )
+    config = {
+        "version": EXPORT_VERSION,
+        "kind": "embedding",
+        "source_model": model_name,
+        "input_names": input_names,
+        "max_length": reference.max_seq_length,
+        "dim": reference.get_sentence_embedding_dimension(),
+        "pooling": pooling,
+        "normalize": any(type(module).__name__ == "Normalize" for module in reference),
+        "parity": {"passed": False}
+    }
+    _write_config(model_dir, config)
+
+    parity = embedding_parity(reference, OnnxSentenceEncoder(model_dir))
+    config["parity"] = dict(parity, threshold=parity_threshold, passed=parity["min_cosine"] >= parity_threshold)
+    _write_config(model_dir, config)
+    if not config["parity"]["passed"]:
+        raise OnnxParityError(
+            f"Quantized {model_name} reached cosine {parity['min_cosine']:.4f}, below {parity_threshold}"
+        )
+    return model_dir
+
+
+def export_cross_encoder(model_name: str, cache_dir: str, parity_threshold: float = 0.99) -> str:
+    """Export and quantize a CrossEncoder, then check it against PyTorch.
+
+    Args:
+        model_name: CrossEncoder model name.
+        cache_dir: Root directory for exported models.
+        parity_threshold: Minimum correlation with the PyTorch scores.
+
+    Returns:
+        Directory of the exported model.
+
+    Raises:
+        OnnxParityError: If the quantized scores drift below the threshold.
+    """
+    from sentence_transformers import CrossEncoder
+
+    model_dir = model_cache_dir(model_name, cache_dir)
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+
+    reference = CrossEncoder(model_name, device="cpu")
+    # The attribute holding the score activation was renamed across sentence-transformers releases
+    activation = getattr(reference, "activation_fn", None) or getattr(reference, "default_activation_function", None)
+
+    input_names = _export_to_onnx(reference.model, reference.tokenizer, model_dir, "logits", pair_input=True)
+    config = {
+        "version": EXPORT_VERSION,
+        "kind": "reranker",
+        "source_model": model_name,
+        "input_names": input_names,
+        "max_length": getattr(reference, "max_length", None) or 512,
+        "sigmoid": type(activation).__name__ == "Sigmoid",
+        "parity": {"passed": False}
+    }
+    _write_config(model_dir, config)
+
+    parity = reranker_parity(reference, OnnxCrossEncoder(model_dir))
+    config["parity"] = dict(parity, threshold=parity_threshold, passed=parity["correlation"] >= parity_threshold)
+    _write_config(model_dir, config)
+    if not config["parity"]["passed"]:
+        raise OnnxParityError(
+            f"Quantized {model_name} reached score correlation {parity['correlation']:.4f}, below {parity_threshold}"
+        )
+    return model_dir
+
+
+def load_onnx_sentence_encoder(model_name: str, cache_dir: str, parity_threshold: float = 0.99) -> OnnxSentenceEncoder:
+    """Load a quantized embedding model, exporting it on first use."""
+    model_dir = model_cache_dir(model_name, cache_dir)
+    if not _has_valid_export(model_dir, model_name):
+        export_sentence_encoder(model_name, cache_dir, parity_threshold)
+    return OnnxSentenceEncoder(model_dir)
+
+
+def load_onnx_cross_encoder(model_name: str, cache_dir: str, parity_threshold: float = 0.99) -> OnnxCrossEncoder:
+    """Load a quantized reranker, exporting it on first use."""
+    model_dir = model_cache_dir(model_name, cache_dir)
+    if not _has_valid_export(model_dir, model_name):
+        export_cross_encoder(model_name, cache_dir, parity_threshold)
+    return OnnxCrossEncoder(model_dir)
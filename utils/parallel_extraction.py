@@ -0,0 +1,218 @@
+"""
+Parallel document extraction for Betty AI Assistant.
+
+This module fans CPU-bound text extraction and chunking out to a pool of
+worker processes. Workers never call Streamlit; problems are returned with
+each result so the caller can report them from the main process.
+"""
+
+import io
+import os
+import multiprocessing
+import queue
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Any
+
+from utils.document_processor import DocumentProcessor
+
+
+# Quiet processor used for extraction, created once per process
+_worker_processor: Optional[DocumentProcessor] = None
+
+# Queue on which pool workers announce when they start a file
+_started_queue = None
+
+# Seconds between checks for a start announcement while a file is queued
+_START_POLL_SECONDS = 0.5
+
+
+def _get_worker_processor() -> DocumentProcessor:
+    """Return this process's quiet document processor."""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor(report_to_streamlit=False)
+    return _worker_processor
+
+
+def extract_file_chunks(file_path: str) -> Dict[str, Any]:
+    """Extract, clean and chunk a single file without touching Streamlit.
+
+    Args:
+        file_path: Path of the file to process.
+
+    Returns:
+        Dictionary with filename, source_path, chunks, chunk_metadatas (extra
+        metadata per chunk, empty unless the file holds records), an error
+        message (or None), skipped (True when the error only means the file
+        type is not indexed) and a list of (level, message) warnings raised
+        during extraction.
+    """
+    processor = _get_worker_processor()
+    processor.messages = []
+    filename = os.path.basename(file_path)
+    result = {
+        "filename": filename,
+        "source_path": file_path,
+        "chunks": [],
+        "chunk_metadatas": [],
+        "error": None,
+        "skipped": False,
+        "warnings": processor.messages
+    }
+
+    try:
+        file_type = processor.get_file_type(filename)
+        if not file_type:
+            result["error"] = f"Unsupported file type: {filename}"
+            result["skipped"] = True
+            return result
+
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        # Record files (e.g. JSON outcome lists) get one chunk per record
+        records = processor.extract_records(io.BytesIO(data), file_type)
+        if records:
+            result["chunks"], result["chunk_metadatas"] = processor.chunk_records(records)
+        else:
+            blocks = processor.iter_text_blocks(io.BytesIO(data), file_type)
+            result["chunks"] = list(processor.iter_chunks(blocks))
+    except Exception as e:
+        result["error"] = f"Failed to process {filename}: {e}"
+
+    return result
+
+
+def _init_worker(started_queue):
+    """Pool initializer: keep the queue used to announce file start times."""
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _announce_and_extract(index: int, file_path: str) -> Dict[str, Any]:
+    """Worker entry point: announce when a file starts, then extract it."""
+    _started_queue.put((index, time.time()))
+    return extract_file_chunks(file_path)
+
+
+def _failed_result(file_path: str, error: str) -> Dict[str, Any]:
+    """Build the result returned for a file whose worker did not finish."""
+    return {
+        "filename": os.path.basename(file_path),
+        "source_path": file_path,
+        "chunks": [],
+        "chunk_metadatas": [],
+        "error": error,
+        "skipped": False,
+        "warnings": []
+    }
+
+
+def _terminate_workers(executor: ProcessPoolExecutor):
+    """Stop worker processes that are still busy, e.g. after a timeout."""
+    terminate = getattr(executor, "terminate_workers", None)
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        if process.is_alive():
+            process.terminate()
+
+
+def iter_extracted_files(
+    file_paths: List[str],
+    workers: int = None,
+    timeout: float = None,
+    max_in_flight: int = None
+) -> Iterator[Dict[str, Any]]:
+    """Extract files in parallel, yielding results in input order.
+
+    With one worker or fewer, files are processed sequentially in this
+    process. Otherwise at most max_in_flight files are submitted at a time,
+    so finished results waiting to be consumed stay bounded.
+
+    Args:
+        file_paths: Files to extract.
+        workers: Number of worker processes, 0 or 1 disables the pool.
+        timeout: Seconds a single file may run in a worker before it is
+            reported as failed; time spent queued for a worker does not count.
+        max_in_flight: Maximum number of files submitted but not yet yielded.
+
+    Yields:
+        Result dictionaries as returned by extract_file_chunks.
+    """
+    from config.settings import AppConfig
+
+    workers = AppConfig.EXTRACTION_WORKERS if workers is None else workers
+    timeout = timeout or AppConfig.EXTRACTION_TIMEOUT_SECONDS or None
+    max_in_flight = max(max_in_flight or workers * 2, 1)
+
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield extract_file_chunks(file_path)
+        return
+
+    # Spawned workers avoid forking a process that already holds model threads
+    context = multiprocessing.get_context("spawn")
+    started_queue = context.Queue()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(started_queue,)
+    )
+    pending = deque()
+    remaining = enumerate(file_paths)
+    # Wall-clock time each submitted file was picked up by a worker, by index
+    started: Dict[int, float] = {}
+    timed_out = False
+
+    def submit(index: int, file_path: str):
+        pending.append((index, file_path, executor.submit(_announce_and_extract, index, file_path)))
+
+    def wait_for_start(index: int, future):
+        # A file still queued behind others has not used any of its timeout
+        while index not in started and not future.done():
+            try:
+                started_index, started_at = started_queue.get(timeout=_START_POLL_SECONDS)
+                started[started_index] = started_at
+            except queue.Empty:
+                continue
+
+    try:
+        for index, file_path in islice(remaining, max_in_flight):
+            submit(index, file_path)
+
+        while pending:
+            index, file_path, future = pending.popleft()
+            try:
+                wait_seconds = None
+                if timeout:
+                    wait_for_start(index, future)
+                    if index in started:
+                        wait_seconds = max(0.0, started.pop(index) + timeout - time.time())
+                result = future.result(timeout=wait_seconds)
+            except FutureTimeoutError:
+                timed_out = True
+                future.cancel()
+                result = _failed_result(
+                    file_path,
+                    f"Timed out extracting {os.path.basename(file_path)} after {timeout:g}s"
+                )
+            except Exception as e:
+                result = _failed_result(
+                    file_path, f"Failed to process {os.path.basename(file_path)}: {e}"
+                )
+
+            for next_index, next_path in islice(remaining, 1):
+                submit(next_index, next_path)
+
+            yield result
+    finally:
+        if timed_out:
+            _terminate_workers(executor)
+        executor.shutdown(wait=not timed_out, cancel_futures=True)
+        started_queue.close()
@@ -0,0 +1,168 @@
+"""
+Page-parallel PDF extraction for Betty AI Assistant.
+
+The pages of a PDF are split into contiguous ranges, each extracted by its
+own worker process. Pages are yielded in page order as soon as they and every
+page before them are done, so chunking can start before the whole file is
+parsed. A page that runs past the page timeout is skipped: its worker is
+terminated and a new one continues with the rest of that range.
+
+This module only depends on PyPDF2, so spawned workers start quickly.
+"""
+
+import io
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import PyPDF2
+
+
+# (page index, text, error message or None)
+PageResult = Tuple[int, str, Optional[str]]
+
+
+def split_page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """Split page indexes into at most workers contiguous (start, end) ranges.
+
+    Args:
+        page_count: Number of pages.
+        workers: Number of ranges wanted.
+
+    Returns:
+        Ranges of near-equal size covering every page, in page order.
+    """
+    workers = max(1, min(workers, page_count))
+    size, extra = divmod(page_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _extract_page_range(conn, pdf_bytes: bytes, start: int, end: int):
+    """Worker process: extract pages start to end - 1 and send each result.
+
+    Every page is announced with its start time before extraction, so the
+    parent can tell which page a stuck worker is on.
+    """
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        for page_index in range(start, end):
+            conn.send(("start", page_index, time.time()))
+            try:
+                conn.send(("page", page_index, reader.pages[page_index].extract_text() or "", None))
+            except Exception as e:
+                conn.send(("page", page_index, "", str(e)))
+    except Exception as e:
+        conn.send(("failed", start, f"Error reading PDF file: {e}"))
+    finally:
+        conn.close()
+
+
+def iter_pdf_pages_parallel(
+    pdf_bytes: bytes,
+    page_count: int,
+    workers: int,
+    page_timeout: float = None
+) -> Iterator[PageResult]:
+    """Extract PDF pages in worker processes, yielding them in page order.
+
+    Failed and timed-out pages are yielded with empty text and an error
+    message rather than raised, so the caller can skip and report them.
+
+    Args:
+        pdf_bytes: Content of the PDF file.
+        page_count: Number of pages in the file.
+        workers: Number of worker processes.
+        page_timeout: Seconds a single page may take, None or 0 for no limit.
+
+    Yields:
+        (page index, text, error) for every page.
+    """
+    # Spawned workers avoid forking a process that already holds model threads
+    context = multiprocessing.get_context("spawn")
+    running: Dict[Any, Dict[str, Any]] = {}
+    done: Dict[int, Tuple[str, Optional[str]]] = {}
+    next_page = 0
+
+    def spawn(start: int, end: int):
+        if start >= end:
+            return
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_extract_page_range, args=(sender, pdf_bytes, start, end), daemon=True
+        )
+        process.start()
+        sender.close()
+        running[receiver] = {"process": process, "page": start, "end": end, "started": None}
+
+    def stop(conn) -> Dict[str, Any]:
+        worker = running.pop(conn)
+        if worker["process"].is_alive():
+            worker["process"].terminate()
+        worker["process"].join()
+        conn.close()
+        return worker
+
+    try:
+        for start, end in split_page_ranges(page_count, workers):
+            spawn(start, end)
+
+        while next_page < page_count:
+            while next_page in done:
+                text, error = done.pop(next_page)
+                yield next_page, text, error
+                next_page += 1
+            if next_page >= page_count:
+                break
+
+            if not running:
+                # Every worker has exited without reporting this page
+                done[next_page] = ("", "Page was not extracted")
+                continue
+
+            wait_seconds = None
+            if page_timeout:
+                started = [worker["started"] for worker in running.values() if worker["started"] is not None]
+                if started:
+                    wait_seconds = max(0.0, min(started) + page_timeout - time.time())
+
+            for conn in wait(list(running), timeout=wait_seconds):
+                worker = running[conn]
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    # The worker exited: it finished its range, or crashed on its current page
+                    worker = stop(conn)
+                    if worker["page"] < worker["end"]:
+                        exitcode = worker["process"].exitcode
+                        done[worker["page"]] = ("", f"Worker exited with code {exitcode}")
+                        spawn(worker["page"] + 1, worker["end"])
+                    continue
+
+                if message[0] == "start":
+                    worker["page"], worker["started"] = message[1], message[2]
+                elif message[0] == "page":
+                    done[message[1]] = (message[2], message[3])
+                    worker["page"], worker["started"] = message[1] + 1, None
+                else:
+                    # The file could not be opened, so no page of the range can be read
+                    for page_index in range(worker["page"], worker["end"]):
+                        done[page_index] = ("", message[2])
+                    worker["page"] = worker["end"]
+
+            if page_timeout:
+                now = time.time()
+                for conn, worker in list(running.items()):
+                    # Results already waiting in the pipe are read before a worker is stopped
+                    if worker["started"] is not None and now - worker["started"] > page_timeout and not conn.poll():
+                        worker = stop(conn)
+                        done[worker["page"]] = ("", f"Timed out after {page_timeout:g}s")
+                        spawn(worker["page"] + 1, worker["end"])
+    finally:
+        for conn in list(running):
+            stop(conn)
@@ -0,0 +1,117 @@
+"""
+Streaming PPTX text extraction for Betty AI Assistant.
+
+Slides are read one at a time in presentation order, straight from the
+package XML, and yielded as soon as each is converted. Images, embedded
+fonts and other media parts are never decompressed, which matters for decks
+like the Deloitte capability maturity model whose media is most of the file.
+
+Each slide becomes a "=== Slide N ===" block with one line per paragraph of
+its shapes in drawing order, tables as "|"-separated rows between
+"--- Table ---" markers like DOCX tables, and the speaker notes, if any.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator, List
+
+from utils.docx_stream import OFFICE_DOCUMENT_REL, part_relationships, relationship_target
+
+
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_NOTES_SLIDE_REL = "/notesSlide"
+
+
+def _paragraph_lines(element: ET.Element) -> List[str]:
+    """Non-empty text of each DrawingML paragraph within an element."""
+    lines = []
+    for paragraph in element.iter(_A + "p"):
+        parts = []
+        for child in paragraph.iter():
+            if child.tag == _A + "t":
+                parts.append(child.text or "")
+            elif child.tag == _A + "br":
+                parts.append("\n")
+        text = "".join(parts).strip()
+        if text:
+            lines.append(text)
+    return lines
+
+
+def _table_lines(table: ET.Element) -> List[str]:
+    """A DrawingML table as "|"-separated rows of non-empty cells."""
+    rows = []
+    for row in table.iter(_A + "tr"):
+        cells = [" ".join(_paragraph_lines(cell)) for cell in row.iter(_A + "tc")]
+        cells = [cell for cell in cells if cell]
+        if cells:
+            rows.append(" | ".join(cells))
+    if not rows:
+        return []
+    return ["--- Table ---", *rows, "--- End Table ---"]
+
+
+def _shape_tree_lines(tree: ET.Element) -> List[str]:
+    """Text of the shapes in a shape tree, in drawing order, including groups."""
+    lines = []
+    for shape in tree:
+        if shape.tag == _P + "sp":
+            text_body = shape.find(_P + "txBody")
+            if text_body is not None:
+                lines.extend(_paragraph_lines(text_body))
+        elif shape.tag == _P + "graphicFrame":
+            for table in shape.iter(_A + "tbl"):
+                lines.extend(_table_lines(table))
+        elif shape.tag == _P + "grpSp":
+            lines.extend(_shape_tree_lines(shape))
+    return lines
+
+
+def _notes_lines(archive: zipfile.ZipFile, notes_part: str) -> List[str]:
+    """Speaker notes text, taken from the body placeholder of a notes slide."""
+    with archive.open(notes_part) as f:
+        root = ET.parse(f).getroot()
+    lines = []
+    for shape in root.iter(_P + "sp"):
+        placeholder = shape.find(f"{_P}nvSpPr/{_P}nvPr/{_P}ph")
+        text_body = shape.find(_P + "txBody")
+        if placeholder is not None and placeholder.get("type") == "body" and text_body is not None:
+            lines.extend(_paragraph_lines(text_body))
+    return lines
+
+
+def iter_pptx_slides(file) -> Iterator[str]:
+    """Yield the text of each slide of a PPTX file in presentation order.
+
+    Args:
+        file: Path or binary file object of the .pptx archive.
+
+    Yields:
+        One block per slide with text, starting with "=== Slide N ===".
+
+    Raises:
+        zipfile.BadZipFile, KeyError or xml.etree.ElementTree.ParseError if
+        the file is not a readable PPTX package.
+    """
+    with zipfile.ZipFile(file) as archive:
+        presentation_part = relationship_target(archive, "", OFFICE_DOCUMENT_REL) or "ppt/presentation.xml"
+        slide_parts = part_relationships(archive, presentation_part)
+        with archive.open(presentation_part) as f:
+            slide_ids = ET.parse(f).getroot().iter(_P + "sldId")
+            slide_order = [slide_parts[slide_id.get(_R_ID)][1] for slide_id in slide_ids]
+
+        for number, slide_part in enumerate(slide_order, 1):
+            with archive.open(slide_part) as f:
+                root = ET.parse(f).getroot()
+            tree = root.find(f"{_P}cSld/{_P}spTree")
+            lines = _shape_tree_lines(tree) if tree is not None else []
+
+            notes_part = relationship_target(archive, slide_part, _NOTES_SLIDE_REL)
+            notes = _notes_lines(archive, notes_part) if notes_part else []
+            if notes:
+                lines.append("Notes: " + "\n".join(notes))
+
+            if lines:
+                yield f"=== Slide {number} ===\n" + "\n".join(lines) + "\n"
@@ -0,0 +1,117 @@
+"""
+Result ranking utilities for Betty AI Assistant.
+
+This module contains rank fusion helpers used to combine result lists from
+different retrievers, and maximal marginal relevance selection used to drop
+redundant results.
+"""
+
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Hashable, float]]:
+    """Fuse several ranked lists with reciprocal rank fusion.
+
+    Each item scores sum(weight / (k + rank)) over the lists it appears in,
+    with ranks starting at 1.
+
+    Args:
+        rankings: Ranked lists of item identifiers, best first.
+        k: Smoothing constant, larger values flatten rank differences.
+        weights: Optional per-list weights, defaults to 1.0 each.
+
+    Returns:
+        List of (item, fused score) pairs, best first.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    first_seen: Dict[Hashable, int] = {}
+
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+            first_seen.setdefault(item, len(first_seen))
+
+    # Ties keep the order in which items were first seen for deterministic output
+    return sorted(scores.items(), key=lambda entry: (-entry[1], first_seen[entry[0]]))
+
+
+def min_max_normalize(scores: Sequence[float]) -> List[float]:
+    """Rescale scores linearly to [0, 1] across the given set.
+
+    Rank fusion scores are bunched close together, so they are spread over
+    the same range as cosine similarity before they are traded off against
+    redundancy. Equal scores all map to 1.0.
+
+    Args:
+        scores: Scores of a candidate set.
+
+    Returns:
+        Normalized scores in the same order.
+    """
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high <= low:
+        return [1.0] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+
+def maximal_marginal_relevance(
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    query_embedding: Optional[Sequence[float]] = None,
+    relevance: Optional[Sequence[float]] = None,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: Optional[float] = None
+) -> List[int]:
+    """Select relevant but mutually dissimilar candidates.
+
+    Candidates are picked greedily by
+    lambda_mult * relevance - (1 - lambda_mult) * max similarity to the
+    candidates picked so far, using cosine similarity. Candidates at least
+    duplicate_threshold similar to a picked one are dropped, even if fewer
+    than k candidates remain.
+
+    Args:
+        candidate_embeddings: Embeddings of the candidates, best ranked first.
+        k: Maximum number of candidates to select.
+        query_embedding: Query embedding, used for relevance when relevance is not given.
+        relevance: Relevance of each candidate, comparable to cosine similarity.
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0).
+        duplicate_threshold: Similarity at which candidates count as duplicates,
+            None keeps near-duplicates.
+
+    Returns:
+        Indices of the selected candidates in selection order.
+    """
+    vectors = np.asarray(candidate_embeddings, dtype=np.float32)
+    if k <= 0 or len(vectors) == 0:
+        return []
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    if relevance is None:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        relevance = vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    selected: List[int] = []
+    available = np.ones(len(vectors), dtype=bool)
+    redundancy = np.zeros(len(vectors), dtype=np.float32)
+    while len(selected) < k and available.any():
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        # argmax returns the first maximum, so ties keep the original ranking
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        if duplicate_threshold is not None:
+            available &= similarity[best] < duplicate_threshold
+    return selected
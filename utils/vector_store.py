@@ -1,13 +1,16 @@
 """
 Vector store utilities for Betty AI Assistant.
 
-This module provides a high-level interface for ChromaDB operations
-with improved error handling and configuration management.
+This module provides a high-level interface for vector database operations
+with improved error handling and configuration management. The storage
+backend is ChromaDB or an in-process NumPy flat index, selected with
+AppConfig.VECTOR_BACKEND.
 """
 
 # Fix for Streamlit Cloud SQLite3 compatibility - Enhanced version
 import sys
 import os
+from config.settings import AppConfig
 
 # Force pysqlite3 import before any other SQLite-dependent modules
 def setup_sqlite_compatibility():
@@ -30,25 +33,82 @@ def setup_sqlite_compatibility():
         sys.modules['sqlite3'] = sqlite3
         return False
 
-# Setup SQLite compatibility before importing ChromaDB
-sqlite_setup_success = setup_sqlite_compatibility()
+# Setup SQLite compatibility before importing ChromaDB (not needed by the flat index)
+USE_CHROMA_BACKEND = AppConfig.VECTOR_BACKEND == "chroma"
+sqlite_setup_success = setup_sqlite_compatibility() if USE_CHROMA_BACKEND else True
 
-import io
-from typing import List, Dict, Any, Optional
+import copy
+import json
+import array
+import time
+import threading
+import hashlib
+import unicodedata
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
 import streamlit as st
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from config.settings import AppConfig
-from utils.document_processor import document_processor
+from utils.cache import LRUCache
+from utils.model_registry import model_registry
+from utils.parallel_extraction import iter_extracted_files
+from utils.embedding_cache import EmbeddingCache
+from utils.lexical_index import BM25Index
+from utils.ranking import maximal_marginal_relevance, min_max_normalize, reciprocal_rank_fusion
+from utils.flat_index import FlatIndexClient
+from utils.kb_snapshot import SnapshotError, read_snapshot, read_snapshot_attachment, write_snapshot
+from utils.embedding_projection import EmbeddingProjection
+from utils.document_metadata import (
+    derive_file_metadata,
+    domain_filter_for_query,
+    combine_where_filters
+)
+from utils.ingestion_manifest import (
+    IngestionManifest,
+    normalize_source_path,
+    summarize_changes
+)
 
 # Import ChromaDB with error handling
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-    if not sqlite_setup_success:
-        st.warning("Using system SQLite3 - some features may be limited on Streamlit Cloud")
-except Exception as e:
-    st.error(f"ChromaDB import failed: {e}")
-    CHROMADB_AVAILABLE = False
+CHROMADB_AVAILABLE = False
+if USE_CHROMA_BACKEND:
+    try:
+        import chromadb
+        CHROMADB_AVAILABLE = True
+        if not sqlite_setup_success:
+            st.warning("Using system SQLite3 - some features may be limited on Streamlit Cloud")
+    except Exception as e:
+        st.error(f"ChromaDB import failed: {e}")
+
+# Query embeddings are shared by every store in the process; keys include the model name
+query_embedding_cache = LRUCache(
+    max_size=AppConfig.QUERY_EMBEDDING_CACHE_SIZE,
+    ttl_seconds=AppConfig.QUERY_EMBEDDING_CACHE_TTL
+)
+
+# Cross-encoder scores are shared by every store; keys include the reranker model and chunk ID
+rerank_score_cache = LRUCache(
+    max_size=AppConfig.RERANK_SCORE_CACHE_SIZE,
+    ttl_seconds=AppConfig.RERANK_SCORE_CACHE_TTL
+)
+
+# Chunk embeddings persist across re-indexing runs; created on first use
+_embedding_cache: Optional[EmbeddingCache] = None
+
+# Small model used when the configured embedding model cannot be loaded
+FALLBACK_EMBEDDING_MODEL = "paraphrase-MiniLM-L3-v2"
+
+# Snapshot member holding the embedding projection of the exported collection
+PROJECTION_ATTACHMENT = "projection.npz"
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the shared on-disk embedding cache, or None if it is disabled."""
+    global _embedding_cache
+    if _embedding_cache is None and AppConfig.USE_EMBEDDING_CACHE:
+        try:
+            _embedding_cache = EmbeddingCache(AppConfig.EMBEDDING_CACHE_PATH)
+        except Exception as e:
+            st.warning(f"Embedding cache unavailable, embeddings will be recomputed: {e}")
+            AppConfig.USE_EMBEDDING_CACHE = False
+    return _embedding_cache
 
 
 class VectorStore:
@@ -61,22 +121,42 @@ class VectorStore:
     ):
         """Initialize the vector store.
         
+        Construction is cheap: the database client is opened on first use and
+        models are loaded through the shared model registry when first needed.
+        
         Args:
-            db_path: Path to ChromaDB storage directory.
+            db_path: Path to the vector database storage directory.
             embedding_model_name: Name of the embedding model to use.
         """
         self.db_path = db_path or AppConfig.CHROMA_DB_PATH
         self.embedding_model_name = embedding_model_name or AppConfig.EMBEDDING_MODEL
         
-        # Initialize components
+        # Initialize components; models are shared through the model registry
         self._client = None
-        self._embedding_model = None
-        self._reranker = None
-        self._init_components()
+        self._reranker_available = True
+        self._persistent = False
+        
+        # Ingestion manifests track indexed files per collection
+        self._manifests: Dict[str, IngestionManifest] = {}
+        self.last_ingest_report: Optional[Dict[str, Any]] = None
+        self.last_rerank_report: Optional[Dict[str, Any]] = None
+        
+        # BM25 indexes for hybrid search, maintained alongside each collection
+        self._lexical_indexes: Dict[str, BM25Index] = {}
+        
+        # Embedding projections fitted when a collection is built, None if vectors are stored as is
+        self._projections: Dict[str, Optional[EmbeddingProjection]] = {}
+        
+        # Search results are cached per collection version and invalidated on writes
+        self._collection_versions: Dict[str, int] = {}
+        self._search_result_cache = LRUCache(
+            max_size=AppConfig.SEARCH_RESULT_CACHE_SIZE,
+            ttl_seconds=AppConfig.SEARCH_RESULT_CACHE_TTL
+        )
     
     def _init_components(self):
-        """Initialize ChromaDB client, embedding model, and reranker."""
-        if not CHROMADB_AVAILABLE:
+        """Initialize the vector database client."""
+        if USE_CHROMA_BACKEND and not CHROMADB_AVAILABLE:
             st.error("ChromaDB is not available. Please check your deployment configuration.")
             raise RuntimeError("ChromaDB not available")
         
@@ -87,58 +167,87 @@ class VectorStore:
                        os.getenv("STREAMLIT_RUNTIME_ENV") == "cloud")
             
             if is_cloud:
-                st.info("🔥 Running on Streamlit Cloud - using in-memory ChromaDB client")
-                self._client = chromadb.Client()
+                st.info(f"🔥 Running on Streamlit Cloud - using in-memory {self._backend_label()} client")
+                self._client = self._create_client(persistent=False)
             else:
                 # Use persistent client for local development
-                st.info(f"💾 Using persistent ChromaDB storage: {self.db_path}")
-                self._client = chromadb.PersistentClient(path=self.db_path)
-            
-            # Load embedding model with Streamlit Cloud optimization
-            self._embedding_model = self._load_embedding_model()
-            if AppConfig.USE_RERANKING:
-                self._reranker = self._load_reranker_model()
+                st.info(f"💾 Using persistent {self._backend_label()} storage: {self.db_path}")
+                self._client = self._create_client(persistent=True)
+                self._persistent = True
                 
         except Exception as e:
             st.error(f"Failed to initialize vector store: {e}")
             # Try fallback initialization
             self._try_fallback_init()
 
-    @st.cache_resource(show_spinner="🤖 Loading embedding model...")
-    def _load_embedding_model(_self):
-        """Load embedding model with Streamlit caching for faster cloud deployment."""
+    def _load_embedding_model(self):
+        """Get the embedding model from the process-wide model registry.
+        
+        If the configured model cannot be loaded, the store switches to a small
+        fallback model and records its name, so cached and stored embeddings
+        stay labelled with the model that actually produced them.
+        """
+        if model_registry.is_loaded("embedding", self.embedding_model_name):
+            return model_registry.get_embedding_model(self.embedding_model_name)
+        
         try:
-            # Use smaller model for Streamlit Cloud to reduce memory/time
-            model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-            return SentenceTransformer(model_name)
+            with st.spinner("🤖 Loading embedding model..."):
+                return model_registry.get_embedding_model(self.embedding_model_name)
         except Exception as e:
-            st.error(f"Failed to load embedding model: {e}")
-            # Try fallback to smallest model
-            try:
-                st.warning("Trying fallback embedding model...")
-                return SentenceTransformer("paraphrase-MiniLM-L3-v2")
-            except:
+            if self.embedding_model_name == FALLBACK_EMBEDDING_MODEL:
                 st.error("All embedding models failed to load")
-                raise e
+                raise
+            st.error(f"Failed to load embedding model: {e}")
+            st.warning("Trying fallback embedding model...")
+            self.embedding_model_name = FALLBACK_EMBEDDING_MODEL
+            return self._load_embedding_model()
 
-    @st.cache_resource(show_spinner="🎯 Loading reranker model...")
-    def _load_reranker_model(_self):
-        """Load reranker model with Streamlit caching."""
+    def _load_reranker_model(self):
+        """Get the reranker from the model registry, or None if it cannot be loaded."""
+        if not self._reranker_available:
+            return None
+        if model_registry.is_loaded("reranker", AppConfig.RERANKER_MODEL):
+            return model_registry.get_cross_encoder(AppConfig.RERANKER_MODEL)
+        
         try:
-            return CrossEncoder(AppConfig.RERANKER_MODEL)
+            with st.spinner("🎯 Loading reranker model..."):
+                return model_registry.get_cross_encoder(AppConfig.RERANKER_MODEL)
         except Exception as e:
             st.warning(f"Reranker model failed to load: {e}. Continuing without reranking.")
+            self._reranker_available = False
             return None
 
+    def _backend_label(self) -> str:
+        """Human-readable name of the configured storage backend."""
+        return "ChromaDB" if USE_CHROMA_BACKEND else "NumPy flat index"
+    
+    def _create_client(self, persistent: bool):
+        """Create a client for the configured storage backend.
+        
+        Both backends expose the same client and collection API, so the rest
+        of the store does not depend on which one is selected.
+        
+        Args:
+            persistent: Whether to store data under db_path instead of in memory.
+        """
+        if not USE_CHROMA_BACKEND:
+            return FlatIndexClient(
+                path=self.db_path if persistent else None,
+                dtype=AppConfig.VECTOR_INDEX_DTYPE
+            )
+        if persistent:
+            return chromadb.PersistentClient(path=self.db_path)
+        return chromadb.Client()
+    
     def _try_fallback_init(self):
-        """Try fallback initialization with simplified ChromaDB setup."""
+        """Try fallback initialization with simplified in-memory setup."""
         try:
-            st.warning("Attempting fallback ChromaDB initialization...")
+            st.warning(f"Attempting fallback {self._backend_label()} initialization...")
             # Force in-memory mode as fallback
-            self._client = chromadb.Client()
-            self._embedding_model = self._load_embedding_model()
+            self._client = self._create_client(persistent=False)
+            self._persistent = False
             # Skip reranking in fallback mode
-            self._reranker = None
+            self._reranker_available = False
             st.success("Fallback initialization successful - using in-memory mode only")
         except Exception as fallback_error:
             st.error(f"Fallback initialization also failed: {fallback_error}")
@@ -152,18 +261,37 @@ class VectorStore:
         return self._client
     
     @property
-    def embedding_model(self):
-        """Get the embedding model."""
-        if self._embedding_model is None:
+    def persistent(self) -> bool:
+        """Whether collections are stored on disk, known once the client is open."""
+        if self._client is None:
             self._init_components()
-        return self._embedding_model
+        return self._persistent
+    
+    def start_warmup(self) -> threading.Thread:
+        """Load this store's models in a background thread.
+        
+        Searches started before warmup finishes wait for the model loads in
+        progress instead of loading their own copies.
+        
+        Returns:
+            The warmup thread.
+        """
+        models = [("embedding", self.embedding_model_name)]
+        if AppConfig.USE_RERANKING and self._reranker_available:
+            models.append(("reranker", AppConfig.RERANKER_MODEL))
+        return model_registry.start_warmup(models)
+    
+    @property
+    def embedding_model(self):
+        """Get the embedding model, reloading it if the registry unloaded it while idle."""
+        return self._load_embedding_model()
     
     @property
     def reranker(self):
-        """Get the reranker model."""
-        if self._reranker is None and AppConfig.USE_RERANKING:
-            self._init_components()
-        return self._reranker
+        """Get the reranker model, or None if reranking is disabled or unavailable."""
+        if not AppConfig.USE_RERANKING:
+            return None
+        return self._load_reranker_model()
     
     def get_or_create_collection(self, collection_name: str):
         """Get or create a ChromaDB collection.
@@ -184,299 +312,1309 @@ class VectorStore:
         self, 
         collection_name: str, 
         file_paths: List[str],
-        show_progress: bool = True
+        show_progress: bool = True,
+        prune_removed: bool = False
     ) -> bool:
         """Add documents from file paths to a collection.
         
+        Only new or changed files are processed, as recorded by the collection's
+        ingestion manifest. Modified files are reconciled chunk by chunk, and chunks
+        of indexed files missing from file_paths are deleted if prune_removed is set.
+        The file-level diff is stored in last_ingest_report.
+        
         Args:
             collection_name: Name of the target collection.
             file_paths: List of file paths to process.
             show_progress: Whether to show progress indicators.
+            prune_removed: Whether to delete chunks of indexed files not in file_paths.
             
         Returns:
             True if successful, False otherwise.
         """
         try:
             collection = self.get_or_create_collection(collection_name)
+            manifest = self._get_manifest(collection_name)
             
-            # Check existing files
-            existing_files = self._get_existing_files(collection)
-            files_to_add = [
-                fp for fp in file_paths 
-                if os.path.basename(fp) not in existing_files
-            ]
+            # An empty collection (new, reset or in-memory) holds no indexed files
+            existing_count = collection.count()
+            if existing_count == 0:
+                manifest.clear()
+            
+            changes = manifest.diff(file_paths, self._ingest_config())
+            
+            # Vectors from a different embedding model or projection cannot be updated
+            # in place. Checked only when files need embedding, so a no-op sync loads no model.
+            if (existing_count and (changes["added"] or changes["modified"])
+                    and not self._embedding_space_matches(collection)):
+                st.warning(f"Collection '{collection_name}' was built with a different embedding model or projection, rebuilding it.")
+                self.reset_collection_for_embedding_model(collection_name)
+                collection = self.get_or_create_collection(collection_name)
+                existing_count = 0
+                manifest.clear()
+                changes = manifest.diff(file_paths, self._ingest_config())
+            
+            # Collections indexed before the manifest existed only carry filenames
+            legacy_collection = existing_count > 0 and not manifest.entries
+            if not prune_removed:
+                changes["removed"] = []
+            self.last_ingest_report = changes
+            
+            # Modified files are reconciled chunk by chunk when they are re-indexed
+            for file_path in changes["removed"]:
+                self._delete_file_chunks(collection, file_path)
+            for file_path in changes["modified"]:
+                self._delete_chunks_from_other_config(collection, manifest, file_path)
+            for file_path in changes["modified"] + changes["removed"]:
+                manifest.remove(file_path)
+            if legacy_collection:
+                for file_path in changes["added"]:
+                    self._delete_chunks(collection, {"filename": os.path.basename(file_path)})
+            for file_path in changes["unchanged"]:
+                manifest.touch(file_path, changes["fingerprints"][normalize_source_path(file_path)])
+            
+            files_to_add = changes["added"] + changes["modified"]
+            if show_progress and (files_to_add or changes["removed"]):
+                st.sidebar.info(f"Knowledge base changes: {summarize_changes(changes)}")
             
             if not files_to_add:
+                manifest.save()
+                self._save_lexical_index(collection)
                 if show_progress:
                     st.sidebar.info("Knowledge base is already up-to-date.")
                 return True
             
-            # Process files
-            documents_data = []
+            # Files are recorded in the manifest as soon as all their chunks are written
+            added_files = []
+            
+            def record_file(doc_data: Dict):
+                source_path = normalize_source_path(doc_data['source_path'])
+                manifest.record(
+                    source_path,
+                    changes["fingerprints"][source_path],
+                    doc_data['chunk_count']
+                )
+                added_files.append(source_path)
             
+            # Stream files through extraction, embedding and collection writes
+            documents = self._process_files_for_collection(files_to_add)
             progress_text = f"Processing {len(files_to_add)} documents..."
             if show_progress:
                 with st.spinner(progress_text):
-                    documents_data = self._process_files_for_collection(files_to_add)
+                    success = self._add_documents_to_collection(
+                        collection, documents, show_progress, on_document_added=record_file
+                    )
             else:
-                documents_data = self._process_files_for_collection(files_to_add)
+                success = self._add_documents_to_collection(
+                    collection, documents, show_progress, on_document_added=record_file
+                )
             
-            if not documents_data:
-                if show_progress:
-                    st.sidebar.warning("No valid documents to add.")
+            # Modified files that no longer yield any text must not keep old chunks
+            for file_path in changes["modified"]:
+                if normalize_source_path(file_path) not in added_files:
+                    self._delete_file_chunks(collection, file_path)
+            manifest.save()
+            self._save_lexical_index(collection)
+            
+            if not added_files and show_progress:
+                st.sidebar.warning("No valid documents to add.")
+            return success
+            
+        except Exception as e:
+            st.error(f"Error adding documents to collection: {e}")
+            return False
+    
+    def upsert_file(self, collection_name: str, file_path: str) -> bool:
+        """Index a single file, replacing the chunks it previously had.
+        
+        Only chunks whose content or position changed are embedded and written;
+        chunks no longer produced by the file are deleted.
+        
+        Args:
+            collection_name: Name of the target collection.
+            file_path: Path of the file to index.
+            
+        Returns:
+            True if the file was indexed, False otherwise.
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            manifest = self._get_manifest(collection_name)
+            source_path = normalize_source_path(file_path)
+            
+            fingerprint = manifest.diff([file_path], self._ingest_config())["fingerprints"].get(source_path)
+            if fingerprint is None:
+                st.error(f"File not found: {file_path}")
                 return False
+            self._delete_chunks_from_other_config(collection, manifest, file_path)
+            manifest.remove(file_path)
+            
+            indexed = []
+            
+            def record_file(doc_data: Dict):
+                manifest.record(source_path, fingerprint, doc_data['chunk_count'])
+                indexed.append(source_path)
             
-            # Add to collection
-            return self._add_documents_to_collection(
-                collection, documents_data, show_progress
+            self._add_documents_to_collection(
+                collection,
+                self._process_files_for_collection([file_path]),
+                show_progress=False,
+                on_document_added=record_file
             )
+            if not indexed:
+                self._delete_file_chunks(collection, file_path)
+            
+            manifest.save()
+            self._save_lexical_index(collection)
+            return bool(indexed)
             
         except Exception as e:
-            st.error(f"Error adding documents to collection: {e}")
+            st.error(f"Error indexing file '{file_path}': {e}")
+            return False
+    
+    def delete_file(self, collection_name: str, file_path: str) -> bool:
+        """Delete every chunk of a file from a collection.
+        
+        Args:
+            collection_name: Name of the collection.
+            file_path: Path of the file whose chunks should be removed.
+            
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            self._delete_file_chunks(collection, file_path)
+            
+            manifest = self._get_manifest(collection_name)
+            manifest.remove(file_path)
+            manifest.save()
+            self._save_lexical_index(collection)
+            return True
+            
+        except Exception as e:
+            st.error(f"Error deleting file '{file_path}' from collection: {e}")
+            return False
+    
+    def list_files(self, collection_name: str) -> List[Dict[str, Any]]:
+        """List the source files indexed in a collection.
+        
+        Args:
+            collection_name: Name of the collection.
+            
+        Returns:
+            List of dicts with source_path, filename, domain and chunk_count,
+            sorted by source path.
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            files = {}
+            for page in self._iter_collection_pages(collection, include=["metadatas"]):
+                for meta in page["metadatas"]:
+                    # Chunks indexed before source paths were stored only carry a filename
+                    source_path = meta.get("source_path") or meta.get("filename", "")
+                    entry = files.setdefault(source_path, {
+                        "source_path": source_path,
+                        "filename": meta.get("filename", ""),
+                        "domain": meta.get("domain", ""),
+                        "chunk_count": 0
+                    })
+                    entry["chunk_count"] += 1
+            return [files[source_path] for source_path in sorted(files)]
+            
+        except Exception as e:
+            st.error(f"Error listing files in collection '{collection_name}': {e}")
+            return []
+    
+    def export_snapshot(self, collection_name: str, snapshot_path: str) -> Optional[Dict[str, Any]]:
+        """Package a collection's embeddings, documents and metadata into a snapshot.
+        
+        Args:
+            collection_name: Name of the collection to export.
+            snapshot_path: Destination zip file.
+            
+        Returns:
+            The snapshot manifest, or None if the export failed.
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            count = collection.count()
+            if count == 0:
+                st.warning(f"Collection '{collection_name}' is empty, nothing to export.")
+                return None
+            
+            projection = self._get_projection(collection_name)
+            return write_snapshot(
+                snapshot_path,
+                self._iter_collection_pages(collection, include=["documents", "metadatas", "embeddings"]),
+                count,
+                {
+                    "collection": collection_name,
+                    "embedding_model": self.embedding_model_name,
+                    "ingest_config": self._ingest_config(),
+                    "files": self._get_manifest(collection_name).entries
+                },
+                attachments={PROJECTION_ATTACHMENT: projection.to_bytes()} if projection else None
+            )
+            
+        except Exception as e:
+            st.error(f"Error exporting snapshot of collection '{collection_name}': {e}")
+            return None
+    
+    def import_snapshot(
+        self,
+        snapshot_path: str,
+        collection_name: str = None,
+        verify: bool = True
+    ) -> bool:
+        """Replace a collection with the contents of a snapshot.
+        
+        Stored embeddings are loaded as they are, so no documents are re-embedded,
+        together with the embedding projection they were stored under, if any.
+        The snapshot's ingestion manifest is adopted when it was built with the
+        current chunking and embedding settings, so a later incremental sync
+        only processes files that changed since the snapshot was made.
+        
+        Args:
+            snapshot_path: Snapshot zip file written by export_snapshot.
+            collection_name: Target collection, defaults to the exported collection's name.
+            verify: Whether to check the snapshot checksums before loading.
+            
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            snapshot, pages = read_snapshot(
+                snapshot_path, batch_size=self._get_ingest_batch_size(), verify=verify
+            )
+            if snapshot.get("embedding_model") != self.embedding_model_name:
+                raise SnapshotError(
+                    f"Snapshot was built with '{snapshot.get('embedding_model')}' "
+                    f"but this store uses '{self.embedding_model_name}'"
+                )
+            
+            projection_data = read_snapshot_attachment(snapshot_path, PROJECTION_ATTACHMENT)
+            
+            collection_name = collection_name or snapshot["collection"]
+            if collection_name in self.list_collections():
+                self.delete_collection(collection_name)
+            collection = self.get_or_create_collection(collection_name)
+            if projection_data is not None:
+                self._set_projection(collection_name, EmbeddingProjection.from_bytes(projection_data))
+            
+            lexical_index = BM25Index()
+            for page in pages:
+                collection.add(
+                    ids=page["ids"],
+                    embeddings=page["embeddings"],
+                    documents=page["documents"],
+                    metadatas=page["metadatas"]
+                )
+                lexical_index.add_documents(page["ids"], page["documents"])
+            self._lexical_indexes[collection_name] = lexical_index
+            self._save_lexical_index(collection)
+            self._bump_collection_version(collection_name)
+            
+            manifest = self._get_manifest(collection_name)
+            if snapshot.get("ingest_config") == self._ingest_config():
+                manifest.entries = dict(snapshot.get("files", {}))
+            manifest.save()
+            return True
+            
+        except Exception as e:
+            st.error(f"Error importing knowledge base snapshot '{snapshot_path}': {e}")
             return False
     
     def search_collection(
         self, 
         collection_name: str, 
         query: str, 
-        n_results: int = None
+        n_results: int = None,
+        where: Optional[Dict[str, Any]] = None,
+        auto_domain_filter: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """Search a collection for relevant documents.
         
+        When the query names a SharePoint domain (e.g. "BOM pain points") the
+        search is narrowed to chunks of that domain, falling back to the
+        unfiltered search if nothing in the collection matches.
+        
         Args:
             collection_name: Name of the collection to search.
             query: Search query string.
             n_results: Number of results to return.
+            where: Optional metadata filter, e.g. {"sub_category": "Pain Points"}.
+            auto_domain_filter: Whether to detect a domain filter from the query,
+                defaults to AppConfig.AUTO_DOMAIN_FILTER.
             
         Returns:
             List of search results with content and metadata.
         """
         n_results = n_results or AppConfig.MAX_SEARCH_RESULTS
+        domain_where = self._query_domain_filter(query, auto_domain_filter)
         
         try:
             collection = self.get_or_create_collection(collection_name)
             
             # Check if collection has any documents
-            if collection.count() == 0:
+            document_count = collection.count()
+            if document_count == 0:
                 st.warning(f"Collection '{collection_name}' exists but contains no documents. Please add documents to the knowledge base.")
                 return []
             
-            query_embedding = self.embedding_model.encode([query]).tolist()
+            query_embedding = self._encode_query(query)
+            cache_key = self._search_cache_key(
+                collection_name, document_count, query_embedding, n_results, rerank=False,
+                where=self._where_key(where), domain_filter=self._where_key(domain_where)
+            )
+            cached_results = self._search_result_cache.get(cache_key)
+            if cached_results is not None:
+                return copy.deepcopy(cached_results)
 
-            # Get extra results for deterministic ranking
+            # Get extra results for deterministic ranking and MMR selection
             search_results = min(n_results * 2, 20)
+            query_vector = self._query_vector(collection, query_embedding)
             results = collection.query(
-                query_embeddings=query_embedding,
+                query_embeddings=[query_vector],
                 n_results=search_results,
-                include=["documents", "metadatas", "distances"]
+                where=combine_where_filters(where, domain_where),
+                include=self._search_include()
             )
+            if domain_where and not results["ids"][0]:
+                # Chunks indexed without domain metadata never match the detected filter
+                results = collection.query(
+                    query_embeddings=[query_vector],
+                    n_results=search_results,
+                    where=where,
+                    include=self._search_include()
+                )
 
-            # Format results with deterministic sorting
-            formatted_results = []
-            for i, (doc, meta) in enumerate(zip(results["documents"][0], results["metadatas"][0])):
-                # Add distance if available, otherwise use index
-                distance = results.get("distances", [[]])[0][i] if "distances" in results else i * 0.001
-                formatted_results.append({
-                    "content": doc,
-                    "metadata": meta,
-                    "distance": distance,
-                    "filename": meta.get('filename', ''),
-                    "content_length": len(doc)
-                })
-
-            # Deterministic sorting for consistent results
-            formatted_results.sort(key=lambda x: (
-                round(x["distance"], 6),  # Round for consistent comparison
-                x["filename"],
-                x["content_length"]
-            ))
-
-            # Return only requested number, removing sorting metadata
-            final_results = []
-            for result in formatted_results[:n_results]:
-                final_results.append({
-                    "content": result["content"],
-                    "metadata": result["metadata"]
-                })
-
+            final_results = self._format_search_results(results, 0, n_results, query_vector)
+            self._search_result_cache.set(cache_key, copy.deepcopy(final_results))
             return final_results
             
         except Exception as e:
             st.error(f"Error searching collection '{collection_name}': {e}")
             return []
     
+    def search_many(
+        self,
+        collection_name: str,
+        queries: List[str],
+        n_results: int = None,
+        where: Optional[Dict[str, Any]] = None,
+        auto_domain_filter: Optional[bool] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search a collection for several queries at once.
+        
+        All queries are encoded in one batch and sent in a single multi-embedding
+        query per distinct metadata filter, instead of one encode and one
+        round-trip per query. Results are the same as search_collection's and
+        share its result cache.
+        
+        Args:
+            collection_name: Name of the collection to search.
+            queries: Search query strings.
+            n_results: Number of results to return per query.
+            where: Optional metadata filter applied to every query.
+            auto_domain_filter: Whether to detect a domain filter from each query,
+                defaults to AppConfig.AUTO_DOMAIN_FILTER.
+            
+        Returns:
+            One list of search results per query, in query order.
+        """
+        n_results = n_results or AppConfig.MAX_SEARCH_RESULTS
+        if not queries:
+            return []
+        
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            
+            document_count = collection.count()
+            if document_count == 0:
+                st.warning(f"Collection '{collection_name}' exists but contains no documents. Please add documents to the knowledge base.")
+                return [[] for _ in queries]
+            
+            query_embeddings = self._encode_queries(queries)
+            domain_wheres = [self._query_domain_filter(query, auto_domain_filter) for query in queries]
+            cache_keys = [
+                self._search_cache_key(
+                    collection_name, document_count, query_embedding, n_results, rerank=False,
+                    where=self._where_key(where), domain_filter=self._where_key(domain_where)
+                )
+                for query_embedding, domain_where in zip(query_embeddings, domain_wheres)
+            ]
+            all_results: List[Optional[List[Dict[str, Any]]]] = [
+                self._search_result_cache.get(cache_key) for cache_key in cache_keys
+            ]
+            pending = [i for i, results in enumerate(all_results) if results is None]
+            
+            # Queries with the same detected domain share one round-trip
+            groups: Dict[Optional[str], List[int]] = {}
+            for i in pending:
+                groups.setdefault(self._where_key(domain_wheres[i]), []).append(i)
+            
+            search_results = min(n_results * 2, 20)
+            query_vectors = {i: self._query_vector(collection, query_embeddings[i]) for i in pending}
+            unmatched = []
+            for indexes in groups.values():
+                domain_where = domain_wheres[indexes[0]]
+                results = collection.query(
+                    query_embeddings=[query_vectors[i] for i in indexes],
+                    n_results=search_results,
+                    where=combine_where_filters(where, domain_where),
+                    include=self._search_include()
+                )
+                for row, i in enumerate(indexes):
+                    if domain_where and not results["ids"][row]:
+                        unmatched.append(i)
+                    else:
+                        all_results[i] = self._format_search_results(results, row, n_results, query_vectors[i])
+            
+            if unmatched:
+                # Chunks indexed without domain metadata never match the detected filter
+                results = collection.query(
+                    query_embeddings=[query_vectors[i] for i in unmatched],
+                    n_results=search_results,
+                    where=where,
+                    include=self._search_include()
+                )
+                for row, i in enumerate(unmatched):
+                    all_results[i] = self._format_search_results(results, row, n_results, query_vectors[i])
+            
+            for i in pending:
+                self._search_result_cache.set(cache_keys[i], copy.deepcopy(all_results[i]))
+            return [copy.deepcopy(results) for results in all_results]
+            
+        except Exception as e:
+            st.error(f"Error searching collection '{collection_name}': {e}")
+            return [[] for _ in queries]
+    
+    @staticmethod
+    def _search_include() -> List[str]:
+        """Fields to request from collection.query; MMR selection needs the candidate embeddings."""
+        include = ["documents", "metadatas", "distances"]
+        if AppConfig.USE_MMR:
+            include.append("embeddings")
+        return include
+    
+    @staticmethod
+    def _mmr_select(
+        embeddings: List[Any],
+        n_results: int,
+        query_vector: Optional[List[float]] = None,
+        relevance: Optional[List[float]] = None
+    ) -> List[int]:
+        """Pick up to n_results candidates with maximal marginal relevance, dropping near-duplicates."""
+        threshold = AppConfig.MMR_DUPLICATE_THRESHOLD
+        return maximal_marginal_relevance(
+            embeddings,
+            n_results,
+            query_embedding=query_vector,
+            relevance=relevance,
+            lambda_mult=AppConfig.MMR_LAMBDA,
+            duplicate_threshold=threshold if threshold < 1.0 else None
+        )
+    
+    def _format_search_results(
+        self,
+        results: Dict[str, Any],
+        row: int,
+        n_results: int,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Format one query's rows of a collection.query response into sorted search results.
+        
+        When the response includes embeddings and MMR is enabled, results are
+        selected by maximal marginal relevance instead of by distance alone.
+        
+        Args:
+            results: Response of collection.query.
+            row: Index of the query within the response.
+            n_results: Number of results to return.
+            query_vector: Query embedding as sent to the collection.
+            
+        Returns:
+            Search results with id, content and metadata.
+        """
+        formatted_results = []
+        distances = results.get("distances")
+        embeddings = results.get("embeddings")
+        for i, (doc_id, doc, meta) in enumerate(zip(results["ids"][row], results["documents"][row], results["metadatas"][row])):
+            # Add distance if available, otherwise use index
+            distance = distances[row][i] if distances else i * 0.001
+            formatted_results.append({
+                "id": doc_id,
+                "content": doc,
+                "metadata": meta,
+                "distance": distance,
+                "embedding": embeddings[row][i] if embeddings is not None else None,
+                "filename": meta.get('filename', ''),
+                "content_length": len(doc)
+            })
+
+        # Deterministic sorting for consistent results
+        formatted_results.sort(key=lambda x: (
+            round(x["distance"], 6),  # Round for consistent comparison
+            x["filename"],
+            x["content_length"]
+        ))
+
+        if AppConfig.USE_MMR and embeddings is not None and query_vector is not None and formatted_results:
+            selected = self._mmr_select([result["embedding"] for result in formatted_results], n_results, query_vector)
+            formatted_results = [formatted_results[i] for i in selected]
+
+        # Return only requested number, removing sorting metadata
+        return [
+            {
+                "id": result["id"],
+                "content": result["content"],
+                "metadata": result["metadata"]
+            }
+            for result in formatted_results[:n_results]
+        ]
+    
+    def search_collection_hybrid(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = None,
+        where: Optional[Dict[str, Any]] = None,
+        auto_domain_filter: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Search a collection with dense and BM25 results fused by reciprocal rank.
+        
+        Lexical matching recovers chunks containing exact tokens such as outcome
+        IDs and project titles that dense search ranks poorly.
+        
+        Args:
+            collection_name: Name of the collection to search.
+            query: Search query string.
+            n_results: Number of results to return.
+            where: Optional metadata filter applied to both retrievers.
+            auto_domain_filter: Whether to detect a domain filter from the query,
+                defaults to AppConfig.AUTO_DOMAIN_FILTER.
+            
+        Returns:
+            List of search results with content, metadata and fusion score.
+        """
+        n_results = n_results or AppConfig.MAX_SEARCH_RESULTS
+        domain_where = self._query_domain_filter(query, auto_domain_filter)
+        
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            
+            document_count = collection.count()
+            if document_count == 0:
+                st.warning(f"Collection '{collection_name}' exists but contains no documents. Please add documents to the knowledge base.")
+                return []
+            
+            query_embedding = self._encode_query(query)
+            cache_key = self._search_cache_key(
+                collection_name, document_count, query_embedding, n_results,
+                rerank=False, mode="hybrid",
+                where=self._where_key(where), domain_filter=self._where_key(domain_where)
+            )
+            cached_results = self._search_result_cache.get(cache_key)
+            if cached_results is not None:
+                return copy.deepcopy(cached_results)
+            
+            candidate_n = min(max(n_results, AppConfig.HYBRID_CANDIDATES), document_count)
+            effective_where = combine_where_filters(where, domain_where)
+            include = [field for field in self._search_include() if field != "distances"]
+            dense_results = collection.query(
+                query_embeddings=[self._query_vector(collection, query_embedding)],
+                n_results=candidate_n,
+                where=effective_where,
+                include=include
+            )
+            if domain_where and not dense_results["ids"][0]:
+                # Chunks indexed without domain metadata never match the detected filter
+                effective_where = where
+                dense_results = collection.query(
+                    query_embeddings=[self._query_vector(collection, query_embedding)],
+                    n_results=candidate_n,
+                    where=effective_where,
+                    include=include
+                )
+            dense_embeddings = dense_results.get("embeddings")
+            records = {
+                doc_id: (doc, meta, dense_embeddings[0][i] if dense_embeddings is not None else None)
+                for i, (doc_id, doc, meta) in enumerate(zip(
+                    dense_results["ids"][0],
+                    dense_results["documents"][0],
+                    dense_results["metadatas"][0]
+                ))
+            }
+            
+            lexical_ids = [
+                doc_id for doc_id, _ in self._get_lexical_index(collection).search(query, candidate_n)
+            ]
+            if effective_where and lexical_ids:
+                # The lexical index has no metadata, so its hits are filtered through the store
+                allowed = set(collection.get(ids=lexical_ids, where=effective_where, include=[])["ids"])
+                lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in allowed]
+            fused = reciprocal_rank_fusion(
+                [dense_results["ids"][0], lexical_ids],
+                k=AppConfig.RRF_K
+            )[:min(n_results * 2, 20) if AppConfig.USE_MMR else n_results]
+            
+            # Lexical-only hits still need their content and metadata
+            missing_ids = [doc_id for doc_id, _ in fused if doc_id not in records]
+            if missing_ids:
+                fetched = collection.get(ids=missing_ids, include=include)
+                fetched_embeddings = fetched.get("embeddings")
+                for i, (doc_id, doc, meta) in enumerate(zip(fetched["ids"], fetched["documents"], fetched["metadatas"])):
+                    records[doc_id] = (doc, meta, fetched_embeddings[i] if fetched_embeddings is not None else None)
+            
+            fused = [(doc_id, score) for doc_id, score in fused if doc_id in records]
+            if AppConfig.USE_MMR and fused and all(records[doc_id][2] is not None for doc_id, _ in fused):
+                # Fusion scores, spread over [0, 1] across the candidates, stand in for similarity to the query
+                selected = self._mmr_select(
+                    [records[doc_id][2] for doc_id, _ in fused],
+                    n_results,
+                    relevance=min_max_normalize([score for _, score in fused])
+                )
+                fused = [fused[i] for i in selected]
+            fused = fused[:n_results]
+            
+            final_results = [
+                {
+                    "id": doc_id,
+                    "content": records[doc_id][0],
+                    "metadata": records[doc_id][1],
+                    "fusion_score": score
+                }
+                for doc_id, score in fused
+                if doc_id in records
+            ]
+            
+            self._search_result_cache.set(cache_key, copy.deepcopy(final_results))
+            return final_results
+            
+        except Exception as e:
+            st.error(f"Error in hybrid search for collection '{collection_name}': {e}")
+            return self.search_collection(
+                collection_name, query, n_results, where=where, auto_domain_filter=auto_domain_filter
+            )
+    
     def search_collection_with_reranking(
         self, 
         collection_name: str, 
         query: str, 
         n_results: int = None,
-        initial_results_multiplier: int = 3
+        initial_results_multiplier: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        auto_domain_filter: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """Search collection with cross-encoder reranking for better relevance.
         
+        Scores of (query, chunk) pairs are cached, so only candidates not scored
+        for this query before are passed to the cross-encoder. With a
+        RERANK_LATENCY_BUDGET_MS budget, candidates are reranked as a cascade
+        (see _cascade_rerank) and unscored candidates keep their initial order
+        after the scored ones. How many candidates were reranked is stored in
+        last_rerank_report.
+        
         Args:
             collection_name: Name of the collection to search.
             query: Search query string.
             n_results: Number of final results to return.
             initial_results_multiplier: How many initial results to get before reranking.
+            where: Optional metadata filter for the initial search.
+            auto_domain_filter: Whether to detect a domain filter from the query,
+                defaults to AppConfig.AUTO_DOMAIN_FILTER.
             
         Returns:
             List of reranked search results with content and metadata.
         """
         n_results = n_results or AppConfig.MAX_SEARCH_RESULTS
+        filters = {"where": where, "auto_domain_filter": auto_domain_filter}
         
         if not AppConfig.USE_RERANKING or self.reranker is None:
-            return self.search_collection(collection_name, query, n_results)
+            return self.search_collection(collection_name, query, n_results, **filters)
         
         try:
+            collection = self.get_or_create_collection(collection_name)
+            cache_key = self._search_cache_key(
+                collection_name,
+                collection.count(),
+                self._encode_query(query),
+                n_results,
+                rerank=True,
+                initial_results_multiplier=initial_results_multiplier,
+                hybrid=AppConfig.USE_HYBRID_SEARCH,
+                latency_budget_ms=AppConfig.RERANK_LATENCY_BUDGET_MS,
+                where=self._where_key(where),
+                domain_filter=self._where_key(self._query_domain_filter(query, auto_domain_filter))
+            )
+            cached = self._search_result_cache.get(cache_key)
+            if cached is not None:
+                self.last_rerank_report = dict(cached["report"], cached=True)
+                return copy.deepcopy(cached["results"])
+            
             # Get more initial results for reranking
             initial_n = min(n_results * initial_results_multiplier, 20)
-            initial_results = self.search_collection(collection_name, query, initial_n)
+            if AppConfig.USE_HYBRID_SEARCH:
+                initial_results = self.search_collection_hybrid(collection_name, query, initial_n, **filters)
+            else:
+                initial_results = self.search_collection(collection_name, query, initial_n, **filters)
             
             if len(initial_results) <= n_results:
+                self.last_rerank_report = None
                 return initial_results
             
-            # Prepare query-document pairs for reranking
-            pairs = [(query, doc['content']) for doc in initial_results]
-            
             # Get relevance scores from cross-encoder
-            scores = self.reranker.predict(pairs)
+            started = time.perf_counter()
+            if AppConfig.RERANK_LATENCY_BUDGET_MS > 0:
+                scores, stop_reason = self._cascade_rerank(
+                    query, initial_results, n_results, AppConfig.RERANK_LATENCY_BUDGET_MS
+                )
+            else:
+                scores, stop_reason = self._rerank_scores(query, initial_results), "complete"
             
-            # Combine results with scores and sort
+            # Combine results with scores and sort; unscored candidates keep their initial order
             scored_results = [
-                (doc, float(score)) 
+                (doc, score)
                 for doc, score in zip(initial_results, scores)
+                if score is not None
             ]
             scored_results.sort(key=lambda x: x[1], reverse=True)
+            scored_results += [(doc, None) for doc, score in zip(initial_results, scores) if score is None]
             
             # Return top n_results with added relevance scores
             reranked_results = []
             for doc, score in scored_results[:n_results]:
                 doc_with_score = doc.copy()
-                doc_with_score['relevance_score'] = score
+                if score is not None:
+                    doc_with_score['relevance_score'] = score
                 reranked_results.append(doc_with_score)
             
+            self.last_rerank_report = {
+                "candidates": len(initial_results),
+                "reranked": len(initial_results) - scores.count(None),
+                "stop_reason": stop_reason,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+            self._search_result_cache.set(
+                cache_key,
+                {"results": copy.deepcopy(reranked_results), "report": dict(self.last_rerank_report)}
+            )
             return reranked_results
             
         except Exception as e:
             st.error(f"Error in reranking for collection '{collection_name}': {e}")
             # Fallback to regular search
-            return self.search_collection(collection_name, query, n_results)
+            return self.search_collection(collection_name, query, n_results, **filters)
     
-    def _get_existing_files(self, collection) -> set:
-        """Get set of existing filenames in a collection."""
-        try:
-            existing_data = collection.get(include=["metadatas"])
-            return {
-                meta.get('filename') 
-                for meta in existing_data.get('metadatas', [])
-                if meta and meta.get('filename')
-            }
-        except Exception:
-            return set()
+    def _rerank_scores(self, query: str, results: List[Dict[str, Any]]) -> List[float]:
+        """Score search results against a query, reusing cached cross-encoder scores.
+        
+        Uncached pairs are scored in a single predict call. Chunk IDs are derived
+        from chunk content, so a cached score never outlives the text it scored.
+        
+        Args:
+            query: Search query string.
+            results: Search results with id and content.
+            
+        Returns:
+            Relevance scores aligned with results.
+        """
+        reranker = self.reranker
+        model_key = self._reranker_cache_model_name(reranker)
+        query_hash = hashlib.sha1(self._normalize_query(query).encode("utf-8")).hexdigest()
+        keys = [
+            (model_key, query_hash, doc.get("id") or hashlib.sha1(doc["content"].encode("utf-8")).hexdigest())
+            for doc in results
+        ]
+        
+        scores = [rerank_score_cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            computed = reranker.predict([(query, results[i]["content"]) for i in missing])
+            for i, score in zip(missing, computed):
+                scores[i] = float(score)
+                rerank_score_cache.set(keys[i], scores[i])
+        return scores
     
-    def _process_files_for_collection(self, file_paths: List[str]) -> List[Dict]:
-        """Process files and return document data for collection."""
-        documents_data = []
+    def _cascade_rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        n_results: int,
+        budget_ms: float
+    ) -> tuple:
+        """Rerank candidates in initial rank order until the top results settle or time runs out.
+        
+        The first step scores enough candidates to fill n_results, later steps
+        add RERANK_CASCADE_BATCH_SIZE candidates each. The cascade stops when
+        the top n_results are unchanged for RERANK_STABLE_BATCHES steps, or when
+        the next step is expected to overrun the latency budget.
         
-        for file_path in file_paths:
-            filename = os.path.basename(file_path)
+        Args:
+            query: Search query string.
+            candidates: Search results in initial rank order.
+            n_results: Number of results that will be returned.
+            budget_ms: Latency budget for reranking in milliseconds.
             
-            try:
-                # Read and process file
-                with open(file_path, "rb") as f:
-                    file_bytes = f.read()
-                
-                file_type = document_processor.get_file_type(filename)
-                if not file_type:
-                    st.warning(f"Unsupported file type: {filename}")
-                    continue
-                
-                # Extract text based on file type
-                file_io = io.BytesIO(file_bytes)
-                if file_type == 'pdf':
-                    text = document_processor.extract_text_from_pdf(file_io)
-                elif file_type == 'docx':
-                    text = document_processor.extract_text_from_docx(file_io)
-                elif file_type == 'txt' or file_type == 'md':
-                    text = document_processor.extract_text_from_txt(file_io)
-                elif file_type == 'csv':
-                    text = document_processor.extract_text_from_csv(file_io)
-                elif file_type == 'xlsx':
-                    text = document_processor.extract_text_from_xlsx(file_io)
-                else:
-                    continue
-                
-                if not text.strip():
-                    st.warning(f"No text extracted from {filename}")
-                    continue
-                
-                cleaned_text = document_processor.clean_text(text)
-                if AppConfig.USE_SEMANTIC_CHUNKING:
-                    chunks = document_processor.semantic_chunk_text(cleaned_text)
+        Returns:
+            Scores aligned with candidates, None for unscored ones, and the
+            stop reason: "complete", "stable" or "budget".
+        """
+        started = time.perf_counter()
+        batch_size = max(AppConfig.RERANK_CASCADE_BATCH_SIZE, 1)
+        scores: List[Optional[float]] = [None] * len(candidates)
+        position = 0
+        previous_top = None
+        stable_batches = 0
+        
+        while position < len(candidates):
+            end = min(position + (max(batch_size, n_results) if position == 0 else batch_size), len(candidates))
+            scores[position:end] = self._rerank_scores(query, candidates[position:end])
+            position = end
+            if position == len(candidates):
+                break
+            
+            top = set(sorted(range(position), key=lambda i: scores[i], reverse=True)[:n_results])
+            stable_batches = stable_batches + 1 if top == previous_top else 0
+            previous_top = top
+            if stable_batches >= AppConfig.RERANK_STABLE_BATCHES:
+                return scores, "stable"
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            next_batch_ms = elapsed_ms / position * min(batch_size, len(candidates) - position)
+            if elapsed_ms + next_batch_ms > budget_ms:
+                return scores, "budget"
+        
+        return scores, "complete"
+    
+    @staticmethod
+    def _reranker_cache_model_name(reranker) -> str:
+        """Name under which rerank scores are cached, distinguishing quantized backends."""
+        backend = getattr(reranker, "backend", None)
+        return f"{AppConfig.RERANKER_MODEL}@{backend}" if backend else AppConfig.RERANKER_MODEL
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Normalize query text so trivially different spellings share a cache entry."""
+        return " ".join(unicodedata.normalize("NFC", query).split())
+
+    def _encode_query(self, query: str) -> tuple:
+        """Encode a search query, reusing cached embeddings for repeated questions.
+
+        Args:
+            query: Search query string.
+
+        Returns:
+            Query embedding as a tuple of floats.
+        """
+        return self._encode_queries([query])[0]
+
+    def _encode_queries(self, queries: List[str]) -> List[tuple]:
+        """Encode search queries, computing the uncached ones in a single batch.
+
+        Args:
+            queries: Search query strings.
+
+        Returns:
+            Query embeddings as tuples of floats, aligned with queries.
+        """
+        model_name = self._embedding_cache_model_name()
+        normalized_queries = [self._normalize_query(query) for query in queries]
+        embeddings = [query_embedding_cache.get((model_name, query)) for query in normalized_queries]
+
+        missing = sorted({query for query, embedding in zip(normalized_queries, embeddings) if embedding is None})
+        if missing:
+            computed = dict(zip(
+                missing,
+                (tuple(embedding.tolist()) for embedding in self.embedding_model.encode(
+                    missing, batch_size=AppConfig.EMBEDDING_BATCH_SIZE, show_progress_bar=False
+                ))
+            ))
+            for query, embedding in computed.items():
+                query_embedding_cache.set((model_name, query), embedding)
+            embeddings = [
+                embedding if embedding is not None else computed[query]
+                for query, embedding in zip(normalized_queries, embeddings)
+            ]
+        return embeddings
+
+    @staticmethod
+    def _query_domain_filter(query: str, auto_domain_filter: Optional[bool]) -> Optional[Dict[str, Any]]:
+        """Return the domain filter detected from a query, if automatic filtering is on."""
+        if auto_domain_filter is None:
+            auto_domain_filter = AppConfig.AUTO_DOMAIN_FILTER
+        return domain_filter_for_query(query) if auto_domain_filter else None
+
+    @staticmethod
+    def _where_key(where: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Serialize a metadata filter for use in a cache key."""
+        return json.dumps(where, sort_keys=True) if where else None
+
+    def _search_cache_key(
+        self,
+        collection_name: str,
+        document_count: int,
+        query_embedding: tuple,
+        n_results: int,
+        rerank: bool,
+        **options
+    ) -> tuple:
+        """Build a search result cache key bound to the current collection version.
+
+        The document count is part of the version so that writes made through
+        another client or process also invalidate cached results.
+        """
+        embedding_hash = hashlib.sha1(array.array("d", query_embedding).tobytes()).hexdigest()
+        mmr = (AppConfig.MMR_LAMBDA, AppConfig.MMR_DUPLICATE_THRESHOLD) if AppConfig.USE_MMR else None
+        return (
+            collection_name,
+            self._collection_versions.get(collection_name, 0),
+            document_count,
+            embedding_hash,
+            n_results,
+            rerank,
+            mmr,
+            tuple(sorted(options.items()))
+        )
+
+    def _bump_collection_version(self, collection_name: str):
+        """Mark a collection as changed so cached search results are no longer used."""
+        self._collection_versions[collection_name] = (
+            self._collection_versions.get(collection_name, 0) + 1
+        )
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return size and hit/miss counters for the retrieval caches."""
+        stats = {
+            "query_embeddings": query_embedding_cache.stats(),
+            "search_results": self._search_result_cache.stats(),
+            "rerank_scores": rerank_score_cache.stats()
+        }
+        cache = get_embedding_cache()
+        if cache is not None:
+            stats["chunk_embeddings"] = cache.stats()
+        return stats
+
+    def _ingest_config(self) -> Dict[str, Any]:
+        """Return the chunking and embedding settings that shape indexed chunks."""
+        return {
+            "chunk_size": AppConfig.CHUNK_SIZE,
+            "chunk_overlap": AppConfig.CHUNK_OVERLAP,
+            "semantic_chunking": AppConfig.USE_SEMANTIC_CHUNKING,
+            "tokenizer": AppConfig.TOKENIZER_MODEL,
+            "embedding_model": self.embedding_model_name,
+            "projection": self._desired_projection_config(),
+            # Bumped when chunk metadata fields change, so files are re-indexed
+            "metadata_version": 2
+        }
+    
+    def _get_manifest(self, collection_name: str) -> IngestionManifest:
+        """Get the ingestion manifest for a collection, kept next to the database."""
+        if collection_name not in self._manifests:
+            manifest_path = None
+            if self.persistent:
+                manifest_path = os.path.join(
+                    self.db_path, f"ingest_manifest_{collection_name}.json"
+                )
+            self._manifests[collection_name] = IngestionManifest(manifest_path)
+        return self._manifests[collection_name]
+    
+    def _delete_file_chunks(self, collection, file_path: str):
+        """Delete every chunk that was ingested from a source file."""
+        self._delete_chunks(collection, {"source_path": normalize_source_path(file_path)})
+    
+    def _delete_chunks_from_other_config(self, collection, manifest: IngestionManifest, file_path: str):
+        """Delete a file's chunks if they were indexed under different ingest settings.
+        
+        Chunk IDs only cover the source path and content, so reconciling would
+        keep matching chunks with the metadata and vectors of the old settings.
+        """
+        entry = manifest.entries.get(normalize_source_path(file_path))
+        if entry is not None and entry.get("config") != self._ingest_config():
+            self._delete_file_chunks(collection, file_path)
+    
+    def _delete_chunks(self, collection, where: Dict[str, Any]):
+        """Delete chunks matching a metadata filter from the collection and lexical index."""
+        self._delete_chunk_ids(collection, collection.get(where=where, include=[])["ids"])
+    
+    def _delete_chunk_ids(self, collection, ids: List[str]):
+        """Delete chunks by ID from the collection and lexical index."""
+        if not ids:
+            return
+        collection.delete(ids=ids)
+        self._get_lexical_index(collection).remove_documents(ids)
+        self._bump_collection_version(collection.name)
+    
+    @staticmethod
+    def _chunk_id(source_path: str, chunk: str) -> str:
+        """Build a deterministic chunk ID from its source file and content."""
+        path_hash = hashlib.sha1(source_path.encode("utf-8")).hexdigest()[:12]
+        content_hash = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        return f"doc_{path_hash}_{content_hash}"
+    
+    @staticmethod
+    def _get_file_chunk_indexes(collection, source_path: str) -> Dict[str, Any]:
+        """Map the IDs of a file's stored chunks to their chunk_index."""
+        existing = collection.get(where={"source_path": source_path}, include=["metadatas"])
+        return {
+            chunk_id: meta.get("chunk_index")
+            for chunk_id, meta in zip(existing["ids"], existing["metadatas"])
+        }
+    
+    def _iter_collection_pages(self, collection, include: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield a collection's entries in pages of at most the ingest batch size."""
+        page_size = self._get_ingest_batch_size()
+        offset = 0
+        while True:
+            page = collection.get(include=include, limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield page
+            offset += len(page["ids"])
+    
+    def _forget_collection(self, collection_name: str):
+        """Invalidate cached results, manifest and lexical index of a deleted collection."""
+        self._bump_collection_version(collection_name)
+        manifest = self._get_manifest(collection_name)
+        manifest.clear()
+        manifest.save()
+        
+        self._lexical_indexes.pop(collection_name, None)
+        self._projections.pop(collection_name, None)
+        for path in (self._lexical_index_path(collection_name), self._projection_path(collection_name)):
+            if path and os.path.exists(path):
+                os.remove(path)
+    
+    @staticmethod
+    def _desired_projection_config() -> Optional[Dict[str, Any]]:
+        """Return the configured embedding projection, None when vectors are stored as is."""
+        if AppConfig.EMBEDDING_PROJECTION in ("", "none"):
+            return None
+        return {"method": AppConfig.EMBEDDING_PROJECTION, "dim": AppConfig.EMBEDDING_PROJECTION_DIM}
+    
+    def _projection_path(self, collection_name: str) -> Optional[str]:
+        """Return where a collection's embedding projection is persisted, None for in-memory stores."""
+        if not self.persistent:
+            return None
+        return os.path.join(self.db_path, f"projection_{collection_name}.npz")
+    
+    def _get_projection(self, collection_name: str) -> Optional[EmbeddingProjection]:
+        """Get the fitted projection a collection's vectors are stored under, if any."""
+        if collection_name not in self._projections:
+            path = self._projection_path(collection_name)
+            self._projections[collection_name] = EmbeddingProjection.load(path) if path else None
+        return self._projections[collection_name]
+    
+    def _set_projection(self, collection_name: str, projection: EmbeddingProjection):
+        """Store a fitted projection for a collection."""
+        self._projections[collection_name] = projection
+        path = self._projection_path(collection_name)
+        if path:
+            projection.save(path)
+    
+    def _query_vector(self, collection, query_embedding) -> List[float]:
+        """Map a query embedding into the space of the collection's stored vectors."""
+        projection = self._get_projection(collection.name)
+        if projection is None:
+            return list(query_embedding)
+        return projection.transform([query_embedding])[0].tolist()
+    
+    def _lexical_index_path(self, collection_name: str) -> Optional[str]:
+        """Return where a collection's BM25 index is persisted, None for in-memory stores."""
+        if not self.persistent:
+            return None
+        return os.path.join(self.db_path, f"lexical_index_{collection_name}.json")
+    
+    def _get_lexical_index(self, collection) -> BM25Index:
+        """Get the BM25 index for a collection, loading or rebuilding it as needed."""
+        index = self._lexical_indexes.get(collection.name)
+        if index is not None:
+            return index
+        
+        index_path = self._lexical_index_path(collection.name)
+        index = BM25Index.load(index_path) if index_path else None
+        if index is None or len(index) != collection.count():
+            index = BM25Index()
+            for page in self._iter_collection_pages(collection, include=["documents"]):
+                index.add_documents(page["ids"], page["documents"])
+            if index_path:
+                index.save(index_path)
+        
+        self._lexical_indexes[collection.name] = index
+        return index
+    
+    def _save_lexical_index(self, collection):
+        """Persist a collection's BM25 index next to the database."""
+        index_path = self._lexical_index_path(collection.name)
+        index = self._lexical_indexes.get(collection.name)
+        if index_path and index is not None:
+            index.save(index_path)
+    
+    def _process_files_for_collection(self, file_paths: List[str]) -> Iterator[Dict]:
+        """Process files and yield document data for the collection in input order.
+        
+        Extraction runs in EXTRACTION_WORKERS processes when configured, and only
+        a bounded number of extracted files are held in memory at once. Problems
+        reported by the workers are surfaced here in the main process.
+        """
+        for result in iter_extracted_files(file_paths):
+            filename = result['filename']
+            
+            for level, message in result['warnings']:
+                getattr(st, level)(f"{filename}: {message}")
+            
+            if result['error']:
+                # Skipped files are expected, e.g. unsupported types, not failures
+                if result['skipped']:
+                    st.warning(result['error'])
                 else:
-                    chunks = document_processor.chunk_text(cleaned_text)
-                
-                documents_data.append({
-                    'filename': filename,
-                    'chunks': chunks
-                })
-                
-            except Exception as e:
-                st.error(f"Failed to process {filename}: {e}")
+                    st.error(result['error'])
                 continue
-        
-        return documents_data
+            
+            if not result['chunks']:
+                st.warning(f"No text extracted from {filename}")
+                continue
+            
+            yield {
+                'filename': filename,
+                'source_path': result['source_path'],
+                'chunks': result['chunks'],
+                'chunk_metadatas': result['chunk_metadatas']
+            }
     
     def _add_documents_to_collection(
         self, 
         collection, 
-        documents_data: List[Dict], 
-        show_progress: bool
+        documents_data: Iterable[Dict], 
+        show_progress: bool,
+        on_document_added: Optional[Callable[[Dict], None]] = None
     ) -> bool:
-        """Add processed documents to ChromaDB collection."""
-        try:
-            all_chunks = []
-            metadatas = []
-            ids = []
+        """Embed and add processed documents to a ChromaDB collection in batches.
+        
+        Chunks are buffered up to INGEST_BATCH_SIZE (capped by the client's
+        maximum batch size), then embedded and written, so memory use does not
+        grow with the number of documents. Chunk IDs are derived from the source
+        path and chunk content, so a document's chunks that are already stored
+        at the same position are kept, and its other stored chunks are deleted.
+        Callers delete a file's chunks first when its ingest settings changed.
+        
+        When an embedding projection is configured and the collection is empty,
+        the first PROJECTION_FIT_SAMPLES embeddings are held back to fit it, then
+        every vector is projected before it is written.
+        
+        Args:
+            collection: Target ChromaDB collection.
+            documents_data: Iterable of document dicts with filename, source_path
+                and chunks, and optionally chunk_metadatas with extra metadata
+                for each chunk.
+            show_progress: Whether to show progress indicators.
+            on_document_added: Called with each document's data, including its
+                chunk_count, once all of its chunks have been written.
+            
+        Returns:
+            True if any documents were indexed, False otherwise.
+        """
+        batch_size = self._get_ingest_batch_size()
+        batch = {"documents": [], "metadatas": [], "ids": []}
+        completed_documents = []
+        totals = {"documents": 0, "chunks": 0}
+        
+        projection = self._get_projection(collection.name)
+        projection_config = self._desired_projection_config()
+        if projection is None and projection_config and collection.count() == 0:
+            projection = EmbeddingProjection(projection_config["method"], projection_config["dim"])
+        fit_samples = max(AppConfig.PROJECTION_FIT_SAMPLES, batch_size)
+        held = {"documents": [], "metadatas": [], "ids": [], "embeddings": []}
+        
+        def write(ids, documents, metadatas, embeddings):
+            if projection is not None:
+                embeddings = projection.transform(embeddings).tolist()
+            collection.add(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+            self._get_lexical_index(collection).add_documents(ids, documents)
+            self._bump_collection_version(collection.name)
+            totals["chunks"] += len(documents)
+        
+        def flush(final: bool = False):
+            if batch["documents"]:
+                embeddings = self._embed_documents(batch["documents"])
+                if projection is not None and not projection.fitted:
+                    for key in ("documents", "metadatas", "ids"):
+                        held[key].extend(batch[key])
+                    held["embeddings"].extend(embeddings)
+                else:
+                    write(batch["ids"], batch["documents"], batch["metadatas"], embeddings)
+                for values in batch.values():
+                    values.clear()
             
-            doc_offset = collection.count()
+            if held["ids"]:
+                # Documents only count as added once their chunks are written
+                if len(held["ids"]) < fit_samples and not final:
+                    return
+                projection.fit(held["embeddings"])
+                self._set_projection(collection.name, projection)
+                write(held["ids"], held["documents"], held["metadatas"], held["embeddings"])
+                for values in held.values():
+                    values.clear()
             
-            for doc_idx, doc_data in enumerate(documents_data):
+            for document_data in completed_documents:
+                totals["documents"] += 1
+                if on_document_added:
+                    on_document_added(document_data)
+            completed_documents.clear()
+        
+        try:
+            for doc_data in documents_data:
                 filename = doc_data['filename']
-                chunks = doc_data['chunks']
+                file_metadata = derive_file_metadata(doc_data['source_path'])
+                source_path = file_metadata['source_path']
+                
+                chunk_metadatas = doc_data.get('chunk_metadatas') or []
                 
-                for chunk_idx, chunk in enumerate(chunks):
+                file_chunks = {}
+                for chunk_idx, chunk in enumerate(doc_data['chunks']):
                     if not chunk.strip():
                         continue
-                        
-                    all_chunks.append(chunk)
-                    metadatas.append({
+                    # Repeated chunks within a file (e.g. boilerplate) are stored once
+                    file_chunks.setdefault(self._chunk_id(source_path, chunk), (chunk_idx, chunk))
+                
+                existing_chunks = self._get_file_chunk_indexes(collection, source_path)
+                self._delete_chunk_ids(collection, [
+                    chunk_id for chunk_id, chunk_idx in existing_chunks.items()
+                    if chunk_id not in file_chunks or file_chunks[chunk_id][0] != chunk_idx
+                ])
+                
+                for chunk_id, (chunk_idx, chunk) in file_chunks.items():
+                    if existing_chunks.get(chunk_id) == chunk_idx:
+                        continue
+                    
+                    batch["documents"].append(chunk)
+                    batch["metadatas"].append({
                         "filename": filename,
+                        **file_metadata,
+                        **(chunk_metadatas[chunk_idx] if chunk_idx < len(chunk_metadatas) else {}),
                         "chunk_index": chunk_idx
                     })
-                    ids.append(f"doc_{doc_offset + doc_idx}_chunk_{chunk_idx}")
+                    batch["ids"].append(chunk_id)
+                    
+                    if len(batch["documents"]) >= batch_size:
+                        flush()
+                
+                if file_chunks:
+                    completed_documents.append({
+                        'filename': filename,
+                        'source_path': doc_data['source_path'],
+                        'chunk_count': len(file_chunks)
+                    })
             
-            if not all_chunks:
-                return False
+            flush(final=True)
             
-            # Generate embeddings and add to collection
-            embeddings = self.embedding_model.encode(
-                all_chunks, 
-                show_progress_bar=show_progress
-            ).tolist()
-            
-            collection.add(
-                embeddings=embeddings,
-                documents=all_chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
+            if not totals["documents"]:
+                return False
             
             if show_progress:
                 st.sidebar.success(
-                    f"Successfully added {len(documents_data)} documents "
-                    f"({len(all_chunks)} chunks) to the knowledge base."
+                    f"Successfully added {totals['documents']} documents "
+                    f"({totals['chunks']} new chunks) to the knowledge base."
                 )
             
             return True
@@ -485,6 +1623,73 @@ class VectorStore:
             st.error(f"Error adding documents to collection: {e}")
             return False
     
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunk texts, computing only those missing from the embedding cache.
+        
+        Args:
+            texts: Chunk texts to embed.
+            
+        Returns:
+            Embeddings aligned with texts.
+        """
+        cache = get_embedding_cache()
+        if cache is None:
+            return self.embedding_model.encode(
+                texts,
+                batch_size=AppConfig.EMBEDDING_BATCH_SIZE,
+                show_progress_bar=False
+            ).tolist()
+        
+        cache_model_name = self._embedding_cache_model_name()
+        embeddings = cache.get_many(
+            texts,
+            cache_model_name,
+            dim=self.embedding_model.get_sentence_embedding_dimension()
+        )
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            computed = self.embedding_model.encode(
+                missing_texts,
+                batch_size=AppConfig.EMBEDDING_BATCH_SIZE,
+                show_progress_bar=False
+            )
+            cache.put_many(missing_texts, computed, cache_model_name)
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        
+        return [embedding.tolist() for embedding in embeddings]
+    
+    def _embedding_cache_model_name(self) -> str:
+        """Name under which embeddings are cached, distinguishing quantized backends."""
+        backend = getattr(self.embedding_model, "backend", None)
+        return f"{self.embedding_model_name}@{backend}" if backend else self.embedding_model_name
+    
+    def _embedding_space_matches(self, collection) -> bool:
+        """Check that a collection's stored vectors match the embedding model and projection."""
+        projection = self._get_projection(collection.name)
+        if (projection.config if projection else None) != self._desired_projection_config():
+            return False
+        
+        sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if sample is None or len(sample) == 0:
+            return True
+        model_dim = self.embedding_model.get_sentence_embedding_dimension()
+        if projection is not None:
+            return len(sample[0]) == projection.output_dim and projection.input_dim == model_dim
+        return len(sample[0]) == model_dim
+    
+    def _get_ingest_batch_size(self) -> int:
+        """Return the ingestion batch size, capped by the client's maximum batch size."""
+        batch_size = max(AppConfig.INGEST_BATCH_SIZE, 1)
+        try:
+            max_batch_size = self.client.get_max_batch_size()
+        except Exception:
+            max_batch_size = None
+        if max_batch_size:
+            batch_size = min(batch_size, max_batch_size)
+        return batch_size
+    
     def list_collections(self) -> List[str]:
         """List all collections in the vector store."""
         try:
@@ -504,6 +1709,7 @@ class VectorStore:
         """
         try:
             self.client.delete_collection(collection_name)
+            self._forget_collection(collection_name)
             return True
         except Exception as e:
             st.error(f"Error deleting collection '{collection_name}': {e}")
@@ -527,6 +1733,7 @@ class VectorStore:
             if collection_name in collections:
                 st.info(f"Deleting existing collection '{collection_name}' to resolve embedding dimension mismatch...")
                 self.client.delete_collection(collection_name)
+                self._forget_collection(collection_name)
                 st.success(f"Collection '{collection_name}' deleted successfully.")
             
             # Create new collection (will be created with correct dimensions on first add)
@@ -539,13 +1746,26 @@ class VectorStore:
             return False
 
 
-# Create global instances for easy importing
-betty_vector_store = VectorStore(
-    db_path=AppConfig.CHROMA_DB_PATH,
-    embedding_model_name=AppConfig.EMBEDDING_MODEL
-)
+# Global instances for easy importing, created on first access
+_GLOBAL_STORE_SETTINGS = {
+    "betty_vector_store": lambda: {
+        "db_path": AppConfig.CHROMA_DB_PATH,
+        "embedding_model_name": AppConfig.EMBEDDING_MODEL
+    },
+    "chat_vector_store": lambda: {
+        "db_path": "./chroma_db",  # Chat app uses different path
+        "embedding_model_name": AppConfig.EMBEDDING_MODEL
+    }
+}
+_global_stores: Dict[str, VectorStore] = {}
+_global_stores_lock = threading.Lock()
+
 
-chat_vector_store = VectorStore(
-    db_path="./chroma_db",  # Chat app uses different path
-    embedding_model_name=AppConfig.EMBEDDING_MODEL
-)
\ No newline at end of file
+def __getattr__(name: str) -> VectorStore:
+    """Create betty_vector_store and chat_vector_store when first imported or accessed."""
+    if name not in _GLOBAL_STORE_SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _global_stores_lock:
+        if name not in _global_stores:
+            _global_stores[name] = VectorStore(**_GLOBAL_STORE_SETTINGS[name]())
+        return _global_stores[name]
\ No newline at end of file